@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Show the progress of running simulations in one terminal table.
+
+Replaces the `watch -n 1 wc -l $EXP_ROOT/fct/<cc>_fct.txt` panes of the
+tmux scripts. Runs come from the status file of run_experiments.py
+(job name, state, pid, FCT file, traffic file), or from FCT files given
+with --fct (and their traffic files with --traffic, in the same order).
+
+Every refresh (--interval seconds):
+
+  flows     each FCT file is followed by byte offset: only the bytes
+            appended since the last refresh are read and their newlines
+            counted (a partial last line waits for the next refresh; a
+            file that shrinks is re-read from the start)
+  expected  the flow count in the traffic file's header (text or binary,
+            read once). A FLOW_FILE line of the job's config gives the
+            traffic file if the job names none, and an FCT_OUTPUT_FILE
+            line replaces the runner's default FCT path
+  rate/ETA  completed flows per second over the last --window seconds,
+            and the time left at that rate
+  CPU/RSS   summed over the job's session from /proc/<pid>/stat, with
+            one scan of /proc per refresh (run_experiments.py starts each
+            job in its own session, so the ns3 binary under `./ns3 run` is
+            included)
+
+The monitor stops when no job is pending or running (with a status file)
+or on Ctrl-C; --once prints a single table.
+
+Usage:
+    uv run exp_run/monitor_runs.py --status /home/chaoyang/runtime_config/run_status.json
+    uv run exp_run/monitor_runs.py --fct runtime_config/fct/cc_1_fct.txt --traffic traffic.txt --once
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'traffic_gen'))
+from traffic_io import read_count  # noqa: E402
+
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+READ_BLOCK = 1 << 20
+CONFIG_KEYS = {'FLOW_FILE': 'traffic', 'FCT_OUTPUT_FILE': 'fct'}
+
+
+class FctFollower:
+    """Line count of a growing file, reading only what was appended since the last update."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.lines = 0
+
+    def update(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return self.lines
+        if size < self.offset:  # truncated or rewritten: start over
+            self.offset = self.lines = 0
+        pos = self.offset
+        with open(self.path, 'rb') as f:
+            f.seek(pos)
+            for block in iter(lambda: f.read(READ_BLOCK), b''):
+                n = block.count(b'\n')
+                if n:
+                    self.lines += n
+                    # A partial last line is read again at the next update
+                    self.offset = pos + block.rfind(b'\n') + 1
+                pos += len(block)
+        return self.lines
+
+
+class Rate:
+    """Events per second over a sliding window of (time, count) samples."""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, t, count):
+        self.samples.append((t, count))
+        while len(self.samples) > 2 and t - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+
+    def rate(self):
+        if len(self.samples) < 2:
+            return None
+        (t0, c0), (t1, c1) = self.samples[0], self.samples[-1]
+        return (c1 - c0) / (t1 - t0) if t1 > t0 else None
+
+
+def session_usage():
+    """{session id: (cpu ticks, rss bytes)} summed over the processes of every session."""
+    usage = {}
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry.name}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after it are fixed
+        fields = stat[stat.rfind(')') + 2:].split()
+        sid = int(fields[3])
+        ticks, rss = usage.get(sid, (0, 0))
+        usage[sid] = (ticks + int(fields[11]) + int(fields[12]),  # utime + stime
+                      rss + int(fields[21]) * PAGE_SIZE)
+    return usage
+
+
+def config_paths(config, cwd):
+    """Traffic and FCT files named in an ns3 config (FLOW_FILE / FCT_OUTPUT_FILE lines)."""
+    paths = {}
+    try:
+        with open(Path(cwd) / config) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] in CONFIG_KEYS:
+                    paths[CONFIG_KEYS[parts[0]]] = str(Path(cwd) / parts[1])
+    except OSError:
+        pass
+    return paths
+
+
+class Run:
+    def __init__(self, name, fct, traffic=None, window=30.0):
+        self.name = name
+        self.fct = FctFollower(fct) if fct else None
+        self.traffic = traffic
+        self.expected = None
+        self.rate = Rate(window)
+        self.state = None
+        self.pid = None
+        self.start = None
+        self.cpu = None
+        self.rss = None
+        self._usage = None
+
+    def update(self, now, usage):
+        if self.expected is None and self.traffic:
+            try:
+                self.expected = read_count(self.traffic)
+            except (OSError, ValueError):
+                pass
+        if self.fct is not None:
+            self.rate.add(now, self.fct.update())
+        self.cpu = self.rss = None
+        if self.pid is not None and self.state in (None, 'running'):
+            if self.pid in usage:
+                ticks, self.rss = usage[self.pid]
+                if self._usage is not None and now > self._usage[0]:
+                    self.cpu = (ticks - self._usage[1]) / CLK_TCK / (now - self._usage[0])
+                self._usage = (now, ticks)
+
+    def row(self, now):
+        done = self.fct.lines if self.fct is not None else None
+        rate = self.rate.rate()
+        pct = eta = ''
+        if done is not None and self.expected:
+            pct = f"{done / self.expected:.1%}"
+            if rate and done < self.expected:
+                eta = fmt_time((self.expected - done) / rate)
+        return [self.name, self.state or '', '' if done is None else str(done),
+                '' if self.expected is None else str(self.expected), pct,
+                '' if rate is None else f"{rate:.1f}", eta,
+                '' if self.cpu is None else f"{self.cpu:.0%}",
+                '' if self.rss is None else f"{self.rss / (1 << 20):.0f}M",
+                fmt_time(now - self.start) if self.start and self.state == 'running' else '']
+
+
+def fmt_time(s):
+    s = int(s)
+    return f"{s // 3600:d}:{s // 60 % 60:02d}:{s % 60:02d}"
+
+
+HEADER = ['run', 'state', 'flows', 'expected', 'done', 'flows/s', 'ETA', 'CPU', 'RSS', 'elapsed']
+
+
+def print_table(runs, now):
+    rows = [HEADER] + [r.row(now) for r in runs]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(HEADER))]
+    for row in rows:
+        print('  '.join(c.ljust(w) if i < 2 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))))
+
+
+def sync_status(runs, path, window):
+    """Add/refresh runs from a run_experiments.py status file; returns False if it cannot be read."""
+    try:
+        with open(path) as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return False
+    cwd = status.get('cwd', '.')
+    for job in status['jobs']:
+        run = runs.get(job['name'])
+        if run is None:
+            paths = config_paths(job['config'], cwd) if job.get('config') else {}
+            # ns3 writes where its config says; the job's own traffic file comes first
+            fct = paths.get('fct') or job.get('fct')
+            traffic = job.get('traffic') or paths.get('traffic')
+            run = runs[job['name']] = Run(job['name'], fct and str(Path(cwd) / fct),
+                                          traffic and str(Path(cwd) / traffic), window)
+        if run.pid != job['pid']:
+            run._usage = None
+        run.state, run.pid, run.start = job['state'], job['pid'], job['start']
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Progress, rate and ETA of running simulations')
+    parser.add_argument('--status', default=None, help='Status file of run_experiments.py')
+    parser.add_argument('--fct', nargs='+', default=[], help='FCT files to follow (without a status file)')
+    parser.add_argument('--traffic', nargs='+', default=[], help='Traffic files of the --fct runs, in the same order')
+    parser.add_argument('-i', '--interval', type=float, default=2.0, help='Seconds between refreshes (default: 2)')
+    parser.add_argument('-w', '--window', type=float, default=30.0, help='Rate window in seconds (default: 30)')
+    parser.add_argument('--once', action='store_true', help='Print one table and exit')
+    args = parser.parse_args()
+
+    if not args.status and not args.fct:
+        print("Error: give --status or --fct")
+        sys.exit(1)
+    if args.traffic and len(args.traffic) != len(args.fct):
+        print("Error: --traffic needs one file per --fct file")
+        sys.exit(1)
+
+    runs = {}
+    for i, fct in enumerate(args.fct):
+        name = Path(fct).name.removesuffix('.txt').removesuffix('_fct')
+        runs[name] = Run(name, fct, args.traffic[i] if args.traffic else None, args.window)
+    if args.status and not sync_status(runs, args.status, args.window):
+        print(f"Error: cannot read status file {args.status}")
+        sys.exit(1)
+
+    try:
+        while True:
+            if args.status:
+                sync_status(runs, args.status, args.window)
+            now = time.time()
+            usage = session_usage()
+            for run in runs.values():
+                run.update(now, usage)
+            if not args.once:
+                print("\033[H\033[J", end='')  # clear the screen, as watch does
+                print(f"{time.strftime('%H:%M:%S')}  every {args.interval:g}s  (Ctrl-C to quit)\n")
+            print_table(list(runs.values()), now)
+            active = any(r.state in ('pending', 'running') for r in runs.values())
+            if args.once or (args.status and not active):
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
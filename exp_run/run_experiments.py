@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Run a batch of ns3 simulations on a bounded pool of worker slots.
+
+Replaces the tmux scripts (run-all-exp.sh starts every job at once): jobs
+come from a TOML file, run as child processes while their cores and
+memory fit in the budget (--cores, --memory), and failed jobs are retried.
+Every job's stdout and stderr go to its log file (optionally compressed
+with gzip or xz), and the state of every job (pid, attempts, exit codes,
+start time, wall time) is kept in a JSON status file, rewritten whenever
+a job changes state.
+
+Job file:
+
+    project_root = "/home/chaoyang"          # working directory of the commands
+    exp_root = "{project_root}/runtime_config"
+    command = "./ns3 run scratch/third -- {config} {exp_root}"
+    cores = 8                                # budget (default: all CPUs)
+    memory = "48G"                           # budget (default: no limit)
+    job_memory = "4G"                        # per job unless it sets memory
+    retries = 1
+
+    [[job]]
+    name = "cc_11"
+    config = "{exp_root}/config_cc_11_100G.txt"
+
+    [[matrix]]                               # one job per combination
+    cc = ["1", "3", "7"]
+    pfc = ["", "_noPFC"]
+    name = "cc_{cc}{pfc}"
+    config = "{exp_root}/config_cc_{cc}_100G{pfc}.txt"
+
+A job has a name and any of config, traffic (the traffic file it runs,
+used by the monitor for the expected flow count), command, log, fct,
+cores and memory. String values are templates over the top-level keys,
+the job's own keys and the matrix values; lists in a [[matrix]] table
+are its axes. Defaults: log "{exp_root}/{name}_output" (plus .log,
+.log.gz or .log.xz), fct "{exp_root}/fct/{name}_fct.txt", cores 1.
+project_root is made absolute (against the current directory) before
+any template is rendered; every other relative path, whether read by the
+commands or written by the runner (logs, status file), is relative to it.
+The command runs in a shell, so a stub script can stand in for ns3
+(--command "python stub_sim.py {config}").
+
+Post-run analysis: every [[analysis]] table is a command run on a
+separate pool of --analysis-jobs threads (default 1), so it overlaps with
+the simulations still running:
+
+    [[analysis]]                             # after each job that exits 0
+    name = "fct"
+    command = "{python} {repo}/log_analysis/fct_analysis.py -d {fct_dir} --cc {fct_name} -o {exp_root}/analysis/{name}_fct.txt"
+
+    [[analysis]]                             # once, after the last job
+    name = "fct_all"
+    when = "all"
+    command = "{python} {repo}/log_analysis/fct_analysis.py -d {exp_root}/fct --cc {fct_names} -o {exp_root}/analysis/fct_all.txt"
+
+Analysis commands see the job's keys plus fct_dir and fct_name (the FCT
+file's directory and name without .txt); "all" commands see the
+top-level keys plus names and fct_names (the jobs that finished, space
+separated). {python} is this interpreter and {repo} this repository.
+Their output goes to analysis_log ("{exp_root}/analysis/{name}_{analysis}.log",
+name "all" for the "all" commands) and their exit codes and wall times
+to the status file; --no-analysis skips them. Every analysis template is
+rendered for every job before the first job starts, so an unknown key is
+reported up front; an analysis that still cannot run is recorded as
+failed without stopping the jobs.
+
+Jobs start in order ([[job]] tables, then the [[matrix]] combinations,
+each in file order); a job that does not fit waits while later
+smaller jobs may start. A job larger than the whole budget runs alone.
+--resume skips the jobs the status file records as done with the same
+command. Ctrl-C terminates the running jobs (their process groups) and
+records them as interrupted; queued analyses are dropped. The exit code
+is 1 if any job or analysis failed.
+
+Usage:
+    uv run exp_run/run_experiments.py exp_run/experiments.toml --project-root /home/chaoyang -j 4 --compress gzip
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import lzma
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_COMMAND = "./ns3 run scratch/third -- {config} {exp_root}"
+DEFAULTS = {
+    'project_root': '.',
+    'exp_root': '{project_root}/runtime_config',
+    'command': DEFAULT_COMMAND,
+    'log': '{exp_root}/{name}_output',
+    'fct': '{exp_root}/fct/{name}_fct.txt',
+    'analysis_log': '{exp_root}/analysis/{name}_{analysis}.log',
+    'python': sys.executable,
+    'repo': str(Path(__file__).resolve().parent.parent),
+}
+ANALYSIS_WHEN = ('each', 'all')
+COMPRESSORS = {'none': (open, '.log'), 'gzip': (gzip.open, '.log.gz'), 'xz': (lzma.open, '.log.xz')}
+STATUS_FILE = 'run_status.json'
+COPY_BLOCK = 1 << 16
+
+
+class JobFileError(Exception):
+    pass
+
+
+def parse_size(s):
+    """Bytes for an int or a string with a K/M/G/T suffix (None stays None)."""
+    if s is None or isinstance(s, int):
+        return s
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+    s = str(s).strip().upper().rstrip('B')
+    try:
+        if s and s[-1] in units:
+            return int(float(s[:-1]) * units[s[-1]])
+        return int(float(s))
+    except ValueError:
+        raise JobFileError(f"bad memory size '{s}' (e.g. 512M, 8G)")
+
+
+def fmt_size(n):
+    for unit, shift in (('T', 40), ('G', 30), ('M', 20), ('K', 10)):
+        if n >= 1 << shift:
+            return f"{n / (1 << shift):.1f}{unit}"
+    return str(n)
+
+
+def render(value, context):
+    """Fill a template from the context, resolving keys that are templates themselves."""
+    if not isinstance(value, str):
+        return value
+    for _ in range(8):  # templates may refer to each other (exp_root -> project_root)
+        try:
+            new = value.format(**context)
+        except KeyError as e:
+            raise JobFileError(f"unknown key {e} in '{value}'")
+        if new == value:
+            return new
+        value = new
+    return value
+
+
+def expand_jobs(spec):
+    """Job entries (dicts of raw values) of the [[job]] tables, then of the [[matrix]] tables."""
+    entries = list(spec.get('job', []))
+    for table in spec.get('matrix', []):
+        axes = {k: v for k, v in table.items() if isinstance(v, list)}
+        fixed = {k: v for k, v in table.items() if not isinstance(v, list)}
+        if 'name' not in fixed:
+            raise JobFileError("a [[matrix]] table needs a name template")
+        for values in itertools.product(*axes.values()):
+            entries.append({**dict(zip(axes, values)), **fixed})
+    return entries
+
+
+class Job:
+    def __init__(self, name, command, log, fct=None, config=None, traffic=None, cores=1, memory=0, context=None):
+        self.name = name
+        self.command = command
+        self.log = log
+        self.fct = fct
+        self.config = config
+        self.traffic = traffic
+        self.cores = cores
+        self.memory = memory
+        self.context = context or {}  # template keys, for the analysis commands
+        self.analysis = {}
+        self.state = 'pending'
+        self.attempts = 0
+        self.exit_codes = []
+        self.pid = None
+        self.start = None
+        self.end = None
+        self.wall_time = None
+        self.proc = None
+        self.copier = None
+        self._t0 = None
+
+    def to_dict(self):
+        return {'name': self.name, 'state': self.state, 'command': self.command, 'config': self.config,
+                'traffic': self.traffic, 'log': self.log, 'fct': self.fct, 'cores': self.cores,
+                'memory': self.memory, 'attempts': self.attempts, 'exit_codes': self.exit_codes, 'pid': self.pid,
+                'start': self.start, 'end': self.end, 'wall_time': self.wall_time, 'analysis': self.analysis}
+
+
+class Analysis:
+    """A command of an [[analysis]] table, run after each job that succeeds or once after all jobs."""
+
+    def __init__(self, name, command, when='each'):
+        self.name = name
+        self.command = command
+        self.when = when
+
+
+def load_analyses(spec):
+    analyses = []
+    for table in spec.get('analysis', []):
+        name, command, when = table.get('name'), table.get('command'), table.get('when', 'each')
+        if not name or not command:
+            raise JobFileError("an [[analysis]] table needs a name and a command")
+        if when not in ANALYSIS_WHEN:
+            raise JobFileError(f"bad when '{when}' in analysis '{name}' ({', '.join(ANALYSIS_WHEN)})")
+        if name in (a.name for a in analyses):
+            raise JobFileError(f"duplicate analysis name '{name}'")
+        analyses.append(Analysis(name, command, when))
+    return analyses
+
+
+def fct_keys(fct):
+    path = Path(fct or '')
+    return {'fct_dir': str(path.parent), 'fct_name': path.name.removesuffix('.txt')}
+
+
+def each_context(job):
+    """Template keys of the "each" analyses of a job."""
+    return {**job.context, **fct_keys(job.fct)}
+
+
+def all_context(top, jobs):
+    """Template keys of the "all" analyses, over the jobs that finished."""
+    return {**top, 'names': ' '.join(j.name for j in jobs),
+            'fct_names': ' '.join(fct_keys(j.fct)['fct_name'] for j in jobs)}
+
+
+def render_analysis(analysis, context, name):
+    """Command and log file of an analysis for one job (or name "all")."""
+    context = {**context, 'name': name, 'analysis': analysis.name}
+    return (render(analysis.command, context),
+            render(context.get('analysis_log', DEFAULTS['analysis_log']), context))
+
+
+def check_analyses(analyses, jobs, top):
+    """Render every analysis for every job up front, so a bad template fails before any job starts."""
+    for analysis in analyses:
+        if analysis.when == 'each':
+            for job in jobs:
+                render_analysis(analysis, each_context(job), job.name)
+        else:
+            render_analysis(analysis, all_context(top, jobs), 'all')
+
+
+def run_analysis(command, log, cwd):
+    """Run one analysis command (in a thread of the analysis pool); returns (exit code, wall time)."""
+    log = Path(cwd) / log
+    log.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.monotonic()
+    with open(log, 'wb') as f:
+        code = subprocess.run(command, shell=True, cwd=cwd, stdout=f, stderr=subprocess.STDOUT,
+                              stdin=subprocess.DEVNULL).returncode
+    return code, time.monotonic() - t0
+
+
+def load_jobs(spec, overrides, compress):
+    """
+    Jobs of a parsed job file, with top-level keys replaced by the non-None
+    overrides; returns (jobs, top-level keys).
+    """
+    top = {**DEFAULTS, **{k: v for k, v in spec.items() if not isinstance(v, (list, dict))}}
+    top.update({k: v for k, v in overrides.items() if v is not None})
+    # The commands run in project_root: make it absolute once so that every path has that base
+    top['project_root'] = str(Path(render(top['project_root'], top)).resolve())
+    suffix = COMPRESSORS[compress][1]
+    jobs, names = [], set()
+    for entry in expand_jobs(spec):
+        context = {**top, **entry}
+        context['name'] = render(context.get('name'), context)
+        if not context['name']:
+            raise JobFileError("every job needs a name")
+        if context['name'] in names:
+            raise JobFileError(f"duplicate job name '{context['name']}'")
+        names.add(context['name'])
+        values = {k: render(context.get(k), context) for k in ('command', 'log', 'fct', 'config', 'traffic')}
+        memory = parse_size(entry.get('memory', top.get('job_memory', 0)))
+        values['log'] += suffix
+        jobs.append(Job(context['name'], values['command'], values['log'], values['fct'],
+                        values['config'], values['traffic'], int(entry.get('cores', top.get('job_cores', 1))),
+                        memory or 0, {**context, **values}))
+    return jobs, top
+
+
+def copy_output(stream, path, opener):
+    """Copy a child's output to its log file (runs in a thread per job)."""
+    with opener(path, 'wb') as f:
+        for block in iter(lambda: stream.read1(COPY_BLOCK), b''):
+            f.write(block)
+
+
+class Runner:
+    def __init__(self, jobs, cwd, cores, memory=None, retries=0, compress='none', status_path=None, poll=0.5,
+                 analyses=(), analysis_workers=1, top=None):
+        self.jobs = jobs
+        self.cwd = cwd
+        self.cores = cores
+        self.memory = memory
+        self.retries = retries
+        self.opener = COMPRESSORS[compress][0]
+        self.status_path = status_path
+        self.poll = poll
+        self.running = []
+        self.t0 = time.time()
+        self.each = [a for a in analyses if a.when == 'each']
+        self.final = [a for a in analyses if a.when == 'all']
+        self.top = top or DEFAULTS
+        self.pool = ThreadPoolExecutor(analysis_workers) if analyses else None
+        self.futures = {}  # future -> its analysis record (a dict in the status file)
+        self.final_records = {}
+        self.final_queued = False
+
+    def fits(self, job):
+        if not self.running:
+            return True  # an oversized job runs alone
+        cores = sum(j.cores for j in self.running) + job.cores
+        memory = sum(j.memory for j in self.running) + job.memory
+        return cores <= self.cores and (self.memory is None or memory <= self.memory)
+
+    def start(self, job):
+        log = Path(self.cwd) / job.log
+        log.parent.mkdir(parents=True, exist_ok=True)
+        job.attempts += 1
+        job.proc = subprocess.Popen(job.command, shell=True, cwd=self.cwd, stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True)
+        job.copier = threading.Thread(target=copy_output, args=(job.proc.stdout, log, self.opener), daemon=True)
+        job.copier.start()
+        job.pid = job.proc.pid
+        job.state = 'running'
+        job.start = time.time()
+        job._t0 = time.monotonic()
+        job.end = job.wall_time = None
+        self.running.append(job)
+        print(f"[{self.elapsed()}] start  {job.name} (attempt {job.attempts}, pid {job.pid})")
+
+    def finish(self, job, code, state=None):
+        job.copier.join()
+        job.proc.stdout.close()
+        job.proc = None
+        job.exit_codes.append(code)
+        job.end = time.time()
+        job.wall_time = time.monotonic() - job._t0
+        self.running.remove(job)
+        if state is not None:
+            job.state = state
+        elif code == 0:
+            job.state = 'done'
+        elif job.attempts <= self.retries:
+            job.state = 'pending'
+        else:
+            job.state = 'failed'
+        print(f"[{self.elapsed()}] {job.state:<6} {job.name} (exit {code}, {job.wall_time:.1f}s)"
+              + (", retrying" if job.state == 'pending' else ""))
+        if job.state == 'done':
+            for analysis in self.each:
+                job.analysis[analysis.name] = self.submit(analysis, each_context(job), job.name)
+        return job
+
+    def submit(self, analysis, context, name):
+        """Queue an analysis command on the analysis pool; returns its record (failed if it cannot be queued)."""
+        record = {'state': 'queued', 'command': analysis.command, 'log': None, 'exit_code': None, 'wall_time': None}
+        try:
+            record['command'], record['log'] = render_analysis(analysis, context, name)
+            self.futures[self.pool.submit(run_analysis, record['command'], record['log'], self.cwd)] = record
+        except (JobFileError, RuntimeError) as e:
+            record['state'], record['error'] = 'failed', str(e)
+            print(f"[{self.elapsed()}] analysis failed: {name}_{analysis.name} ({e})")
+        return record
+
+    def queue_final(self):
+        done = [j for j in self.jobs if j.state == 'done']
+        self.final_queued = True
+        if not done:
+            return
+        for analysis in self.final:
+            self.final_records[analysis.name] = self.submit(analysis, all_context(self.top, done), 'all')
+
+    def reap_analyses(self):
+        """Record finished analyses; returns True if any finished."""
+        finished = [f for f in self.futures if f.done()]
+        for future in finished:
+            record = self.futures.pop(future)
+            try:
+                record['exit_code'], record['wall_time'] = future.result()
+            except Exception as e:  # e.g. the log directory cannot be created
+                record['state'], record['error'] = 'failed', str(e)
+                print(f"[{self.elapsed()}] analysis failed: {Path(record['log']).stem} ({e})")
+                continue
+            record['state'] = 'done' if record['exit_code'] == 0 else 'failed'
+            print(f"[{self.elapsed()}] analysis {record['state']}: {Path(record['log']).stem} "
+                  f"(exit {record['exit_code']}, {record['wall_time']:.1f}s)")
+        for future, record in self.futures.items():
+            if record['state'] == 'queued' and future.running():
+                record['state'] = 'running'
+        return bool(finished)
+
+    def elapsed(self):
+        s = int(time.time() - self.t0)
+        return f"{s // 3600:d}:{s // 60 % 60:02d}:{s % 60:02d}"
+
+    def write_status(self):
+        if self.status_path is None:
+            return
+        tmp = str(self.status_path) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'cwd': str(Path(self.cwd).resolve()), 'started': self.t0, 'updated': time.time(),
+                       'jobs': [j.to_dict() for j in self.jobs], 'analysis': self.final_records}, f, indent=2)
+        os.replace(tmp, self.status_path)
+
+    def step(self):
+        """Start what fits, reap finished jobs; returns the jobs that finished."""
+        for job in self.jobs:
+            if job.state == 'pending' and self.fits(job):
+                self.start(job)
+        finished = []
+        for job in list(self.running):
+            code = job.proc.poll()
+            if code is not None:
+                finished.append(self.finish(job, code))
+        return finished
+
+    def active(self):
+        jobs = any(j.state in ('pending', 'running') for j in self.jobs)
+        return jobs or bool(self.futures) or (bool(self.final) and not self.final_queued)
+
+    def run(self):
+        self.write_status()
+        while self.active():
+            n_running = len(self.running)
+            changed = bool(self.step()) or len(self.running) != n_running
+            if self.final and not self.final_queued and not any(j.state in ('pending', 'running') for j in self.jobs):
+                self.queue_final()
+                changed = True
+            if self.pool is not None:
+                changed = self.reap_analyses() or changed
+            if changed:
+                self.write_status()
+            time.sleep(self.poll)
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.write_status()
+
+    def failed_analyses(self):
+        records = [r for j in self.jobs for r in j.analysis.values()] + list(self.final_records.values())
+        return [r for r in records if r['state'] != 'done']
+
+    def terminate(self):
+        for job in self.running:
+            try:
+                os.killpg(job.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for job in list(self.running):
+            try:
+                code = job.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(job.pid, signal.SIGKILL)
+                code = job.proc.wait()
+            self.finish(job, code, 'interrupted')
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            for future, record in self.futures.items():
+                if future.cancelled():
+                    record['state'] = 'cancelled'
+        self.write_status()
+
+
+def load_status(path):
+    try:
+        with open(path) as f:
+            return {j['name']: j for j in json.load(f)['jobs']}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run ns3 simulation jobs with bounded concurrency, logs and retries')
+    parser.add_argument('jobfile', help='Job file (.toml)')
+    parser.add_argument('--project-root', default=None, help='Working directory of the commands (overrides the file)')
+    parser.add_argument('--exp-root', default=None, help='Experiment directory (overrides the file)')
+    parser.add_argument('--command', default=None, help=f'Command template (default: "{DEFAULT_COMMAND}")')
+    parser.add_argument('-j', '--cores', type=int, default=None, help='Cores to fill (default: all CPUs)')
+    parser.add_argument('--memory', default=None, help='Memory budget, e.g. 48G (default: no limit)')
+    parser.add_argument('--retries', type=int, default=None, help='Retries of a failed job (default: 0)')
+    parser.add_argument('--compress', choices=sorted(COMPRESSORS), default=None, help='Log compression')
+    parser.add_argument('--status', default=None, help=f'Status file (default: {{exp_root}}/{STATUS_FILE})')
+    parser.add_argument('--only', nargs='+', default=None, help='Run only these jobs')
+    parser.add_argument('--resume', action='store_true', help='Skip jobs that the status file records as done')
+    parser.add_argument('--dry-run', action='store_true', help='Print the jobs and exit')
+    parser.add_argument('--analysis-jobs', type=int, default=None,
+                        help='Worker threads for the [[analysis]] commands (default: 1)')
+    parser.add_argument('--no-analysis', action='store_true', help='Do not run the [[analysis]] commands')
+    parser.add_argument('--poll', type=float, default=0.5, help='Seconds between checks (default: 0.5)')
+    args = parser.parse_args()
+
+    try:
+        with open(args.jobfile, 'rb') as f:
+            spec = tomllib.load(f)
+        compress = args.compress or spec.get('compress', 'none')
+        if compress not in COMPRESSORS:
+            raise JobFileError(f"bad compress '{compress}' ({', '.join(sorted(COMPRESSORS))})")
+        overrides = {'project_root': args.project_root, 'exp_root': args.exp_root, 'command': args.command}
+        jobs, top = load_jobs(spec, overrides, compress)
+        analyses = [] if args.no_analysis else load_analyses(spec)
+        check_analyses(analyses, jobs, top)
+        cwd, exp_root = top['project_root'], render(top['exp_root'], top)
+        memory = parse_size(args.memory or top.get('memory'))
+    except (OSError, tomllib.TOMLDecodeError, JobFileError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    cores = args.cores or top.get('cores') or os.cpu_count()
+    retries = args.retries if args.retries is not None else int(top.get('retries', 0))
+    status_path = Path(args.status or Path(cwd) / exp_root / STATUS_FILE)
+
+    if args.only:
+        unknown = set(args.only) - {j.name for j in jobs}
+        if unknown:
+            print(f"Error: unknown jobs: {', '.join(sorted(unknown))}")
+            sys.exit(1)
+        jobs = [j for j in jobs if j.name in args.only]
+    if args.resume:
+        previous = load_status(status_path)
+        for job in jobs:
+            prev = previous.get(job.name)
+            if prev is not None and prev['state'] == 'done' and prev['command'] == job.command:
+                job.state = 'done'
+                job.attempts, job.exit_codes = prev['attempts'], prev['exit_codes']
+                job.start, job.end, job.wall_time = prev['start'], prev['end'], prev['wall_time']
+                job.analysis = prev.get('analysis', {})
+
+    todo = [j for j in jobs if j.state == 'pending']
+    print(f"Jobs: {len(jobs)} ({len(jobs) - len(todo)} done, {len(todo)} to run), "
+          f"budget {cores} cores" + (f", {fmt_size(memory)} memory" if memory else ""))
+    for job in todo:
+        if job.cores > cores or (memory and job.memory > memory):
+            print(f"  Warning: {job.name} needs more than the budget and will run alone")
+    if args.dry_run:
+        for job in todo:
+            print(f"  {job.name}: {job.command}")
+            print(f"    log {job.log}, {job.cores} cores" + (f", {fmt_size(job.memory)}" if job.memory else ""))
+        for analysis in analyses:
+            print(f"  analysis {analysis.name} ({analysis.when}): {analysis.command}")
+        return
+
+    status_path.parent.mkdir(parents=True, exist_ok=True)
+    analysis_workers = args.analysis_jobs or int(top.get('analysis_workers', 1))
+    runner = Runner(jobs, cwd, cores, memory, retries, compress, status_path, args.poll, analyses, analysis_workers,
+                    top)
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        print("Interrupted, stopping the running jobs")
+        runner.terminate()
+    except Exception:
+        print("Runner failed, stopping the running jobs")
+        runner.terminate()
+        raise
+
+    print(f"\n{'job':<24} {'state':<12} {'attempts':>8} {'exit':>6} {'wall time':>10}")
+    for job in jobs:
+        code = job.exit_codes[-1] if job.exit_codes else ''
+        wall = f"{job.wall_time:.1f}s" if job.wall_time is not None else ''
+        print(f"{job.name:<24} {job.state:<12} {job.attempts:>8} {code!s:>6} {wall:>10}")
+    failed = runner.failed_analyses()
+    if analyses:
+        print(f"Analyses: {len(failed)} failed" + "".join(
+            f"\n  {r['state']}: {r['command']} " + (f"({r['error']})" if 'error' in r else f"(log {r['log']})")
+            for r in failed))
+    print(f"Status written to: {status_path}")
+    if any(j.state != 'done' for j in jobs) or failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
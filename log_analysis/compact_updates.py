@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Compact [CNCP Update] log lines into per-flow step functions.
+
+Most CNCP updates either repeat the flow's previous rate or are skipped
+updates (old_rate == -1 and new_rate == 0, see plot_rates). This tool
+streams the log in chunks and keeps, per flow (node_id, ip, sport, dport),
+only the change points of the valid rate:
+
+    cp_ts       timestamp (ns) at which the rate changed
+    cp_rate     the new rate
+    cp_last_ts  last valid update inside the interval [cp_ts, next cp_ts)
+    cp_repeats  valid updates in that interval that repeated the rate
+    cp_skipped  skipped updates in that interval
+
+plus per-flow totals. Skipped updates seen before a flow's first valid
+update are counted in flow_pre_skipped, and every skipped update is also
+kept as (skip_flow, skip_ts) for the skipped-update markers of the plot.
+The result is written as a compressed .npz; the step function of every
+flow can be rebuilt exactly with step_function(), and to_update_frame()
+gives the rate_allocation.py DataFrame layout, so
+``rate_allocation.py -i updates.npz`` plots the same lines, skipped-update
+markers and counts as the raw log.
+
+Usage:
+    uv run log_analysis/compact_updates.py -i log.txt -o updates.npz
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from log_reader import (CNCP_FLOW_KEY, CNCP_UPDATE, CNCP_UPDATE_COLUMNS, FlowIndex, grow,
+                        is_skipped_update, iter_log_records)
+
+
+class UpdateCompactor:
+    """Streaming change-point compactor; feed chunks of CNCP updates in log order."""
+
+    def __init__(self):
+        self.flows = FlowIndex(CNCP_FLOW_KEY)
+        # per-flow running state
+        self.last_rate = np.zeros(0, dtype=np.float64)
+        self.cur_cp = np.zeros(0, dtype=np.int64)
+        self.first_ts = np.zeros(0, dtype=np.int64)
+        self.last_ts = np.zeros(0, dtype=np.int64)
+        self.pre_skipped = np.zeros(0, dtype=np.int64)
+        self.updates = np.zeros(0, dtype=np.int64)
+        # change points, indexed in creation order
+        self.n_cp = 0
+        self.cp_flow = np.zeros(0, dtype=np.int64)
+        self.cp_ts = np.zeros(0, dtype=np.int64)
+        self.cp_rate = np.zeros(0, dtype=np.float64)
+        self.cp_last_ts = np.zeros(0, dtype=np.int64)
+        self.cp_repeats = np.zeros(0, dtype=np.int64)
+        self.cp_skipped = np.zeros(0, dtype=np.int64)
+        # skipped updates, one array per chunk
+        self.skip_flow = []
+        self.skip_ts = []
+
+    def _flow_ids(self, df):
+        fid = self.flows.ids(df)
+        n = len(self.flows)
+        self.last_rate = grow(self.last_rate, n, np.nan)
+        self.cur_cp = grow(self.cur_cp, n, -1)
+        self.first_ts = grow(self.first_ts, n, -1)
+        self.last_ts = grow(self.last_ts, n, -1)
+        self.pre_skipped = grow(self.pre_skipped, n, 0)
+        self.updates = grow(self.updates, n, 0)
+        return fid
+
+    def feed(self, df):
+        if df.empty:
+            return
+        fid = self._flow_ids(df)
+        # Stable sort by flow keeps each flow's updates in log order
+        order = np.argsort(fid, kind='stable')
+        g = fid[order]
+        ts = df['timestamp'].to_numpy(np.int64)[order]
+        rate = df['new_rate'].to_numpy(np.float64)[order]
+        skipped = is_skipped_update(df).to_numpy()[order]
+        valid = ~skipped
+        group_start = np.r_[True, g[1:] != g[:-1]]
+
+        # Previous valid rate of the same flow, carried across chunks (a
+        # chunk may hold no valid update at all, e.g. only skipped ones)
+        vg, vrate = g[valid], rate[valid]
+        v_start = np.diff(vg, prepend=-1) != 0
+        v_end = np.diff(vg, append=-1) != 0
+        prev = np.empty(len(vrate))
+        prev[1:] = vrate[:-1]
+        prev[v_start] = self.last_rate[vg[v_start]]
+        v_change = vrate != prev  # NaN prev (first valid update ever) counts as a change
+
+        change = np.zeros(len(g), dtype=bool)
+        change[valid] = v_change
+        n_new = int(change.sum())
+        new_idx = self.n_cp + np.cumsum(change) - 1
+
+        # Interval (change point) each row falls into: latest change at or
+        # before it within the flow, else the one carried from earlier chunks
+        cp_of_row = pd.Series(np.where(change, new_idx, np.nan)).groupby(g).ffill().to_numpy()
+        carried = self.cur_cp[g]
+        cp_of_row = np.where(np.isnan(cp_of_row), carried, cp_of_row).astype(np.int64)
+
+        total = self.n_cp + n_new
+        self.cp_flow = grow(self.cp_flow, total, -1)
+        self.cp_ts = grow(self.cp_ts, total, -1)
+        self.cp_rate = grow(self.cp_rate, total, np.nan)
+        self.cp_last_ts = grow(self.cp_last_ts, total, -1)
+        self.cp_repeats = grow(self.cp_repeats, total, 0)
+        self.cp_skipped = grow(self.cp_skipped, total, 0)
+        sel = new_idx[change]
+        self.cp_flow[sel] = g[change]
+        self.cp_ts[sel] = ts[change]
+        self.cp_rate[sel] = rate[change]
+        self.n_cp = total
+
+        in_cp = cp_of_row >= 0
+        repeat_rows = valid & ~change
+        self.cp_repeats[:total] += np.bincount(cp_of_row[repeat_rows], minlength=total)
+        self.cp_skipped[:total] += np.bincount(cp_of_row[skipped & in_cp], minlength=total)
+        np.maximum.at(self.cp_last_ts, cp_of_row[valid], ts[valid])
+        n_flows = len(self.flows)
+        self.pre_skipped[:n_flows] += np.bincount(g[skipped & ~in_cp], minlength=n_flows)
+        self.updates[:n_flows] += np.bincount(g, minlength=n_flows)
+        self.skip_flow.append(g[skipped])
+        self.skip_ts.append(ts[skipped])
+
+        # Carry per-flow state into the next chunk
+        group_end = np.r_[group_start[1:], True]
+        ends = g[group_end]
+        self.cur_cp[ends] = cp_of_row[group_end]
+        self.last_rate[vg[v_end]] = vrate[v_end]
+        starts = g[group_start]
+        unseen = self.first_ts[starts] < 0
+        self.first_ts[starts[unseen]] = ts[group_start][unseen]
+        np.maximum.at(self.last_ts, g, ts)
+
+    def save(self, path):
+        n_flows = len(self.flows)
+        keys = pd.DataFrame(self.flows.keys, columns=CNCP_FLOW_KEY)
+        order = np.argsort(self.cp_flow[:self.n_cp], kind='stable')
+        skip_flow = np.concatenate([np.zeros(0, dtype=np.int64)] + self.skip_flow)
+        skip_ts = np.concatenate([np.zeros(0, dtype=np.int64)] + self.skip_ts)
+        skip_order = np.lexsort((skip_ts, skip_flow))
+        np.savez_compressed(
+            path,
+            flow_node=keys['node_id'].to_numpy(np.int64),
+            flow_ip=keys['ip'].astype(str).to_numpy(dtype='U'),
+            flow_sport=keys['sport'].to_numpy(np.int64),
+            flow_dport=keys['dport'].to_numpy(np.int64),
+            flow_first_ts=self.first_ts[:n_flows],
+            flow_last_ts=self.last_ts[:n_flows],
+            flow_pre_skipped=self.pre_skipped[:n_flows],
+            flow_updates=self.updates[:n_flows],
+            cp_flow=self.cp_flow[:self.n_cp][order],
+            cp_ts=self.cp_ts[:self.n_cp][order],
+            cp_rate=self.cp_rate[:self.n_cp][order],
+            cp_last_ts=self.cp_last_ts[:self.n_cp][order],
+            cp_repeats=self.cp_repeats[:self.n_cp][order],
+            cp_skipped=self.cp_skipped[:self.n_cp][order],
+            skip_flow=skip_flow[skip_order],
+            skip_ts=skip_ts[skip_order],
+        )
+
+
+def compact_log(file_path, output_path, chunksize=1_000_000):
+    """Compact a raw log into output_path; returns the compactor for reporting."""
+    compactor = UpdateCompactor()
+    for chunk in iter_log_records(file_path, {CNCP_UPDATE: CNCP_UPDATE_COLUMNS}, chunksize):
+        compactor.feed(chunk[CNCP_UPDATE])
+    compactor.save(output_path)
+    return compactor
+
+
+def load_compacted(path):
+    """Load a compacted store as a dict of arrays (change points grouped by flow)."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def step_function(store, flow):
+    """
+    Exact step function of one flow's valid rate.
+
+    Returns (t_ns, rate): the rate is rate[i] from t_ns[i] until t_ns[i+1]
+    ('post' steps); the last value holds until the flow's last update,
+    store['flow_last_ts'][flow].
+    """
+    sel = store['cp_flow'] == flow
+    return store['cp_ts'][sel], store['cp_rate'][sel]
+
+
+def to_update_frame(store):
+    """
+    Rebuild a DataFrame in the rate_allocation.read_log_file layout
+    (timestamp in seconds) from a compacted store.
+
+    Every change point is emitted together with the last valid update of
+    its interval, so a line plot through these points matches the plot of
+    the raw updates. old_rate is the previous step value (the first step of
+    a flow repeats its own rate). Skipped updates come back as the raw log
+    has them (old_rate -1, new_rate 0).
+    """
+    flow = store['cp_flow']
+    rate = store['cp_rate']
+    first = np.r_[True, flow[1:] != flow[:-1]]
+    old = np.r_[np.nan, rate[:-1]]
+    old[first] = rate[first]
+
+    hold = store['cp_last_ts'] > store['cp_ts']
+    idx = np.r_[np.arange(len(flow)), np.flatnonzero(hold)]
+    ts = np.r_[store['cp_ts'], store['cp_last_ts'][hold]]
+    old_rate = np.where(ts == store['cp_ts'][idx], old[idx], rate[idx])
+    new_rate = rate[idx]
+
+    # stores written before the skipped updates were kept lack skip_*
+    skip_flow = store.get('skip_flow', np.zeros(0, dtype=np.int64))
+    skip_ts = store.get('skip_ts', np.zeros(0, dtype=np.int64))
+    f = np.r_[flow[idx], skip_flow]
+    ts = np.r_[ts, skip_ts]
+    frame = pd.DataFrame({
+        'node_id': store['flow_node'][f],
+        'ip': store['flow_ip'][f],
+        'sport': store['flow_sport'][f],
+        'dport': store['flow_dport'][f],
+        'old_rate': np.r_[old_rate, np.full(len(skip_ts), -1.0)],
+        'new_rate': np.r_[new_rate, np.zeros(len(skip_ts))],
+        'timestamp': ts / 1e9,
+    })
+    order = np.lexsort((ts, f))
+    return frame.iloc[order].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact [CNCP Update] log lines into per-flow change points')
+    parser.add_argument('-i', '--file', required=True, help='Path to the log file')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output .npz (default: cncp_updates.npz next to the log file)')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Log lines parsed per chunk')
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = os.path.join(os.path.dirname(args.file), 'cncp_updates.npz')
+
+    compactor = compact_log(args.file, output, args.chunksize)
+    n_updates = int(compactor.updates.sum())
+    n_skipped = int(compactor.cp_skipped[:compactor.n_cp].sum() + compactor.pre_skipped.sum())
+    n_repeats = int(compactor.cp_repeats[:compactor.n_cp].sum())
+    print(f"Flows: {len(compactor.flows)}")
+    print(f"Updates: {n_updates} (skipped {n_skipped}, repeated rate {n_repeats})")
+    print(f"Change points: {compactor.n_cp}")
+    if compactor.n_cp > 0:
+        print(f"Reduction: {n_updates / compactor.n_cp:.1f}x")
+    print(f"Input size: {os.path.getsize(args.file)} bytes, output size: {os.path.getsize(output)} bytes")
+    print(f"Compacted store written to {output}")
+
+
+if __name__ == "__main__":
+    main()
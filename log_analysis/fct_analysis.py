@@ -17,6 +17,8 @@ if __name__=="__main__":
 	parser.add_argument('-d', dest='directory', action='store', default='.', help="Directory containing the FCT files")
 	parser.add_argument('-m', dest='max_size', action='store', type=int, default=None, help="only consider flows with size <= max_size (bytes)")
 	parser.add_argument('--priority', dest='priority', action='store', type=int, default=None, help="only consider flows with this priority (pg) value")
+	parser.add_argument('--cc', dest='ccs', nargs='+', default=None, help="FCT file names (without .txt) to analyze instead of the CCs list below")
+	parser.add_argument('-o', dest='output', action='store', default=None, help="Output file (default: a timestamped file in the directory)")
 	args = parser.parse_args()
 
 	type = args.type
@@ -46,6 +48,8 @@ if __name__=="__main__":
 		# 'cc_11_80loss_fct',
 		'cc_11_noOQ_fct',
 	]
+	if args.ccs:
+		CCs = args.ccs
 
 	step = int(args.step)
 	res = [[i/100.] for i in range(0, 100, step)]
@@ -104,7 +108,7 @@ if __name__=="__main__":
 
 	timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 	# 把输出文件也写到指定的目录下
-	output_file = os.path.join(directory, f"fct_analysis_result_{timestamp}.txt")
+	output_file = args.output or os.path.join(directory, f"fct_analysis_result_{timestamp}.txt")
 
 	with open(output_file, "w") as fout:
 		for item in res:
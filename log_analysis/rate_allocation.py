@@ -3,6 +3,7 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # 设置全局字体样式
 plt.rcParams.update({
@@ -173,10 +174,26 @@ def plot_rates(df, node_id=4, ip=None, sport=None, dport=None, timestamp_start=N
     print(f"Valid updates: {len(valid_data)}")
     print(f"Skipped updates: {len(skipped_data)}")
 
+def _plot_node_job(job):
+    node_df, kwargs = job
+    plot_rates(node_df, **kwargs)
+    return kwargs['node_id']
+
+def plot_all_nodes(df, workers=None, **kwargs):
+    # 按 node_id 切分一次解析得到的数据，每个节点的图在进程池中并行绘制
+    jobs = [(node_df, dict(kwargs, node_id=int(node_id)))
+            for node_id, node_df in df.groupby('node_id', sort=True)]
+    print(f"Rendering {len(jobs)} nodes with {workers or 'default'} workers")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for node_id in pool.map(_plot_node_job, jobs):
+            print(f"Node {node_id} done")
+
 def main():
     parser = argparse.ArgumentParser(description='Plot bandwidth allocation for a node from log file.')
     parser.add_argument('-i', '--file', type=str, required=True, help='Path to the log file')
     parser.add_argument('-n', '--node', type=int, default=4, help='Node ID to plot (default: 4)')
+    parser.add_argument('--all-nodes', action='store_true', help='Plot every node from a single parse of the log (ignores -n)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes for --all-nodes (default: CPU count)')
     parser.add_argument('--ip', type=str, help='Filter by IP address')
     parser.add_argument('--sport', type=int, help='Filter by source port')
     parser.add_argument('--dport', type=int, help='Filter by destination port')
@@ -185,8 +202,18 @@ def main():
     parser.add_argument('--timestamp-end', type=float, default=None, help='Only include records with timestamp <= this value (seconds, float)')
     args = parser.parse_args()
 
-    # 读取日志文件
-    df = read_log_file(args.file)
+    # 读取日志文件（.npz 为 compact_updates.py 生成的压缩存储）
+    if args.file.endswith('.npz'):
+        from compact_updates import load_compacted, to_update_frame
+        df = to_update_frame(load_compacted(args.file))
+    else:
+        df = read_log_file(args.file)
+
+    if args.all_nodes:
+        plot_all_nodes(df, workers=args.workers, ip=args.ip, sport=args.sport, dport=args.dport,
+                       timestamp_start=args.timestamp_start, timestamp_end=args.timestamp_end,
+                       log_file_path=args.file)
+        return
 
     # 绘制图表，传入日志文件路径以便确定输出目录
     plot_rates(df, node_id=args.node, ip=args.ip, sport=args.sport, dport=args.dport,
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Compare the rate CNCP allocates to each flow with the rate it actually receives.
+
+Allocations come from ``[CNCP Update]`` lines (see rate_allocation.py) and the
+achieved rate from ``[RdmaHw Receiving]`` lines (see plot_receiving_rate.py).
+Both streams are parsed in one chunked pass and aligned per flow
+(node, sport, dport) with a sorted as-of merge: every receiving sample is
+paired with the latest valid allocation at or before its timestamp.
+
+``[CNCP Update]`` lines are logged by the node that allocates the rate and
+``[RdmaHw Receiving]`` lines by the receiver, so the two never share a
+node_id. A flow is the (sport, dport) pair seen at one receiving node:
+samples are grouped by (node, sport, dport) with the receiving node_id,
+and each is joined with the allocations of its (sport, dport), whichever
+node logged them. --node keeps only the updates of one allocating node and
+--recv-node only the samples of one receiving node, which separates flows
+whose ports repeat across node pairs.
+
+For each flow the script reports:
+  - tracking error: (achieved - allocated) / allocated per receiving sample
+  - lag: time from an allocation change until the achieved rate first comes
+    within --tolerance of it (changes that are never reached are counted
+    as unconverged)
+  - a flag for flows whose achieved rate stays outside the tolerance for at
+    least --persist-frac of their samples
+
+All steps are vectorized pandas operations, so logs with tens of millions
+of lines are handled without per-row Python.
+
+Usage:
+    uv run log_analysis/rate_tracking.py -i log.txt
+    uv run log_analysis/rate_tracking.py -i log.txt --node 4 --recv-node 3 -w 50 --tolerance 0.1
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from log_reader import (CNCP_UPDATE, CNCP_UPDATE_COLUMNS, RDMA_RECEIVING, RDMA_RECEIVING_COLUMNS,
+                        is_skipped_update, read_log_records)
+
+FLOW_KEY = ['node', 'sport', 'dport']  # node: the receiving node
+ALLOC_KEY = ['sport', 'dport']
+
+
+def allocations_from_updates(updates, node_id=None):
+    """Valid CNCP updates as (alloc_node, sport, dport, alloc_ts, allocated) rows."""
+    if node_id is not None:
+        updates = updates[updates['node_id'] == node_id]
+    valid = updates[~is_skipped_update(updates)]
+    alloc = valid[['node_id'] + ALLOC_KEY + ['timestamp', 'new_rate']].rename(
+        columns={'node_id': 'alloc_node', 'timestamp': 'alloc_ts', 'new_rate': 'allocated'})
+    return alloc.astype({'alloc_node': 'int64', 'sport': 'int64', 'dport': 'int64', 'allocated': 'float64'})
+
+
+def achieved_rates(receiving, node_id=None, window=1):
+    """
+    Achieved rate (bits/s) per receiving sample, averaged over the last
+    window samples of the same flow.
+
+    With window=1 this is data_size * 8 / (t - t_prev), the same formula
+    plot_receiving_rate.py uses.
+    """
+    if node_id is not None:
+        receiving = receiving[receiving['node_id'] == node_id]
+    recv = receiving.rename(columns={'node_id': 'node', 'source_port': 'sport', 'dest_port': 'dport'})
+    recv = recv[FLOW_KEY + ['timestamp', 'data_size']].astype('int64')
+    recv = recv.sort_values(FLOW_KEY + ['timestamp'], kind='stable', ignore_index=True)
+
+    grouped = recv.groupby(FLOW_KEY, sort=False)
+    cum_bytes = grouped['data_size'].cumsum()
+    prev_bytes = cum_bytes.groupby([recv[k] for k in FLOW_KEY], sort=False).shift(window)
+    prev_ts = grouped['timestamp'].shift(window)
+    interval_s = (recv['timestamp'] - prev_ts) / 1e9
+    recv['achieved'] = (cum_bytes - prev_bytes) * 8 / interval_s
+    recv = recv[interval_s > 0]
+    return recv[FLOW_KEY + ['timestamp', 'achieved']]
+
+
+def align(alloc, recv):
+    """As-of merge of receiving samples onto the allocation of their (sport, dport) in force at each sample."""
+    alloc = alloc.sort_values('alloc_ts', kind='stable')
+    recv = recv.sort_values('timestamp', kind='stable')
+    merged = pd.merge_asof(recv, alloc, left_on='timestamp', right_on='alloc_ts',
+                           by=ALLOC_KEY, direction='backward')
+    merged = merged.dropna(subset=['alloc_ts'])
+    merged = merged[merged['allocated'] > 0].astype({'alloc_ts': 'int64'})
+    merged['error'] = (merged['achieved'] - merged['allocated']) / merged['allocated']
+    return merged.reset_index(drop=True)
+
+
+def convergence_lags(merged, tolerance):
+    """
+    Lag (s) from each allocation change to the first sample within tolerance.
+
+    Returns one row per allocation change that has at least one aligned
+    sample, with NaN lag for changes that never converged.
+    """
+    within = merged[merged['error'].abs() <= tolerance]
+    first_hit = within.groupby(FLOW_KEY + ['alloc_ts'], sort=False)['timestamp'].min()
+    changes = merged[FLOW_KEY + ['alloc_ts']].drop_duplicates()
+    lags = changes.merge(first_hit.rename('hit_ts').reset_index(), on=FLOW_KEY + ['alloc_ts'], how='left')
+    lags['lag'] = (lags['hit_ts'] - lags['alloc_ts']) / 1e9
+    return lags
+
+
+def summarize_flows(merged, lags, tolerance, persist_frac):
+    """Per-flow tracking statistics and persistent-deviation flag."""
+    merged = merged.assign(abs_error=merged['error'].abs(),
+                           outside=merged['error'].abs() > tolerance)
+    grouped = merged.groupby(FLOW_KEY)
+    summary = pd.DataFrame({
+        'samples': grouped.size(),
+        'mean_error': grouped['error'].mean(),
+        'median_abs_error': grouped['abs_error'].median(),
+        'p95_abs_error': grouped['abs_error'].quantile(0.95),
+        'outside_frac': grouped['outside'].mean(),
+    })
+    lag_grouped = lags.groupby(FLOW_KEY)
+    summary['alloc_changes'] = lag_grouped.size()
+    summary['unconverged'] = lags['lag'].isna().groupby([lags[k] for k in FLOW_KEY]).sum()
+    summary['median_lag_s'] = lag_grouped['lag'].median()
+    summary['p95_lag_s'] = lag_grouped['lag'].quantile(0.95)
+    summary['persistent_deviation'] = summary['outside_frac'] >= persist_frac
+    return summary.reset_index()
+
+
+def print_distribution(name, values, unit=''):
+    values = values.dropna()
+    if values.empty:
+        print(f"{name}: no data")
+        return
+    pcts = np.percentile(values, [50, 90, 95, 99])
+    print(f"{name}: n={len(values)} p50={pcts[0]:.4g}{unit} p90={pcts[1]:.4g}{unit} "
+          f"p95={pcts[2]:.4g}{unit} p99={pcts[3]:.4g}{unit} max={values.max():.4g}{unit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Align CNCP allocated rates with achieved receiving rates per flow. Samples are grouped '
+                    'per receiving node and (sport, dport) and joined with the allocations of the same '
+                    '(sport, dport), whichever node logged them.')
+    parser.add_argument('-i', '--file', required=True, help='Path to the log file')
+    parser.add_argument('--recv-file', default=None,
+                        help='Log file with [RdmaHw Receiving] lines, if different from -i')
+    parser.add_argument('-n', '--node', type=int, default=None,
+                        help='Only use CNCP updates logged by this (allocating) node ID')
+    parser.add_argument('--recv-node', type=int, default=None,
+                        help='Only use receiving records logged by this (receiving) node ID')
+    parser.add_argument('-w', '--window', type=int, default=100,
+                        help='Number of receiving samples averaged into one achieved-rate sample (default: 100)')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative error counted as tracking the allocation (default: 0.1)')
+    parser.add_argument('--persist-frac', type=float, default=0.5,
+                        help='Flag flows outside the tolerance for at least this fraction of samples (default: 0.5)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Per-flow CSV output (default: rate_tracking_flows.csv next to the log file)')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Log lines parsed per chunk')
+    args = parser.parse_args()
+
+    if args.recv_file is None:
+        records = read_log_records(args.file, {CNCP_UPDATE: CNCP_UPDATE_COLUMNS,
+                                               RDMA_RECEIVING: RDMA_RECEIVING_COLUMNS}, args.chunksize)
+        updates, receiving = records[CNCP_UPDATE], records[RDMA_RECEIVING]
+    else:
+        updates = read_log_records(args.file, {CNCP_UPDATE: CNCP_UPDATE_COLUMNS}, args.chunksize)[CNCP_UPDATE]
+        receiving = read_log_records(args.recv_file, {RDMA_RECEIVING: RDMA_RECEIVING_COLUMNS},
+                                     args.chunksize)[RDMA_RECEIVING]
+    print(f"CNCP updates: {len(updates)}, receiving records: {len(receiving)}")
+
+    alloc = allocations_from_updates(updates, args.node)
+    recv = achieved_rates(receiving, args.recv_node, args.window)
+    merged = align(alloc, recv)
+    if merged.empty:
+        print("No receiving samples could be aligned with a CNCP allocation")
+        return
+
+    lags = convergence_lags(merged, args.tolerance)
+    summary = summarize_flows(merged, lags, args.tolerance, args.persist_frac)
+
+    print(f"Aligned samples: {len(merged)} across {len(summary)} flows")
+    print_distribution("Tracking error", merged['error'])
+    print_distribution("|Tracking error|", merged['error'].abs())
+    print_distribution("Convergence lag", lags['lag'], 's')
+    print(f"Unconverged allocation changes: {int(lags['lag'].isna().sum())} / {len(lags)}")
+
+    flagged = summary[summary['persistent_deviation']]
+    print(f"\nFlows with persistent deviation (> {args.tolerance:.0%} for >= {args.persist_frac:.0%} of samples): "
+          f"{len(flagged)}")
+    for row in flagged.itertuples(index=False):
+        print(f"  node={row.node} sport={row.sport} dport={row.dport}: outside {row.outside_frac:.1%}, "
+              f"mean error {row.mean_error:+.1%}, {row.samples} samples")
+
+    output = args.output
+    if output is None:
+        output = os.path.join(os.path.dirname(args.file), 'rate_tracking_flows.csv')
+    summary.to_csv(output, index=False)
+    print(f"\nPer-flow summary written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ if __name__=="__main__":
 	parser.add_argument('-d', dest='directory', action='store', default='.', help="Directory containing the FCT files")
 	parser.add_argument('-m', dest='min_size', action='store', type=int, default=None, help="only consider flows with size >= min_size (bytes)")
 	parser.add_argument('-P', dest='priority', action='store', type=int, default=None, help="only consider flows with this priority")
+	parser.add_argument('--cc', dest='ccs', nargs='+', default=None, help="FCT file names (without .txt) to analyze instead of the CCs list below")
+	parser.add_argument('-o', dest='output', action='store', default=None, help="Output file (default: a timestamped file in the directory)")
 	args = parser.parse_args()
 
 	type = args.type
@@ -39,6 +41,8 @@ if __name__=="__main__":
 		# 'bfc_8q_fct',
 		# 'bfc_32q_fct',
 	]
+	if args.ccs:
+		CCs = args.ccs
 
 	results = {}
 	for cc in tqdm(CCs, desc="Processing CCs"):
@@ -91,7 +95,7 @@ if __name__=="__main__":
 		results[cc] = (total_size, flow_count)
 
 	timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-	output_file = os.path.join(directory, f"throughput_analysis_result_{timestamp}.txt")
+	output_file = args.output or os.path.join(directory, f"throughput_analysis_result_{timestamp}.txt")
 
 	with open(output_file, "w") as fout:
 		header = "CC\tTotal_Size(bytes)\tFlow_Count"
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+CNCP update cadence statistics in one streaming pass.
+
+Reads [CNCP Update] lines in chunks and keeps a fixed amount of running
+state per flow (node_id, ip, sport, dport):
+
+  - last update timestamp, update count and sum of inter-update intervals
+  - valid / skipped update counts (skipped: old_rate == -1 and new_rate == 0)
+  - a log2-binned histogram of inter-update intervals (bin b holds
+    intervals in [2^b, 2^(b+1)) ns; bin 0 also holds zero intervals)
+  - update bursts: runs of updates closer together than --burst-gap;
+    the number of bursts and the longest burst are tracked
+
+Memory therefore grows with the number of flows, not with the log size.
+The report aggregates flows per node, per (node, dport) and per dport
+across all nodes.
+
+Usage:
+    uv run log_analysis/update_cadence.py -i log.txt
+    uv run log_analysis/update_cadence.py -i log.txt --burst-gap 5 --hist -o cadence_flows.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from log_reader import (CNCP_FLOW_KEY, CNCP_UPDATE, CNCP_UPDATE_COLUMNS, FlowIndex, grow,
+                        is_skipped_update, iter_log_records)
+
+N_BINS = 48  # 2^47 ns is about 39 hours
+
+
+class CadenceStats:
+    """Per-flow running cadence state, updated chunk by chunk in log order."""
+
+    def __init__(self, burst_gap_ns):
+        self.burst_gap_ns = burst_gap_ns
+        self.flows = FlowIndex(CNCP_FLOW_KEY)
+        self.last_ts = np.zeros(0, dtype=np.int64)
+        self.n_valid = np.zeros(0, dtype=np.int64)
+        self.n_skipped = np.zeros(0, dtype=np.int64)
+        self.n_intervals = np.zeros(0, dtype=np.int64)
+        self.sum_interval = np.zeros(0, dtype=np.float64)
+        self.hist = np.zeros((0, N_BINS), dtype=np.int64)
+        self.cur_run = np.zeros(0, dtype=np.int64)
+        self.n_bursts = np.zeros(0, dtype=np.int64)
+        self.max_burst = np.zeros(0, dtype=np.int64)
+
+    def _flow_ids(self, df):
+        fid = self.flows.ids(df)
+        n = len(self.flows)
+        self.last_ts = grow(self.last_ts, n, -1)
+        self.n_valid = grow(self.n_valid, n, 0)
+        self.n_skipped = grow(self.n_skipped, n, 0)
+        self.n_intervals = grow(self.n_intervals, n, 0)
+        self.sum_interval = grow(self.sum_interval, n, 0)
+        self.hist = grow(self.hist, n, 0)
+        self.cur_run = grow(self.cur_run, n, 0)
+        self.n_bursts = grow(self.n_bursts, n, 0)
+        self.max_burst = grow(self.max_burst, n, 0)
+        return fid
+
+    def feed(self, df):
+        if df.empty:
+            return
+        fid = self._flow_ids(df)
+        order = np.argsort(fid, kind='stable')
+        g = fid[order]
+        ts = df['timestamp'].to_numpy(np.int64)[order]
+        skipped = is_skipped_update(df).to_numpy()[order]
+        n_flows = len(self.flows)
+
+        self.n_skipped[:n_flows] += np.bincount(g[skipped], minlength=n_flows)
+        self.n_valid[:n_flows] += np.bincount(g[~skipped], minlength=n_flows)
+
+        # Inter-update intervals; the first row of a flow uses the carried timestamp
+        group_start = np.r_[True, g[1:] != g[:-1]]
+        prev_ts = np.r_[-1, ts[:-1]]
+        prev_ts[group_start] = self.last_ts[g[group_start]]
+        has_prev = prev_ts >= 0
+        dt = ts - prev_ts
+
+        gi, dti = g[has_prev], dt[has_prev]
+        bins = np.clip(np.floor(np.log2(np.maximum(dti, 1))).astype(np.int64), 0, N_BINS - 1)
+        np.add.at(self.hist, (gi, bins), 1)
+        self.n_intervals[:n_flows] += np.bincount(gi, minlength=n_flows)
+        self.sum_interval[:n_flows] += np.bincount(gi, weights=dti, minlength=n_flows)
+
+        # Burst runs: a run continues while the gap is below burst_gap. A run
+        # that is still open at a flow's first row in this chunk continues
+        # from the carried run length.
+        short = has_prev & (dt < self.burst_gap_ns)
+        seg_start = ~short | group_start
+        seg_id = np.cumsum(seg_start) - 1
+        seg_first = np.flatnonzero(seg_start)
+        pos = np.arange(len(g)) - seg_first[seg_id]
+        base = np.where(short[seg_first], self.cur_run[g[seg_first]], 0)
+        run = base[seg_id] + pos + 1
+
+        self.n_bursts[:n_flows] += np.bincount(g[run == 2], minlength=n_flows)
+        np.maximum.at(self.max_burst, g, np.where(run >= 2, run, 0))
+
+        group_end = np.r_[group_start[1:], True]
+        self.cur_run[g[group_end]] = run[group_end]
+        self.last_ts[g[group_end]] = ts[group_end]
+
+    def flow_frame(self):
+        n = len(self.flows)
+        df = pd.DataFrame(self.flows.keys, columns=CNCP_FLOW_KEY)
+        df['valid'] = self.n_valid[:n]
+        df['skipped'] = self.n_skipped[:n]
+        df['intervals'] = self.n_intervals[:n]
+        df['sum_interval_ns'] = self.sum_interval[:n]
+        df['bursts'] = self.n_bursts[:n]
+        df['max_burst'] = self.max_burst[:n]
+        return df, self.hist[:n]
+
+
+def hist_percentile(hist, q):
+    """Approximate percentile (ns) of a log2-binned histogram, using the geometric bin midpoint."""
+    total = hist.sum()
+    if total == 0:
+        return float('nan')
+    b = int(np.searchsorted(np.cumsum(hist), q / 100 * total))
+    return 2 ** (b + 0.5)
+
+
+def aggregate(flows, hist, by):
+    rows = []
+    for key, idx in flows.groupby(by).indices.items():
+        sub = flows.iloc[idx]
+        h = hist[idx].sum(axis=0)
+        updates = sub['valid'].sum() + sub['skipped'].sum()
+        intervals = sub['intervals'].sum()
+        rows.append({
+            **dict(zip(by, key if isinstance(key, tuple) else (key,))),
+            'flows': len(sub),
+            'updates': updates,
+            'valid': sub['valid'].sum(),
+            'skipped': sub['skipped'].sum(),
+            'skip_ratio': sub['skipped'].sum() / max(sub['valid'].sum(), 1),
+            'mean_us': sub['sum_interval_ns'].sum() / intervals / 1e3 if intervals else float('nan'),
+            'p50_us': hist_percentile(h, 50) / 1e3,
+            'p90_us': hist_percentile(h, 90) / 1e3,
+            'p99_us': hist_percentile(h, 99) / 1e3,
+            'bursts': sub['bursts'].sum(),
+            'max_burst': sub['max_burst'].max(),
+            'hist': h,
+        })
+    return rows
+
+
+def print_report(title, rows, by, show_hist):
+    print(f"\n=== {title} ===")
+    header = ''.join(f"{c:>8}" for c in by) + \
+        f"{'flows':>7}{'updates':>11}{'skipped':>10}{'skip/valid':>11}{'mean(us)':>10}" \
+        f"{'p50(us)':>10}{'p90(us)':>10}{'p99(us)':>10}{'bursts':>9}{'maxburst':>9}"
+    print(header)
+    for r in rows:
+        line = ''.join(f"{r[c]:>8}" for c in by)
+        line += f"{r['flows']:>7}{r['updates']:>11}{r['skipped']:>10}{r['skip_ratio']:>11.3f}" \
+                f"{r['mean_us']:>10.3g}{r['p50_us']:>10.3g}{r['p90_us']:>10.3g}{r['p99_us']:>10.3g}" \
+                f"{r['bursts']:>9}{r['max_burst']:>9}"
+        print(line)
+        if show_hist:
+            nz = np.flatnonzero(r['hist'])
+            if len(nz):
+                cells = [f"2^{b}ns:{r['hist'][b]}" for b in range(nz[0], nz[-1] + 1)]
+                print('        intervals ' + ' '.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CNCP update cadence statistics per node, per (node, dport) and per dport')
+    parser.add_argument('-i', '--file', required=True, help='Path to the log file')
+    parser.add_argument('--burst-gap', type=float, default=1.0,
+                        help='Updates closer than this (microseconds) belong to the same burst (default: 1.0)')
+    parser.add_argument('--hist', action='store_true', help='Print the log2-binned interval histogram per row')
+    parser.add_argument('-o', '--output', default=None, help='Optional per-flow CSV output')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Log lines parsed per chunk')
+    args = parser.parse_args()
+
+    stats = CadenceStats(burst_gap_ns=args.burst_gap * 1e3)
+    for chunk in iter_log_records(args.file, {CNCP_UPDATE: CNCP_UPDATE_COLUMNS}, args.chunksize):
+        stats.feed(chunk[CNCP_UPDATE])
+
+    flows, hist = stats.flow_frame()
+    if flows.empty:
+        print("No [CNCP Update] lines found")
+        return
+
+    print(f"Flows: {len(flows)}, updates: {int(flows['valid'].sum() + flows['skipped'].sum())}")
+    print_report('Per node', aggregate(flows, hist, ['node_id']), ['node_id'], args.hist)
+    print_report('Per node and dport', aggregate(flows, hist, ['node_id', 'dport']), ['node_id', 'dport'], args.hist)
+    print_report('Per dport (all nodes)', aggregate(flows, hist, ['dport']), ['dport'], args.hist)
+
+    if args.output:
+        flows.to_csv(args.output, index=False)
+        print(f"\nPer-flow statistics written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Arrival processes (arrivals.py): calibration to the load and phase bookkeeping."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from arrivals import GapStream, ModulatedArrivals, PoissonArrivals, from_spec
+from custom_rand import read_cdf
+from vector_gen import FlowModel, generate_chunks
+
+AVG = 1e4  # ns
+CDF = Path(__file__).resolve().parent.parent / 'traffic_gen' / 'dist_cdf' / 'WebSearch_distribution.txt'
+# Heavy-tailed ON/OFF periods (default shape 1.5) converge slowly; the others are checked to 2%
+SPECS = [('poisson', 0.02), ('lognormal:1', 0.02), ('pareto:2.5', 0.02), ('onoff:10,90,3', 0.02),
+         ('mmpp:10,200,800', 0.02), ('onoff:10,90', 0.1)]
+
+
+def process(spec, avg=AVG):
+    return from_spec(spec, avg) or PoissonArrivals(avg)
+
+
+def draw(p, rng, blocks=100, n=5000):
+    """Gaps and states of consecutive blocks, each resumed from the state the previous one returned."""
+    state = p.init_state(rng)
+    gaps, states = [], []
+    for _ in range(blocks):
+        g, s = p.gaps(rng, n, state)
+        gaps.append(g)
+        if s is not None:
+            states.append(s)
+            state = s[-1]
+    return np.concatenate(gaps), np.concatenate(states) if states else None
+
+
+@pytest.mark.parametrize('spec, tol', SPECS)
+def test_mean_gap_matches_the_load(spec, tol):
+    gaps, _ = draw(process(spec), np.random.default_rng(0))
+    assert (gaps >= 0).all()
+    assert gaps.mean() == pytest.approx(AVG, rel=tol)
+
+
+@pytest.mark.parametrize('spec', ['onoff:10,90', 'onoff:5,50,2'])
+def test_onoff_arrivals_only_in_on_periods(spec):
+    p = process(spec)
+    _, states = draw(p, np.random.default_rng(1), blocks=20)
+    assert (p.rates[states[:, 0].astype(int)] > 0).all()
+    assert (states[:, 1] >= 0).all()
+
+
+def test_mmpp_share_of_arrivals_in_the_high_state():
+    p = process('mmpp:10,200,800')
+    _, states = draw(p, np.random.default_rng(2))
+    high = p.rates[0] * p.means[0] / (p.rates * p.means).sum()
+    assert (states[:, 0] == 0).mean() == pytest.approx(high, abs=0.01)
+    assert high == pytest.approx(10 * 200 / (10 * 200 + 800))
+
+
+def test_rates_are_scaled_to_the_mean_gap():
+    p = ModulatedArrivals(AVG, (3.0, 1.0), (100.0, 300.0))
+    assert (p.rates * p.means).sum() / p.means.sum() == pytest.approx(1 / AVG)
+
+
+def test_gap_stream_mean():
+    stream = GapStream(process('mmpp:10,200,800'), np.random.default_rng(3), block=1000)
+    gaps = [stream.next() for _ in range(200_000)]
+    assert np.mean(gaps) == pytest.approx(AVG, rel=0.02)
+
+
+@pytest.mark.parametrize('spec', ['poisson', 'onoff:200,800,3', 'mmpp:10,200,800'])
+def test_vector_engine_load_across_short_windows(spec):
+    """Windows shorter than the phases: every host must resume at its pending arrival and phase."""
+    nhost, time = 50, int(0.05e9)
+    model = FlowModel(nhost, read_cdf(CDF), AVG, arrivals=from_spec(spec, AVG))
+    src = np.concatenate([c[0] for c in generate_chunks(model, time, int(100e3), seed=4)])
+    per_host = np.bincount(src, minlength=nhost)
+    # About 2500 ON/OFF or MMPP cycles in all, so the count is within a few percent
+    assert per_host.sum() == pytest.approx(nhost * time / AVG, rel=0.04)
+    assert (per_host > 0).all()
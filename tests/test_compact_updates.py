@@ -0,0 +1,110 @@
+"""Change-point compaction of CNCP update logs (compact_updates.py)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compact_updates import compact_log, load_compacted, step_function, to_update_frame
+
+RATES = [1e9, 2.5e9, 4e9]
+
+
+def write_log(path, n=4000, seed=0, skipped_head=0):
+    """
+    Random CNCP updates (repeats and skipped updates included) mixed with
+    other lines; the first skipped_head updates are all skipped.
+    """
+    rng = np.random.default_rng(seed)
+    updates = pd.DataFrame({
+        'node_id': rng.integers(0, 3, n),
+        'ip': rng.choice(['0b000101', '0b000201'], n),
+        'sport': rng.integers(100, 104, n),
+        'dport': rng.integers(200, 202, n),
+        'new_rate': rng.choice(RATES, n),
+        'timestamp': np.cumsum(rng.integers(1, 1000, n)),
+    })
+    skipped = rng.random(n) < 0.2
+    skipped[:skipped_head] = True
+    updates['old_rate'] = np.where(skipped, -1, 5)
+    updates.loc[skipped, 'new_rate'] = 0
+    with open(path, 'w') as f:
+        for i, u in enumerate(updates.itertuples(index=False)):
+            tag = '+0.5s ' if i % 5 == 0 else ''
+            f.write(f"{tag}[CNCP Update] {u.node_id} {u.ip} {u.sport} {u.dport} {u.old_rate} "
+                    f"{u.new_rate:.0f} {u.timestamp}\n")
+            if i % 7 == 0:
+                f.write(f"[RdmaHw Receiving] {u.node_id} {u.dport} {u.sport} 1000 {u.timestamp}\n")
+    return updates, skipped
+
+
+def flow_index(store):
+    return {(int(n), str(ip), int(s), int(d)): i for i, (n, ip, s, d) in enumerate(
+        zip(store['flow_node'], store['flow_ip'], store['flow_sport'], store['flow_dport']))}
+
+
+@pytest.fixture(scope='module')
+def compacted(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('compact')
+    updates, skipped = write_log(tmp / 'log.txt')
+    compact_log(tmp / 'log.txt', tmp / 'small.npz', chunksize=97)
+    compact_log(tmp / 'log.txt', tmp / 'large.npz')
+    return updates, skipped, load_compacted(tmp / 'small.npz'), load_compacted(tmp / 'large.npz')
+
+
+def test_chunk_size_does_not_change_the_store(compacted):
+    _, _, small, large = compacted
+    assert small.keys() == large.keys()
+    for name in small:
+        np.testing.assert_array_equal(small[name], large[name])
+
+
+def test_chunks_without_valid_updates(tmp_path):
+    """One line per chunk over a log that starts with skipped updates."""
+    updates, skipped = write_log(tmp_path / 'log.txt', n=150, seed=1, skipped_head=15)
+    compact_log(tmp_path / 'log.txt', tmp_path / 'single.npz', chunksize=1)
+    compact_log(tmp_path / 'log.txt', tmp_path / 'whole.npz')
+    single, whole = load_compacted(tmp_path / 'single.npz'), load_compacted(tmp_path / 'whole.npz')
+    for name in whole:
+        np.testing.assert_array_equal(single[name], whole[name])
+    assert single['cp_skipped'].sum() + single['flow_pre_skipped'].sum() == skipped.sum()
+    assert single['flow_updates'].sum() == len(updates)
+
+
+def test_step_function_reproduces_every_valid_update(compacted):
+    updates, skipped, store, _ = compacted
+    index = flow_index(store)
+    valid = updates[~skipped]
+    for key, group in valid.groupby(['node_id', 'ip', 'sport', 'dport']):
+        t, rate = step_function(store, index[key])
+        assert (np.diff(rate) != 0).all()  # only changes are kept
+        at = np.searchsorted(t, group['timestamp'].to_numpy(), side='right') - 1
+        np.testing.assert_array_equal(rate[at], group['new_rate'].to_numpy())
+
+
+def test_counts_add_up(compacted):
+    updates, skipped, store, _ = compacted
+    n_valid = int((~skipped).sum())
+    assert store['flow_updates'].sum() == len(updates)
+    assert store['cp_skipped'].sum() + store['flow_pre_skipped'].sum() == skipped.sum()
+    assert len(store['skip_ts']) == skipped.sum()
+    assert len(store['cp_ts']) + store['cp_repeats'].sum() == n_valid
+    assert store['flow_last_ts'].max() == updates['timestamp'].max()
+
+
+def test_update_frame_matches_the_raw_step_values(compacted):
+    updates, skipped, store, _ = compacted
+    frame = to_update_frame(store)
+    frame = frame[frame['old_rate'] != -1]
+    raw = updates[~skipped].assign(timestamp=lambda d: d['timestamp'] / 1e9)
+    merged = frame.merge(raw, on=['node_id', 'ip', 'sport', 'dport', 'timestamp'], suffixes=('', '_raw'))
+    assert len(merged) == len(frame)  # every emitted point is a raw valid update
+    np.testing.assert_array_equal(merged['new_rate'], merged['new_rate_raw'])
+
+
+def test_update_frame_keeps_the_skipped_updates(compacted):
+    updates, skipped, store, _ = compacted
+    frame = to_update_frame(store)
+    columns = ['node_id', 'ip', 'sport', 'dport', 'old_rate', 'new_rate', 'timestamp']
+    got = frame[frame['old_rate'] == -1][columns].sort_values('timestamp').reset_index(drop=True)
+    want = updates[skipped].assign(timestamp=lambda d: d['timestamp'] / 1e9)[columns].reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
@@ -0,0 +1,86 @@
+"""Host renumbering, redirection, windowing and thinning of subsample_traffic.py."""
+
+import sys
+
+import numpy as np
+import pytest
+
+import subsample_traffic
+from subsample_traffic import Subsampler, select_hosts
+from traffic_io import open_writer, read_flow_chunks
+
+NHOST = 16
+BASE = 2_000_000_000
+
+
+def random_flows(n=5000, seed=0):
+    """(src, dst, pg, dport, size, t) sorted by t, dst != src."""
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, NHOST, n)
+    dst = (src + rng.integers(1, NHOST, n)) % NHOST
+    t = np.sort(BASE + rng.integers(0, 100_000_000, n))
+    return src, dst, np.full(n, 3), np.full(n, 100), rng.integers(1, 10**6, n), t
+
+
+def table_size_cases():
+    """Kept hosts with the renumbering table sized as main() does without -n, and with -n."""
+    for hosts in (np.arange(4), np.array([2, 5, 11])):
+        yield hosts, hosts[-1] + 1
+        yield hosts, NHOST
+
+
+@pytest.mark.parametrize('hosts, nhost', list(table_size_cases()))
+def test_redirect_keeps_every_flow_of_the_kept_hosts(hosts, nhost):
+    flows = random_flows()
+    sub = Subsampler(hosts, nhost, rng=np.random.default_rng(1))
+    src, dst, pg, dport, size, t = sub.apply(*flows)
+    k = len(hosts)
+    assert ((src >= 0) & (src < k) & (dst >= 0) & (dst < k) & (dst != src)).all()
+    np.testing.assert_array_equal(np.bincount(src, minlength=k), np.bincount(flows[0], minlength=NHOST)[hosts])
+    # Per-host offered bytes are unchanged too
+    np.testing.assert_array_equal(np.bincount(src, weights=size, minlength=k),
+                                  np.bincount(flows[0], weights=flows[4], minlength=NHOST)[hosts])
+    np.testing.assert_array_equal(t, np.sort(t))
+
+
+@pytest.mark.parametrize('hosts, nhost', list(table_size_cases()))
+def test_inside_flows_are_renumbered_in_order(hosts, nhost):
+    flows = random_flows()
+    sub = Subsampler(hosts, nhost, outside='drop')
+    src, dst, *_ = sub.apply(*flows)
+    inside = np.isin(flows[0], hosts) & np.isin(flows[1], hosts)
+    assert len(src) == inside.sum()
+    np.testing.assert_array_equal(hosts[src], flows[0][inside])
+    np.testing.assert_array_equal(hosts[dst], flows[1][inside])
+
+
+def test_window_and_thinning():
+    flows = random_flows(20000)
+    t_start, t_end = BASE + 20_000_000, BASE + 60_000_000
+    sub = Subsampler(t_start=t_start, t_end=t_end, base=BASE, keep=0.5, rng=np.random.default_rng(2))
+    out = sub.apply(*flows)
+    in_window = ((flows[5] >= t_start) & (flows[5] < t_end)).sum()
+    assert ((out[5] >= BASE) & (out[5] < BASE + t_end - t_start)).all()
+    assert len(out[0]) == pytest.approx(0.5 * in_window, rel=0.05)
+    assert sub.done
+
+
+def test_select_hosts():
+    rng = np.random.default_rng(3)
+    hosts = select_hosts(NHOST, 5, random_hosts=True, rng=rng)
+    assert len(np.unique(hosts)) == 5 and (np.diff(hosts) > 0).all() and hosts[-1] < NHOST
+    np.testing.assert_array_equal(select_hosts(NHOST, host_list=[7, 3, 7, 1]), [1, 3, 7])
+    with pytest.raises(ValueError):
+        select_hosts(NHOST, host_list=[3, NHOST])
+
+
+def test_main_without_nhost_keeps_the_load(tmp_path, monkeypatch, capsys):
+    flows = random_flows()
+    with open_writer(tmp_path / 'in.txt') as writer:
+        writer.write(*flows)
+    monkeypatch.setattr(sys, 'argv', ['subsample_traffic.py', '-i', str(tmp_path / 'in.txt'),
+                                      '-o', str(tmp_path / 'out.bin'), '--hosts', '4', '--seed', '1'])
+    subsample_traffic.main()
+    src = np.concatenate([c[0] for c in read_flow_chunks(tmp_path / 'out.bin')])
+    np.testing.assert_array_equal(np.bincount(src, minlength=4), np.bincount(flows[0], minlength=NHOST)[:4])
+    assert f"Output flows: {len(src)}" in capsys.readouterr().out
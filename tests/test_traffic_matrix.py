@@ -0,0 +1,145 @@
+"""Alias-table destination sampling (traffic_matrix.py) and its use in the vector engine."""
+
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import traffic_matrix
+from custom_rand import read_cdf
+from traffic_matrix import AliasSampler, SharedAliasSampler, build_alias
+from vector_gen import FlowModel, generate_chunks
+
+CDF = Path(__file__).resolve().parent.parent / 'traffic_gen' / 'dist_cdf' / 'WebSearch_distribution.txt'
+
+
+def table_pmf(prob, alias):
+    """Distribution an alias table samples from: column j kept, plus what aliases to j."""
+    n = len(prob)
+    return (prob + np.bincount(alias, weights=1 - prob, minlength=n)) / n
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_build_alias_is_exact(seed):
+    rng = np.random.default_rng(seed)
+    w = rng.pareto(1.0, (8, 50)) * (rng.random((8, 50)) < 0.7)
+    w[0] = 0
+    w[0, 3] = 1  # one column holds everything
+    w[1] = 1  # already uniform
+    p = w * (50 / w.sum(axis=1, keepdims=True))
+    prob, alias = build_alias(p)
+    assert ((prob >= 0) & (prob <= 1)).all()
+    for row in range(8):
+        np.testing.assert_allclose(table_pmf(prob[row], alias[row]), w[row] / w[row].sum(), atol=1e-12)
+
+
+def test_dense_sampler_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    nhost = 12
+    w = rng.random((nhost, nhost)) * (rng.random((nhost, nhost)) < 0.5)
+    w[5] = 0  # all-zero row: uniform over the other hosts
+    w[6] = 0
+    w[6, 6] = 1  # only itself: also uniform
+    np.save(tmp_path / 'tm.npy', w)
+    sampler = traffic_matrix.from_file(nhost, tmp_path / 'tm.npy')
+    for s in range(nhost):
+        expected = w[s].copy()
+        expected[s] = 0
+        if expected.sum() == 0:
+            expected = np.ones(nhost)
+            expected[s] = 0
+        np.testing.assert_allclose(table_pmf(sampler.prob[s], sampler.alias[s]), expected / expected.sum(),
+                                   atol=1e-12)
+
+
+def test_dense_sampler_rejects_bad_matrices():
+    with pytest.raises(ValueError):
+        AliasSampler(3, lambda a, b: np.ones((b - a, 4)))
+    with pytest.raises(ValueError):
+        AliasSampler(3, lambda a, b: -np.ones((b - a, 3)))
+
+
+@pytest.mark.parametrize('make', [
+    lambda n: traffic_matrix.zipf(n, 1.2),
+    lambda n: traffic_matrix.hotspot(n, 4, 0.6),
+])
+def test_shared_sampler_is_the_row_without_the_diagonal(make):
+    nhost = 40
+    sampler = make(nhost)
+    for c in range(len(sampler.w)):
+        np.testing.assert_allclose(table_pmf(sampler.prob[c], sampler.alias[c]),
+                                   sampler.w[c] / sampler.w[c].sum(), atol=1e-12)
+    # Redraws of a source: stratified uniforms must land on every other host in proportion to its weight
+    m = 200_000
+    v = (np.arange(m) + 0.5) / m
+    for s in (0, 3, 4, nhost - 1):
+        dst = sampler._redraw(np.full(m, s), v)
+        expected = sampler.w[sampler.cls[s]].copy()
+        expected[s] = 0
+        np.testing.assert_allclose(np.bincount(dst, minlength=nhost) / m, expected / expected.sum(), atol=1e-4)
+
+
+@pytest.mark.parametrize('make', [
+    lambda n: traffic_matrix.zipf(n, 1.5),
+    lambda n: traffic_matrix.hotspot(n, 3, 0.9),
+    lambda n: traffic_matrix.hotspot(n, 1, 1.0),
+    lambda n: traffic_matrix.hotspot(n, n - 1, 0.0),
+])
+def test_destinations_are_other_hosts(make):
+    nhost = 30
+    sampler = make(nhost)
+    rng = np.random.default_rng(2)
+    src = np.repeat(np.arange(nhost), 2000)
+    dst = sampler.sample(src, rng)
+    assert ((dst >= 0) & (dst < nhost) & (dst != src)).all()
+    rand = random.Random(2).random
+    assert all(sampler.sample_one(s, rand) not in (s, None) for s in range(nhost) for _ in range(50))
+
+
+@pytest.mark.parametrize('k, frac', [(4, 0.6), (1, 0.3), (29, 0.2)])
+def test_hotspot_share_is_frac(k, frac):
+    nhost = 30
+    sampler = traffic_matrix.hotspot(nhost, k, frac)
+    hot = np.arange(nhost) < k
+    # Sources with hosts left on both sides (otherwise everything goes to the other side)
+    both = np.flatnonzero((hot.sum() - hot > 0) & ((~hot).sum() - ~hot > 0))
+    for s in both:
+        w = sampler.w[sampler.cls[s]].copy()
+        w[s] = 0
+        assert w[hot].sum() / w.sum() == pytest.approx(frac)
+    dst = sampler.sample(np.repeat(both, 5000), np.random.default_rng(3))
+    assert (dst < k).mean() == pytest.approx(frac, abs=0.01)
+
+
+def test_shared_sampler_needs_weight_outside_the_source():
+    with pytest.raises(ValueError):
+        SharedAliasSampler(3, [0.0, 0.0, 1.0])
+
+
+def test_interleaved_generators_keep_their_own_model():
+    """pipeline.py runs several generators interleaved in one process."""
+    custom_rand = read_cdf(CDF)
+    avg = 1 / (10e9 * 0.3 / 8 / custom_rand.getAvg()) * 1e9
+    small = FlowModel(4, custom_rand, avg, traffic_matrix.hotspot(4, 1, 0.5))
+    large = FlowModel(200, custom_rand, avg, traffic_matrix.zipf(200, 1.1))
+    args = (int(10e6), int(2e6), 7)
+
+    def run(model):
+        return [np.concatenate(c) for c in zip(*generate_chunks(model, *args))]
+    alone = [run(small), run(large)]
+    interleaved = [[], []]
+    running = [generate_chunks(small, *args), generate_chunks(large, *args)]
+    while any(running):
+        for i, gen in enumerate(running):
+            if gen is not None:
+                chunk = next(gen, None)
+                if chunk is None:
+                    running[i] = None
+                else:
+                    interleaved[i].append(chunk)
+    for model, ref, chunks in zip((small, large), alone, interleaved):
+        src, dst, size, t = (np.concatenate(c) for c in zip(*chunks))
+        assert ((src < model.nhost) & (dst < model.nhost) & (dst != src)).all()
+        for got, want in zip((src, dst, size, t), ref):
+            np.testing.assert_array_equal(got, want)
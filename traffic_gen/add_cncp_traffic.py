@@ -5,15 +5,32 @@ Add DC-CNCP traffic to existing background traffic files.
 Supports two modes:
 1. Independent sender mode: DC-CNCP uses different sender (1->3)
 2. Shared sender mode: DC-CNCP uses same sender (0->2) as background traffic
+
+The background file is already sorted by start time, so it is streamed
+once and merged with the lazily generated (also time-ordered) CNCP flows;
+output and per-pair statistics are produced during the merge, and only
+the current flow of each stream is held in memory.
+
+CNCP arrivals are Poisson by default; --arrival selects a bursty process
+from arrivals.py with the same mean rate. --load-schedule replaces the
+constant --cncp-load by a load over time (load_schedule.py): arrival
+times are generated in NumPy blocks at the peak load and thinned with one
+acceptance mask per block.
 """
 
 import sys
 import math
+import random
 import heapq
 import argparse
+from itertools import chain
 from pathlib import Path
 from optparse import OptionParser
+import numpy as np
+import arrivals
+import load_schedule
 from custom_rand import CustomRand
+from traffic_io import iter_flows, open_writer
 from tqdm import tqdm
 
 
@@ -47,33 +64,45 @@ def translate_bandwidth(b):
 
 def poisson(lam):
     """Generate Poisson-distributed random number."""
-    import random
     return -math.log(1 - random.random()) * lam
 
 
+def iter_background_traffic(filepath):
+    """Yield Flow objects from a background traffic file (text or binary), one flow at a time."""
+    for flow in iter_flows(filepath):
+        yield Flow(*flow)
+
+
 def read_background_traffic(filepath):
     """Read background traffic file and return list of Flow objects."""
-    flows = []
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-        # First line is number of flows
-        for line in lines[1:]:
-            parts = line.strip().split()
-            if len(parts) >= 6:
-                src = int(parts[0])
-                dst = int(parts[1])
-                pg = int(parts[2])
-                dport = int(parts[3])
-                size = int(parts[4])
-                t = float(parts[5])
-                flows.append(Flow(src, dst, pg, dport, size, t))
-    return flows
+    return list(iter_background_traffic(filepath))
+
+
+def cncp_arrival_times(avg_inter_arrival, base_time, t_end, arrival=None, schedule=None):
+    """Arrival times (ns) of the CNCP flow in (base_time, t_end]."""
+    process = arrivals.from_spec(arrival, avg_inter_arrival)
+    if schedule is not None:
+        # Peak-load arrivals thinned in blocks; seeded from random, so --seed fixes them
+        rng = np.random.default_rng(random.getrandbits(64))
+        process = process or arrivals.PoissonArrivals(avg_inter_arrival)
+        for times in load_schedule.thinned_arrivals(rng, process, base_time, t_end, schedule):
+            yield from times.tolist()
+        return
+    if process is not None:
+        # Seeded from random, so --seed also fixes the bursty arrivals
+        gaps = arrivals.GapStream(process, np.random.default_rng(random.getrandbits(64)))
+    t = base_time
+    while True:
+        t += int(gaps.next() if process is not None else poisson(avg_inter_arrival))
+        if t > t_end:
+            return
+        yield t
 
 
-def generate_cncp_traffic(nhost, load, bandwidth, time, cdf_file, src, dst,
-                          start_time_offset=0.0, base_time=2000000000):
+def iter_cncp_traffic(nhost, load, bandwidth, time, cdf_file, src, dst,
+                      start_time_offset=0.0, base_time=2000000000, arrival=None, schedule=None):
     """
-    Generate DC-CNCP traffic flows.
+    Lazily generate DC-CNCP traffic flows in start-time order.
 
     Args:
         nhost: Number of hosts (not used for single flow, kept for compatibility)
@@ -85,12 +114,12 @@ def generate_cncp_traffic(nhost, load, bandwidth, time, cdf_file, src, dst,
         dst: Destination node ID
         start_time_offset: Offset to add to flow start times (seconds)
         base_time: Base time in nanoseconds
+        arrival: Arrival process spec (arrivals.py), default Poisson
+        schedule: load_schedule.LoadSchedule (absolute ns) replacing load
 
-    Returns:
-        List of Flow objects
+    Yields:
+        Flow objects
     """
-    import random
-
     # Read CDF
     with open(cdf_file, 'r') as f:
         lines = f.readlines()
@@ -106,54 +135,78 @@ def generate_cncp_traffic(nhost, load, bandwidth, time, cdf_file, src, dst,
         sys.exit(1)
 
     # Generate flows
-    flows = []
     avg = customRand.getAvg()
+    if schedule is not None:
+        load = schedule.peak  # thinned down to the schedule
     avg_inter_arrival = 1 / (bandwidth * load / 8.0 / avg) * 1000000000
-    n_flow_estimate = int(time * 1e9 / avg_inter_arrival)
 
-    t = base_time
-    flow_count = 0
+    for t in cncp_arrival_times(avg_inter_arrival, base_time, base_time + time * 1e9, arrival, schedule):
+        size = int(customRand.rand())
+        if size <= 0:
+            size = 1
 
-    with tqdm(total=n_flow_estimate, desc=f"Generating CNCP traffic (src={src}->dst={dst})") as pbar:
-        while True:
-            inter_t = int(poisson(avg_inter_arrival))
-            t += inter_t
+        # Priority: >= 1MB -> pg 3, else pg 2
+        pg = 2
+        if size > 1000000:
+            pg = 3
 
-            if t > base_time + time * 1e9:
-                break
+        # Add offset to start time
+        start_time = t * 1e-9 + start_time_offset
 
-            size = int(customRand.rand())
-            if size <= 0:
-                size = 1
+        yield Flow(src, dst, pg, 100, size, start_time)
 
-            # Priority: >= 1MB -> pg 3, else pg 2
-            pg = 2
-            if size > 1000000:
-                pg = 3
 
-            # Add offset to start time
-            start_time = t * 1e-9 + start_time_offset
+def generate_cncp_traffic(nhost, load, bandwidth, time, cdf_file, src, dst,
+                          start_time_offset=0.0, base_time=2000000000, arrival=None, schedule=None):
+    """Generate DC-CNCP traffic flows; returns a list of Flow objects (see iter_cncp_traffic)."""
+    flows = iter_cncp_traffic(nhost, load, bandwidth, time, cdf_file, src, dst,
+                              start_time_offset, base_time, arrival, schedule)
+    return list(tqdm(flows, desc=f"Generating CNCP traffic (src={src}->dst={dst})"))
 
-            flows.append(Flow(src, dst, pg, 100, size, start_time))
-            flow_count += 1
-            pbar.update(1)
 
-    return flows
+def merge_flows(background_flows, cncp_flows):
+    """Lazily merge two time-ordered flow streams (background first on equal start times)."""
+    return heapq.merge(background_flows, cncp_flows, key=lambda f: f.t)
 
 
-def merge_flows(background_flows, cncp_flows):
-    """Merge background and CNCP flows, sort by start time."""
-    all_flows = background_flows + cncp_flows
-    all_flows.sort(key=lambda f: f.t)
-    return all_flows
+class FlowStats:
+    """Flow count, time range and per-pair counts, accumulated while flows stream past."""
 
+    def __init__(self):
+        self.count = 0
+        self.first_t = None
+        self.last_t = None
+        self.pairs = {}
 
-def write_traffic_file(flows, output_path):
-    """Write flows to traffic file."""
-    with open(output_path, 'w') as f:
-        f.write(f"{len(flows)} \n")
+    def add(self, flow):
+        if self.first_t is None:
+            self.first_t = flow.t
+        self.last_t = flow.t
+        self.count += 1
+        pair = (flow.src, flow.dst)
+        self.pairs[pair] = self.pairs.get(pair, 0) + 1
+
+    def track(self, flows):
+        """Pass flows through unchanged, counting each one."""
+        for flow in flows:
+            self.add(flow)
+            yield flow
+
+
+def write_traffic_file(flows, output_path, stats=None):
+    """
+    Stream flows to a traffic file and return the number written.
+
+    The count is not known up front, so a fixed-width placeholder is
+    written first and filled in at the end (as in add_small_traffic.py).
+    An output_path ending in .bin is written in the binary format.
+    """
+    if stats is not None:
+        flows = stats.track(flows)
+    with open_writer(output_path) as writer:
         for flow in flows:
-            f.write(str(flow) + "\n")
+            writer.write_flow(flow.src, flow.dst, flow.pg, flow.dport, flow.size, flow.t)
+    return writer.count
 
 
 def main():
@@ -198,9 +251,20 @@ Examples:
                         help='CNCP destination node (default: 3, for independent mode)')
     parser.add_argument('--no-cncp', action='store_true',
                         help='Only output background traffic without adding CNCP traffic')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for a reproducible run')
+    parser.add_argument('--arrival', default=None,
+                        help='CNCP arrival process: poisson, lognormal:SIGMA, pareto:ALPHA, '
+                             'onoff:ON_US,OFF_US[,ALPHA], mmpp:RATIO,HIGH_US,LOW_US (default: poisson)')
+    parser.add_argument('--load-schedule', default=None,
+                        help='CNCP load over time instead of --cncp-load: TIME:LOAD,... '
+                             '(seconds since the start) or a CSV file of time,load lines')
 
     args = parser.parse_args()
 
+    if args.seed is not None:
+        random.seed(args.seed)
+
     # Check input file exists
     if not Path(args.input).exists():
         print(f"Error: Input file '{args.input}' not found")
@@ -222,14 +286,27 @@ Examples:
         print(f"Error: Invalid bandwidth format '{args.bandwidth}'")
         sys.exit(1)
 
+    try:
+        arrivals.from_spec(args.arrival, 1.0)
+        schedule = load_schedule.parse(args.load_schedule, 2000000000) if args.load_schedule else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     print(f"Processing: {args.input}")
     print(f"Mode: {args.mode}")
-    print(f"CNCP Load: {args.cncp_load}")
+    if schedule is not None:
+        print(f"CNCP Load: schedule {args.load_schedule} (peak {schedule.peak})")
+    else:
+        print(f"CNCP Load: {args.cncp_load}")
 
-    # Read background traffic
-    print("Reading background traffic...")
-    bg_flows = read_background_traffic(args.input)
-    print(f"  Background flows: {len(bg_flows)}")
+    # Stream background traffic
+    print("Streaming background traffic...")
+    bg_stats = FlowStats()
+    bg_iter = iter_background_traffic(args.input)
+    first_bg = next(bg_iter, None)
+    bg_flows = chain([first_bg] if first_bg is not None else [], bg_iter)
+    bg_flows = bg_stats.track(bg_flows)
 
     # Determine CNCP source/destination based on mode
     if args.mode == 'independent':
@@ -237,20 +314,20 @@ Examples:
         cncp_dst = args.dst
     else:  # shared mode
         # Use same sender as background traffic (infer from first flow)
-        if len(bg_flows) > 0:
-            cncp_src = bg_flows[0].src
-            cncp_dst = bg_flows[0].dst
+        if first_bg is not None:
+            cncp_src = first_bg.src
+            cncp_dst = first_bg.dst
         else:
             cncp_src = 0
             cncp_dst = 2
 
-    # Generate CNCP traffic (if not disabled)
+    # Generate CNCP traffic lazily (if not disabled)
     if args.no_cncp:
         print("Skipping CNCP traffic generation (--no-cncp flag set)")
-        cncp_flows = []
+        cncp_flows = iter(())
     else:
         print(f"Generating CNCP traffic: {cncp_src} -> {cncp_dst}")
-        cncp_flows = generate_cncp_traffic(
+        cncp_flows = iter_cncp_traffic(
             nhost=4,  # Dumbbell topology has 4 hosts
             load=args.cncp_load,
             bandwidth=bandwidth,
@@ -258,28 +335,26 @@ Examples:
             cdf_file=str(cdf_path),
             src=cncp_src,
             dst=cncp_dst,
-            start_time_offset=args.start_offset
+            start_time_offset=args.start_offset,
+            arrival=args.arrival,
+            schedule=schedule
         )
-        print(f"  CNCP flows: {len(cncp_flows)}")
-
-    # Merge flows
-    all_flows = merge_flows(bg_flows, cncp_flows)
-    print(f"Total flows: {len(all_flows)}")
 
-    # Write output
-    write_traffic_file(all_flows, args.output)
+    # Merge and write in one pass
+    stats = FlowStats()
+    all_flows = tqdm(merge_flows(bg_flows, cncp_flows), desc="Merging flows")
+    write_traffic_file(all_flows, args.output, stats)
+    print(f"  Background flows: {bg_stats.count}")
+    print(f"  CNCP flows: {stats.count - bg_stats.count}")
+    print(f"Total flows: {stats.count}")
     print(f"Output written to: {args.output}")
 
     # Print statistics
-    if len(all_flows) > 0:
+    if stats.count > 0:
         print("\nFlow Statistics:")
-        print(f"  Time range: {all_flows[0].t:.6f}s - {all_flows[-1].t:.6f}s")
-        src_dst_pairs = {}
-        for f in all_flows:
-            pair = (f.src, f.dst)
-            src_dst_pairs[pair] = src_dst_pairs.get(pair, 0) + 1
+        print(f"  Time range: {stats.first_t:.6f}s - {stats.last_t:.6f}s")
         print("  Flow distribution:")
-        for (src, dst), count in sorted(src_dst_pairs.items()):
+        for (src, dst), count in sorted(stats.pairs.items()):
             print(f"    {src}->{dst}: {count} flows")
 
 
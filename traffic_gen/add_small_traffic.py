@@ -9,6 +9,8 @@ memory at any time.
 Output format is the same as traffic_gen.py:
     <total_flows>
     <src> <dst> <priority> <port> <size_bytes> <start_time_seconds>
+The input may also be a binary traffic file (traffic_io.py), and an
+output name ending in .bin writes the binary format.
 
 Usage:
     uv run traffic_gen/add_small_traffic.py \\
@@ -22,6 +24,11 @@ Options:
     -b  Link bandwidth, supports G/M/K suffix (default: 10G)
     -s  Background flow size in Bytes (default: 20000)
     -p  Background flow priority (default: 2)
+    --seed  Random seed for a reproducible run
+    --tm / --zipf / --hotspot  Destination traffic matrix instead of
+            uniform destinations (see traffic_matrix.py)
+    --arrival  Bursty arrival process instead of Poisson, same mean load
+            (see arrivals.py)
 
 Note: each host independently generates background traffic at the given
 load, so total injected background bandwidth is nhost * bandwidth * load.
@@ -31,7 +38,12 @@ import sys
 import random
 import math
 import heapq
+from itertools import chain
 from optparse import OptionParser
+import arrivals
+from traffic_io import iter_flows, open_writer, read_count
+from traffic_matrix import sampler_from_options
+from vector_gen import host_streams
 
 
 def translate_bandwidth(b):
@@ -52,16 +64,52 @@ def poisson(lam):
     return -math.log(1 - random.random()) * lam
 
 
-def drain_bg_flows(heap, nhost, bg_size, bg_priority, avg_inter_arrival, t_bound, outf, counter):
-    """Drain all background flows with time <= t_bound from the heap."""
+def gap_sampler(nhost, avg_inter_arrival, arrival=None):
+    """
+    next_gap(src) for every host: Poisson gaps from random, or gaps of an
+    arrivals.py process drawn in blocks from per-host NumPy streams seeded
+    from random (so --seed covers both).
+    """
+    process = arrivals.from_spec(arrival, avg_inter_arrival, unit=1.0)
+    if process is None:
+        return lambda src: poisson(avg_inter_arrival)
+    streams = [arrivals.GapStream(process, rng) for rng in host_streams(random.getrandbits(64), 0, nhost)]
+    return lambda src: streams[src].next()
+
+
+def pick_dst(src, nhost, dst_sampler=None):
+    if dst_sampler is not None:
+        return dst_sampler.sample_one(src)
+    dst = random.randint(0, nhost - 1)
+    while dst == src:
+        dst = random.randint(0, nhost - 1)
+    return dst
+
+
+def iter_small_traffic(nhost, load, bandwidth, size, priority, t_start, t_end, dst_sampler=None, arrival=None):
+    """
+    Lazily generate the background flows of this script from t_start to
+    t_end (seconds), in time order, as (src, dst, pg, dport, size, t) tuples.
+    """
+    avg_inter_arrival = 1 / (bandwidth * load / 8.0 / size)  # seconds
+    next_gap = gap_sampler(nhost, avg_inter_arrival, arrival)
+    heap = [(t_start + next_gap(i), i) for i in range(nhost)]
+    heapq.heapify(heap)
+    while heap and heap[0][0] <= t_end:
+        t_bg, src = heap[0]
+        dst = pick_dst(src, nhost, dst_sampler)
+        yield (src, dst, priority, 100, size, t_bg)
+        heapq.heapreplace(heap, (t_bg + next_gap(src), src))
+
+
+def drain_bg_flows(heap, nhost, bg_size, bg_priority, avg_inter_arrival, t_bound, writer, dst_sampler=None,
+                   next_gap=None):
+    """Drain all background flows with time <= t_bound from the heap to a traffic_io writer."""
     while heap and heap[0][0] <= t_bound:
         t_bg, src = heapq.heappop(heap)
-        dst = random.randint(0, nhost - 1)
-        while dst == src:
-            dst = random.randint(0, nhost - 1)
-        outf.write("%d %d %d %d %d %.9f\n" % (src, dst, bg_priority, 100, bg_size, t_bg))
-        counter[0] += 1
-        next_t = t_bg + poisson(avg_inter_arrival)
+        dst = pick_dst(src, nhost, dst_sampler)
+        writer.write_flow(src, dst, bg_priority, 100, bg_size, t_bg)
+        next_t = t_bg + (next_gap(src) if next_gap is not None else poisson(avg_inter_arrival))
         heapq.heappush(heap, (next_t, src))
 
 
@@ -74,6 +122,11 @@ if __name__ == "__main__":
     parser.add_option("-s", "--size", dest="size", help="background flow size in Bytes", default="20000")
     parser.add_option("-p", "--priority", dest="priority", help="background flow priority", default="2")
     parser.add_option("-o", "--output", dest="output", help="output file")
+    parser.add_option("--seed", dest="seed", help="random seed for a reproducible run", default=None)
+    parser.add_option("--tm", dest="tm", help="traffic matrix file (nhost x nhost destination weights)", default=None)
+    parser.add_option("--zipf", dest="zipf", help="Zipf destination popularity with this exponent", default=None)
+    parser.add_option("--hotspot", dest="hotspot", help="K,FRAC: FRAC of the flows go to hosts 0..K-1", default=None)
+    parser.add_option("--arrival", dest="arrival", help="arrival process (see arrivals.py), by default poisson", default=None)
     options, args = parser.parse_args()
 
     if not options.input or not options.nhost or not options.output:
@@ -89,56 +142,42 @@ if __name__ == "__main__":
     if bandwidth is None:
         print("bandwidth format incorrect")
         sys.exit(0)
+    if options.seed is not None:
+        random.seed(int(options.seed))
+    try:
+        dst_sampler = sampler_from_options(nhost, options.tm, options.zipf, options.hotspot)
+    except ValueError as e:
+        print("Error: %s" % e)
+        sys.exit(0)
 
     avg_inter_arrival = 1 / (bandwidth * load / 8.0 / bg_size)  # seconds
+    try:
+        next_gap = gap_sampler(nhost, avg_inter_arrival, options.arrival)
+    except ValueError as e:
+        print("Error: %s" % e)
+        sys.exit(0)
+
+    n_existing = read_count(options.input)
+    existing = iter_flows(options.input)
+    first = next(existing, None)
+    if first is None:
+        print("No flows in input file")
+        sys.exit(0)
+    min_time = first[5]
+
+    # Heap: (next_bg_time, host_id), one entry per host
+    heap = []
+    for i in range(nhost):
+        t = min_time + next_gap(i)
+        heapq.heappush(heap, (t, i))
+
+    with open_writer(options.output) as writer:
+        for flow in chain([first], existing):
+            drain_bg_flows(heap, nhost, bg_size, bg_priority, avg_inter_arrival, flow[5], writer, dst_sampler,
+                           next_gap)
+            writer.write_flow(*flow)
 
-    with open(options.input, "r") as inf, open(options.output, "w") as outf:
-        n_existing = int(inf.readline().strip())
-
-        # Read first flow to get start time
-        first_line = inf.readline().strip()
-        if not first_line:
-            print("No flows in input file")
-            sys.exit(0)
-
-        parts = first_line.split()
-        min_time = float(parts[5])
-
-        # Heap: (next_bg_time, host_id), one entry per host
-        heap = []
-        for i in range(nhost):
-            t = min_time + poisson(avg_inter_arrival)
-            heapq.heappush(heap, (t, i))
-
-        total = [0]
-        outf.write("%-15d\n" % 0)  # placeholder for total count
-
-        # Process first existing flow
-        drain_bg_flows(heap, nhost, bg_size, bg_priority, avg_inter_arrival, min_time, outf, total)
-        outf.write(first_line + "\n")
-        total[0] += 1
-
-        t_existing = min_time  # default in case there's only one flow
-
-        # Process remaining existing flows
-        for line in inf:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split()
-            if len(parts) < 6:
-                continue
-            t_existing = float(parts[5])
-
-            drain_bg_flows(heap, nhost, bg_size, bg_priority, avg_inter_arrival, t_existing, outf, total)
-            outf.write(line + "\n")
-            total[0] += 1
-
-        # Write actual total count (same width as placeholder to overwrite cleanly)
-        outf.seek(0)
-        outf.write("%-15d" % total[0])
-
-    n_bg = total[0] - n_existing
+    n_bg = writer.count - n_existing
     print("Original flows: %d" % n_existing)
     print("Added background flows: %d (size=%dB, priority=%d, load=%.0f%%)" % (n_bg, int(options.size), bg_priority, load * 100))
-    print("Total flows: %d" % total[0])
+    print("Total flows: %d" % writer.count)
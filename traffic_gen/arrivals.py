@@ -0,0 +1,173 @@
+"""
+Arrival processes for the per-host flow generators.
+
+Every process is calibrated to a mean inter-arrival time avg (the value
+the generators derive from bandwidth * load), so the long-run offered
+load of a host is the same whatever the process; only the burstiness
+changes:
+
+  poisson                   exponential gaps (the default model)
+  lognormal:SIGMA           lognormal gaps with log-std SIGMA
+  pareto:ALPHA              Pareto gaps with shape ALPHA > 1 (heavy tail)
+  onoff:ON,OFF[,ALPHA]      Poisson arrivals during ON periods, none during
+                            OFF periods; both periods Pareto with mean ON /
+                            OFF microseconds and shape ALPHA (default 1.5)
+  mmpp:RATIO,HIGH,LOW       two-state Markov-modulated Poisson: the rate in
+                            the high state is RATIO times the low one, with
+                            exponential sojourns of mean HIGH / LOW us
+
+The ON/OFF and MMPP processes alternate between two phases with rates r0
+and r1 and mean durations s0 and s1; their long-run rate is
+(r0 s0 + r1 s1) / (s0 + s1), which is set to 1 / avg.
+
+gaps(rng, n, state) draws n consecutive gaps of one host at once. The
+modulated processes are sampled on their intensity clock: n unit
+exponentials are accumulated, enough phase periods are drawn to cover
+them, and every arrival is mapped back to real time inside its period
+with one searchsorted. They keep a per-host state (current phase, time
+left in it), returned after every gap so a generator can resume from
+any arrival; renewal processes have no state.
+"""
+
+import numpy as np
+
+
+class PoissonArrivals:
+    n_state = 0
+
+    def __init__(self, avg):
+        self.avg = avg
+
+    def init_state(self, rng):
+        return np.zeros(0)
+
+    def gaps(self, rng, n, state):
+        return rng.exponential(self.avg, n), None
+
+
+class LognormalArrivals(PoissonArrivals):
+    def __init__(self, avg, sigma):
+        super().__init__(avg)
+        self.sigma = sigma
+        self.mu = np.log(avg) - sigma * sigma / 2
+
+    def gaps(self, rng, n, state):
+        return rng.lognormal(self.mu, self.sigma, n), None
+
+
+class ParetoArrivals(PoissonArrivals):
+    def __init__(self, avg, alpha):
+        if alpha <= 1:
+            raise ValueError("Pareto gaps need a shape > 1 for a finite mean")
+        super().__init__(avg)
+        self.alpha = alpha
+        self.xm = avg * (alpha - 1) / alpha
+
+    def gaps(self, rng, n, state):
+        return self.xm * (1 + rng.pareto(self.alpha, n)), None
+
+
+class ModulatedArrivals:
+    """
+    Poisson arrivals whose rate alternates between two phases. Phase
+    durations are exponential (alpha=None) or Pareto with shape alpha.
+    """
+    n_state = 2
+
+    def __init__(self, avg, rates, means, alpha=None):
+        if alpha is not None and alpha <= 1:
+            raise ValueError("Pareto periods need a shape > 1 for a finite mean")
+        self.means = np.array(means, dtype=np.float64)
+        if (self.means <= 0).any():
+            raise ValueError("phase durations must be positive")
+        self.avg = avg
+        rates = np.array(rates, dtype=np.float64)
+        # Scale the rates so that the long-run rate is 1 / avg
+        self.rates = rates * self.means.sum() / (avg * (rates * self.means).sum())
+        self.alpha = alpha
+        self.cycle = (self.rates * self.means).sum()  # expected arrivals per ON/OFF cycle
+
+    def durations(self, rng, phases):
+        means = self.means[phases]
+        if self.alpha is None:
+            return rng.exponential(means)
+        return means * (self.alpha - 1) / self.alpha * (1 + rng.pareto(self.alpha, len(phases)))
+
+    def init_state(self, rng):
+        """Start in a phase chosen in proportion to its mean duration, with a fresh period."""
+        phase = int(rng.random() * self.means.sum() >= self.means[0])
+        return np.array([phase, self.durations(rng, np.array([phase]))[0]])
+
+    def gaps(self, rng, n, state):
+        u = np.cumsum(rng.exponential(1.0, n))  # arrivals on the intensity clock
+        phases = [np.array([int(state[0])])]
+        lengths = [np.array([state[1]])]
+        covered = state[1] * self.rates[int(state[0])]
+        while covered < u[-1]:
+            cycles = int((u[-1] - covered) / self.cycle * 1.25) + 2
+            block = (phases[-1][-1] + 1 + np.arange(2 * cycles)) % 2
+            phases.append(block)
+            lengths.append(self.durations(rng, block))
+            covered += (self.rates[block] * lengths[-1]).sum()
+        phases = np.concatenate(phases)
+        lengths = np.concatenate(lengths)
+        intensity = self.rates[phases] * lengths
+        i_end = np.cumsum(intensity)
+        t_end = np.cumsum(lengths)
+        # First period whose cumulative intensity reaches u (never a zero-rate period)
+        j = np.minimum(np.searchsorted(i_end, u), len(lengths) - 1)
+        rate = self.rates[phases[j]]
+        t = t_end[j] - lengths[j] + (u - (i_end[j] - intensity[j])) / np.where(rate > 0, rate, 1)
+        states = np.stack([phases[j], np.maximum(t_end[j] - t, 0)], axis=1)
+        return np.diff(t, prepend=0.0), states
+
+
+def from_spec(spec, avg, unit=1e-9):
+    """
+    Arrival process for a spec string (see the module docstring) with mean
+    gap avg; unit is the length of avg's time unit in seconds (1e-9 for ns).
+    Returns None for plain Poisson arrivals.
+    """
+    if spec is None:
+        return None
+    name, _, params = str(spec).partition(':')
+    try:
+        args = [float(x) for x in params.split(',')] if params else []
+    except ValueError:
+        args = None
+    us = 1e-6 / unit
+    if name == 'poisson' and args == []:
+        return None
+    if name == 'lognormal' and args is not None and len(args) == 1:
+        return LognormalArrivals(avg, args[0])
+    if name == 'pareto' and args is not None and len(args) == 1:
+        return ParetoArrivals(avg, args[0])
+    if name == 'onoff' and args is not None and len(args) in (2, 3):
+        alpha = args[2] if len(args) == 3 else 1.5
+        return ModulatedArrivals(avg, (1.0, 0.0), (args[0] * us, args[1] * us), alpha)
+    if name == 'mmpp' and args is not None and len(args) == 3:
+        return ModulatedArrivals(avg, (args[0], 1.0), (args[1] * us, args[2] * us))
+    raise ValueError(f"bad arrival process '{spec}' (poisson, lognormal:SIGMA, pareto:ALPHA, "
+                     "onoff:ON,OFF[,ALPHA], mmpp:RATIO,HIGH,LOW)")
+
+
+class GapStream:
+    """Gaps of one host drawn in blocks from its own Generator and handed out one at a time."""
+
+    def __init__(self, process, rng, block=4096):
+        self.process = process
+        self.rng = rng
+        self.block = block
+        self.state = process.init_state(rng)
+        self.buf = []
+        self.i = 0
+
+    def next(self):
+        if self.i == len(self.buf):
+            gaps, states = self.process.gaps(self.rng, self.block, self.state)
+            if states is not None:
+                self.state = states[-1]
+            self.buf = gaps.tolist()
+            self.i = 0
+        self.i += 1
+        return self.buf[self.i - 1]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Generate collective-communication traffic (ML training phases).
+
+Hosts are split into groups of --group-size consecutive hosts (one job
+per group, the ranks of a job are its hosts in order); hosts left over
+after the last full group stay idle. Every group runs the same collective
+at the same time, --iterations times, with --compute-gap of idle time
+before every iteration:
+
+  ring    ring all-reduce: 2(p-1) steps (reduce-scatter, then all-gather);
+          in every step rank r sends M/p bytes to rank r+1
+  hd      halving-doubling all-reduce (p must be a power of two):
+          log2(p) reduce-scatter steps where rank r exchanges M/2, M/4, ...
+          bytes with rank r XOR p/2, r XOR p/4, ..., then the same steps
+          in reverse for the all-gather
+  a2a     all-to-all: p-1 steps, in step k rank r sends M/p bytes to
+          rank r+k (mod p), so every pair exchanges one chunk
+
+M is the message (gradient buffer) size of every rank, chunk sizes are
+rounded up to whole bytes. Without a simulator in the loop a step is
+assumed to take its chunk's serialization time at the host bandwidth
+plus --step-gap, and the next step starts after it.
+
+Each step is built as NumPy arrays over all groups and ranks at once (one
+partner table per collective, shifted by the group's first host) and
+written as soon as it is built, so jobs with thousands of ranks take a
+few array operations per step. With -i the collective flows are merged
+by start time into an existing traffic file.
+
+Usage:
+    # 4 jobs of 16 ranks, ring all-reduce of 64MB, 10 iterations with 1ms compute between them
+    uv run traffic_gen/collective_traffic.py -n 64 --group-size 16 --pattern ring --msg-size 67108864 \\
+        --iterations 10 --compute-gap 1000 -b 100G -o allreduce.txt
+
+    # All-to-all of 1MB per rank across 1024 hosts, over background traffic
+    uv run traffic_gen/collective_traffic.py -i traffic.txt -n 1024 --pattern a2a --msg-size 1048576 \\
+        -b 100G -o traffic_a2a.txt
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from traffic_gen import translate_bandwidth
+from traffic_io import open_writer, write_merged
+
+BASE_T = 2000000000  # ns
+
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+def ring_steps(p, msg_size):
+    """Ring all-reduce: list of (partner of every rank, chunk size) per step."""
+    partner = (np.arange(p) + 1) % p
+    return [(partner, ceil_div(msg_size, p))] * (2 * (p - 1))
+
+
+def halving_doubling_steps(p, msg_size):
+    """Recursive halving reduce-scatter followed by recursive doubling all-gather."""
+    if p & (p - 1):
+        raise ValueError("halving-doubling needs a power-of-two group size")
+    ranks = np.arange(p)
+    steps = []
+    distance, size = p // 2, msg_size
+    while distance >= 1:
+        size = ceil_div(size, 2)
+        steps.append((ranks ^ distance, size))
+        distance //= 2
+    return steps + steps[::-1]
+
+
+def all_to_all_steps(p, msg_size):
+    """Shifted all-to-all: in step k every rank sends one chunk to rank + k."""
+    ranks = np.arange(p)
+    size = ceil_div(msg_size, p)
+    return [((ranks + k) % p, size) for k in range(1, p)]
+
+
+PATTERNS = {'ring': ring_steps, 'hd': halving_doubling_steps, 'a2a': all_to_all_steps}
+
+
+def step_offsets(steps, bandwidth, step_gap):
+    """Start time (ns, from the start of the collective) of every step, and the collective's duration."""
+    durations = np.array([size * 8 / bandwidth * 1e9 + step_gap for _, size in steps])
+    ends = np.cumsum(durations)
+    return np.rint(ends - durations).astype(np.int64), int(round(ends[-1])) if len(ends) else 0
+
+
+def step_flows(steps, offsets, group_starts, t0, pg, dport):
+    """Yield the flows of every step of one collective of all groups starting at t0 (ns), in (start, src) order."""
+    p = len(steps[0][0])
+    ranks = np.arange(p)
+    n = len(group_starts) * p
+    src = (group_starts[:, None] + ranks).ravel()
+    pg = np.full(n, pg, dtype=np.int64)
+    dport = np.full(n, dport, dtype=np.int64)
+    # Step offsets never decrease, so consecutive steps stay in start order
+    for (partner, size), offset in zip(steps, offsets):
+        dst = (group_starts[:, None] + partner).ravel()
+        yield src, dst, pg, dport, np.full(n, size, dtype=np.int64), np.full(n, t0 + offset, dtype=np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate ring all-reduce / halving-doubling / all-to-all traffic')
+    parser.add_argument('-i', '--input', default=None, help='Background traffic file to merge with (optional)')
+    parser.add_argument('-o', '--output', required=True, help='Output traffic file')
+    parser.add_argument('-n', '--nhost', type=int, required=True, help='Number of hosts')
+    parser.add_argument('--group-size', type=int, default=None,
+                        help='Ranks per job; hosts are split into groups of consecutive hosts (default: all hosts)')
+    parser.add_argument('--pattern', choices=sorted(PATTERNS), default='ring', help='Collective (default: ring)')
+    parser.add_argument('--msg-size', type=int, required=True, help='Message size per rank in bytes')
+    parser.add_argument('--iterations', type=int, default=1, help='Collectives per job (default: 1)')
+    parser.add_argument('--compute-gap', type=float, default=0.0,
+                        help='Idle time before every iteration in microseconds (default: 0)')
+    parser.add_argument('--step-gap', type=float, default=0.0,
+                        help='Extra time between steps in microseconds (default: 0)')
+    parser.add_argument('-b', '--bandwidth', default='100G', help='Host bandwidth for step timing (default: 100G)')
+    parser.add_argument('--start', type=float, default=BASE_T * 1e-9, help='Start time in seconds (default: 2.0)')
+    parser.add_argument('-p', '--pg', type=int, default=2, help='Priority of collective flows (default: 2)')
+    parser.add_argument('--dport', type=int, default=100, help='Destination port of collective flows (default: 100)')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Background flows merged per chunk')
+    args = parser.parse_args()
+
+    group_size = args.group_size or args.nhost
+    if args.iterations < 1:
+        print("Error: --iterations must be at least 1")
+        sys.exit(1)
+    if not 2 <= group_size <= args.nhost:
+        print("Error: --group-size must be between 2 and nhost")
+        sys.exit(1)
+    bandwidth = translate_bandwidth(args.bandwidth)
+    if bandwidth is None:
+        print("Error: bandwidth format incorrect")
+        sys.exit(1)
+    try:
+        steps = PATTERNS[args.pattern](group_size, args.msg_size)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    group_starts = np.arange(args.nhost // group_size, dtype=np.int64) * group_size
+    offsets, duration = step_offsets(steps, bandwidth, args.step_gap * 1e3)
+    compute_gap = int(round(args.compute_gap * 1e3))
+    t0 = int(round(args.start * 1e9))
+
+    with open_writer(args.output) as writer:
+        blocks = []
+        for _ in range(args.iterations):
+            t0 += compute_gap
+            for flows in step_flows(steps, offsets, group_starts, t0, args.pg, args.dport):
+                if args.input:
+                    blocks.append(flows)
+                else:
+                    writer.write(*flows)
+            t0 += duration
+        if args.input:
+            write_merged(writer, args.input, tuple(np.concatenate(c) for c in zip(*blocks)), args.chunksize)
+        n_flows = args.iterations * len(steps) * len(group_starts) * group_size
+
+    print(f"Groups: {len(group_starts)} x {group_size} ranks, {args.pattern}, {len(steps)} steps per iteration")
+    print(f"Iteration: {duration * 1e-3:.3f}us of communication + {args.compute_gap:.3f}us compute")
+    print(f"Collective flows: {n_flows}")
+    if args.input:
+        print(f"Background flows: {writer.count - n_flows}")
+    print(f"Total flows: {writer.count}")
+    print(f"Output written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Convert a traffic file between the ns3 text format and the binary format
+of traffic_io.py.
+
+The input format is detected from the file; the output format follows
+the output name (*.bin is binary) unless --binary or --text is given.
+Flows are copied in chunks with the bulk reader and formatter, so a
+binary file converts to text with one formatted write per block and
+without holding the file in memory.
+
+Usage:
+    # text -> binary, then back
+    uv run traffic_gen/convert_traffic.py -i traffic.txt -o traffic.bin
+    uv run traffic_gen/convert_traffic.py -i traffic.bin -o traffic.txt
+"""
+
+import argparse
+import sys
+
+from traffic_io import BinaryTrafficWriter, is_binary, open_writer, read_count, read_flow_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a traffic file between the text and binary formats')
+    parser.add_argument('-i', '--input', required=True, help='Input traffic file (text or binary)')
+    parser.add_argument('-o', '--output', required=True, help='Output traffic file')
+    fmt = parser.add_mutually_exclusive_group()
+    fmt.add_argument('--binary', dest='binary', action='store_true', default=None,
+                     help='Write the binary format (default for a *.bin output)')
+    fmt.add_argument('--text', dest='binary', action='store_false', help='Write the text format')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Flows per chunk')
+    args = parser.parse_args()
+
+    try:
+        expected = read_count(args.input)
+        source = 'binary' if is_binary(args.input) else 'text'
+        with open_writer(args.output, args.binary) as writer:
+            for chunk in read_flow_chunks(args.input, args.chunksize):
+                writer.write(*chunk)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    target = 'binary' if isinstance(writer, BinaryTrafficWriter) else 'text'
+    print(f"Converted {writer.count} flows ({source} -> {target})")
+    if expected != writer.count:
+        print(f"Warning: the input header says {expected} flows")
+    print(f"Output written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
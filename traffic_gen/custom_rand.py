@@ -1,4 +1,6 @@
 import random
+from bisect import bisect_left
+import numpy as np
 class CustomRand:
 	def __init__(self):
 		pass
@@ -19,42 +21,78 @@ class CustomRand:
 		if not self.testCdf(cdf):
 			return False
 		self.cdf = cdf
+		# cache the breakpoints (lists for bisect, arrays for vectorized lookups)
+		self.xList = [float(c[0]) for c in cdf]
+		self.yList = [float(c[1]) for c in cdf]
+		self.xs = np.array(self.xList)
+		self.ys = np.array(self.yList)
+		# cumIntegral[i]: integral of x dy / 100 over the first i segments; the last one is the mean
+		seg = 0.5 * (self.xs[1:] + self.xs[:-1]) * np.diff(self.ys) / 100.
+		self.cumIntegral = np.concatenate(([0.], np.cumsum(seg)))
+		self.avg = float(self.cumIntegral[-1])
 		return True
 	def getAvg(self):
-		s = 0
-		last_x, last_y = self.cdf[0]
-		for c in self.cdf[1:]:
-			x, y = c
-			s += (x + last_x)/2.0 * (y - last_y)
-			last_x = x
-			last_y = y
-		return s/100
+		return self.avg
 	def rand(self):
 		r = random.random() * 100
 		return self.getValueFromPercentile(r)
+	def sample(self, n, rng=None):
+		# draw n values at once; rng is a numpy Generator (fresh one if None)
+		if rng is None:
+			rng = np.random.default_rng()
+		return self.getValueFromPercentile(rng.random(n) * 100)
 	def getPercentileFromValue(self, x):
-		if x < 0 or x > self.cdf[-1][0]:
+		# accepts a scalar or an array; out-of-range values map to -1
+		if hasattr(x, '__len__'):
+			x = np.asarray(x, dtype=np.float64)
+			i = np.clip(np.searchsorted(self.xs, x, side='left'), 1, len(self.xs) - 1)
+			x0, y0 = self.xs[i-1], self.ys[i-1]
+			x1, y1 = self.xs[i], self.ys[i]
+			flat = x1 == x0
+			with np.errstate(divide='ignore', invalid='ignore'):
+				p = np.where(flat, np.where(x >= x1, y1, y0), y0 + (y1-y0)/(x1-x0)*(x-x0))
+			p[(x < 0) | (x > self.xs[-1])] = -1
+			return p
+		if x < 0 or x > self.xList[-1]:
 			return -1
-		for i in range(1, len(self.cdf)):
-			if x <= self.cdf[i][0]:
-				x0, y0 = self.cdf[i-1]
-				x1, y1 = self.cdf[i]
-				return y0 + (y1-y0)/(x1-x0)*(x-x0)
+		i = bisect_left(self.xList, x, 1)
+		x0, y0 = self.xList[i-1], self.yList[i-1]
+		x1, y1 = self.xList[i], self.yList[i]
+		if x1 == x0:
+			# vertical step of a fixed-size distribution
+			return y1 if x >= x1 else y0
+		return y0 + (y1-y0)/(x1-x0)*(x-x0)
 	def getValueFromPercentile(self, y):
-		for i in range(1, len(self.cdf)):
-			if y <= self.cdf[i][1]:
-				x0,y0 = self.cdf[i-1]
-				x1,y1 = self.cdf[i]
-				return x0 + (x1-x0)/(y1-y0)*(y-y0)
+		# accepts a scalar or an array of percentiles in [0, 100]
+		if hasattr(y, '__len__'):
+			y = np.asarray(y, dtype=np.float64)
+			i = np.clip(np.searchsorted(self.ys, y, side='left'), 1, len(self.ys) - 1)
+			x0, y0 = self.xs[i-1], self.ys[i-1]
+			x1, y1 = self.xs[i], self.ys[i]
+			return x0 + (x1-x0)/(y1-y0)*(y-y0)
+		i = bisect_left(self.yList, y, 1)
+		if i == len(self.yList):
+			return None
+		x0, y0 = self.xList[i-1], self.yList[i-1]
+		x1, y1 = self.xList[i], self.yList[i]
+		return x0 + (x1-x0)/(y1-y0)*(y-y0)
 	def getIntegralY(self, y):
-		s = 0
-		for i in range(1, len(self.cdf)):
-			x0, y0 = self.cdf[i-1]
-			x1, y1 = self.cdf[i]
-			if y <= self.cdf[i][1]:
-				s += 0.5 * (x0 + x0+(x1-x0)/(y1-y0)*(y-y0))*(y-y0) / 100.
-				break
-			else:
-				s += 0.5 * (x1 + x0) * (y1 - y0) / 100.
+		i = bisect_left(self.yList, y, 1)
+		if i == len(self.yList):
+			return float(self.cumIntegral[-1])
+		x0, y0 = self.xList[i-1], self.yList[i-1]
+		x1, y1 = self.xList[i], self.yList[i]
+		return float(self.cumIntegral[i-1]) + 0.5 * (x0 + x0+(x1-x0)/(y1-y0)*(y-y0))*(y-y0) / 100.
 
-		return s
+def read_cdf(path):
+	# read a cdf file ("size percentile" per line); returns a CustomRand, or None if the cdf is not valid
+	cdf = []
+	with open(path, 'r') as f:
+		for line in f:
+			if line.strip():
+				x, y = map(float, line.strip().split(' '))
+				cdf.append([x, y])
+	customRand = CustomRand()
+	if not customRand.setCdf(cdf):
+		return None
+	return customRand
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Generate incast (many-to-one) traffic, optionally merged into a background file.
+
+An incast event at time T picks one receiver and --fan-in distinct senders
+(all different from the receiver); every sender starts a response of
+--size bytes (or a size from a CDF) to the receiver at T plus a uniform
+jitter in [0, --jitter). Events are periodic (--period) or Poisson with
+--rate events per second. Incast flows use dport 200, the port
+fct_analysis.py / throughput_analysis.py treat as incast (-t 1 excludes
+them from the background statistics).
+
+Events are generated in vectorized batches: senders of a batch of events
+come from one argpartition of a random matrix, shifted past the receiver
+so they never include it. Background flows are read in chunks and merged
+by start time (background first on equal times), so neither side is
+looped over in Python.
+
+Usage:
+    # 100 incasts/s, 64 senders x 64KB to a random receiver, over 1 s of background
+    uv run traffic_gen/incast_traffic.py -i traffic.txt -n 1024 --fan-in 64 --size 65536 \\
+        --rate 100 --jitter 5 -t 1 -o traffic_incast.txt
+
+    # Incast only: one event every 10ms, always to host 0
+    uv run traffic_gen/incast_traffic.py -n 128 --fan-in 127 --period 0.01 --receiver 0 -t 0.5 -o incast.txt
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from custom_rand import read_cdf
+from traffic_io import open_writer, write_merged
+
+INCAST_DPORT = 200
+BASE_T = 2000000000  # ns
+BATCH_ENTRIES = 1 << 22  # events x hosts in one sender-selection batch
+
+
+def event_times(rng, time, period=None, rate=None, start=BASE_T):
+    """Event times (ns) in [start, start + time): every period ns, or Poisson with rate events/ns."""
+    if period is not None:
+        return start + np.arange(0, time, period).astype(np.int64)
+    gaps = []
+    total = 0.0
+    while total < time:
+        expected = (time - total) * rate
+        block = rng.exponential(1 / rate, int(expected + 4 * np.sqrt(expected) + 16))
+        gaps.append(block)
+        total += block.sum()
+    t = np.cumsum(np.concatenate(gaps))
+    return start + t[t < time].astype(np.int64)
+
+
+def pick_senders(rng, receivers, nhost, fan_in):
+    """fan_in distinct senders per event, none equal to the event's receiver; shape (events, fan_in)."""
+    senders = np.empty((len(receivers), fan_in), dtype=np.int64)
+    step = max(1, BATCH_ENTRIES // nhost)
+    for a in range(0, len(receivers), step):
+        r = receivers[a:a + step, None]
+        if fan_in == nhost - 1:
+            idx = np.broadcast_to(np.arange(nhost - 1), (len(r), nhost - 1))
+        else:
+            idx = np.argpartition(rng.random((len(r), nhost - 1)), fan_in, axis=1)[:, :fan_in]
+        senders[a:a + step] = idx + (idx >= r)
+    return senders
+
+
+def incast_flows(rng, nhost, times, fan_in, jitter, receiver=None, customRand=None, size=None, pg=2):
+    """Flows of all events, sorted by (start, src): (src, dst, pg, dport, size, t_ns)."""
+    n_events = len(times)
+    if receiver is None:
+        receivers = rng.integers(0, nhost, n_events)
+    else:
+        receivers = np.full(n_events, receiver, dtype=np.int64)
+    src = pick_senders(rng, receivers, nhost, fan_in).ravel()
+    dst = np.repeat(receivers, fan_in)
+    t = np.repeat(times, fan_in)
+    if jitter > 0:
+        t = t + rng.integers(0, jitter, len(t))
+    if customRand is not None:
+        sizes = customRand.sample(len(t), rng).astype(np.int64)
+        sizes[sizes <= 0] = 1
+    else:
+        sizes = np.full(len(t), size, dtype=np.int64)
+    order = np.lexsort((src, t))
+    n = len(t)
+    return (src[order], dst[order], np.full(n, pg, dtype=np.int64), np.full(n, INCAST_DPORT, dtype=np.int64),
+            sizes[order], t[order])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate incast (N senders -> 1 receiver) traffic with dport 200')
+    parser.add_argument('-i', '--input', default=None, help='Background traffic file to merge with (optional)')
+    parser.add_argument('-o', '--output', required=True, help='Output traffic file')
+    parser.add_argument('-n', '--nhost', type=int, required=True, help='Number of hosts')
+    parser.add_argument('--fan-in', type=int, required=True, help='Senders per incast event')
+    parser.add_argument('--size', type=int, default=65536, help='Response size in bytes (default: 65536)')
+    parser.add_argument('-c', '--cdf', default=None, help='Draw response sizes from this CDF instead of --size')
+    events = parser.add_mutually_exclusive_group(required=True)
+    events.add_argument('--period', type=float, help='One event every PERIOD seconds')
+    events.add_argument('--rate', type=float, help='Poisson events, RATE per second')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Sender start jitter, uniform in [0, JITTER) microseconds (default: 0)')
+    parser.add_argument('--receiver', type=int, default=None, help='Fixed receiver (default: random per event)')
+    parser.add_argument('-t', '--time', type=float, default=1.0, help='Duration in seconds (default: 1.0)')
+    parser.add_argument('--start', type=float, default=BASE_T * 1e-9,
+                        help='Time of the first possible event in seconds (default: 2.0)')
+    parser.add_argument('-p', '--pg', type=int, default=2, help='Priority of incast flows (default: 2)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible run')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Background flows merged per chunk')
+    args = parser.parse_args()
+
+    if not 0 < args.fan_in < args.nhost:
+        print("Error: --fan-in must be between 1 and nhost - 1")
+        sys.exit(1)
+    if args.receiver is not None and not 0 <= args.receiver < args.nhost:
+        print("Error: --receiver must be a host id")
+        sys.exit(1)
+    customRand = None
+    if args.cdf:
+        customRand = read_cdf(args.cdf)
+        if customRand is None:
+            print("Error: Not valid cdf")
+            sys.exit(1)
+
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    if args.seed is None:
+        print(f"Seed: {seed}")
+    rng = np.random.default_rng(seed)
+
+    start = int(round(args.start * 1e9))
+    time = args.time * 1e9
+    if args.period is not None:
+        times = event_times(rng, time, period=args.period * 1e9, start=start)
+    else:
+        times = event_times(rng, time, rate=args.rate * 1e-9, start=start)
+    flows = incast_flows(rng, args.nhost, times, args.fan_in, int(args.jitter * 1e3), args.receiver,
+                         customRand, args.size, args.pg)
+    n_incast = len(flows[0])
+
+    with open_writer(args.output) as writer:
+        if args.input:
+            write_merged(writer, args.input, flows, args.chunksize)
+        else:
+            writer.write(*flows)
+
+    print(f"Incast events: {len(times)} (fan-in {args.fan_in}), incast flows: {n_incast}")
+    if args.input:
+        print(f"Background flows: {writer.count - n_incast}")
+    print(f"Total flows: {writer.count}")
+    print(f"Output written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Time-varying load schedules, applied by thinning (Lewis-Shedler).
+
+A schedule gives the load as a piecewise-linear function of the time
+since the start of the run:
+
+  "0:0.1,0.5:0.6,1:0.1"   inline TIME:LOAD points (seconds, load 0..1)
+  schedule.csv             a file of "time,load" lines (a header line and
+                           # comments are skipped)
+
+Before the first point and after the last one the load stays at the
+first / last value; equal times give a step change.
+
+Arrivals are generated at the peak load of the schedule and every arrival
+at time t is kept with probability load(t) / peak, which leaves an
+(inhomogeneous) process with rate load(t) in place of a constant load.
+The acceptance test is one np.interp and one comparison per batch of
+arrivals.
+"""
+
+import os
+
+import numpy as np
+
+
+class LoadSchedule:
+    def __init__(self, times, loads, base_t=0):
+        self.times = np.asarray(times, dtype=np.float64) * 1e9 + base_t  # ns
+        self.loads = np.asarray(loads, dtype=np.float64)
+        if len(self.times) == 0 or len(self.times) != len(self.loads):
+            raise ValueError("a load schedule needs at least one TIME:LOAD point")
+        if (np.diff(self.times) < 0).any():
+            raise ValueError("load schedule times must not decrease")
+        if (self.loads < 0).any() or self.loads.max() <= 0:
+            raise ValueError("load schedule loads must be non-negative and not all zero")
+        self.peak = float(self.loads.max())
+
+    def load(self, t):
+        """Load at absolute times t (ns)."""
+        return np.interp(t, self.times, self.loads)
+
+    def accept(self, t, u):
+        """Thinning mask for arrivals at t (ns) generated at peak load, with uniforms u."""
+        return u * self.peak < self.load(t)
+
+    def mean(self, t_start, t_end):
+        """Average load over [t_start, t_end] (ns)."""
+        t = np.unique(np.concatenate([[t_start, t_end], self.times[(self.times > t_start) & (self.times < t_end)]]))
+        if len(t) < 2:
+            return float(self.load(t_start))
+        y = self.load(t)
+        return float(((y[1:] + y[:-1]) / 2 * np.diff(t)).sum() / (t_end - t_start))
+
+
+def parse(spec, base_t=0):
+    """Schedule from a "TIME:LOAD,..." string or a CSV file of time,load lines."""
+    if os.path.exists(spec):
+        points = []
+        with open(spec) as f:
+            for line in f:
+                line = line.split('#')[0].strip()
+                if not line:
+                    continue
+                try:
+                    t, load = (float(x) for x in line.replace(',', ' ').split()[:2])
+                except ValueError:
+                    if points:
+                        raise ValueError(f"bad load schedule line '{line}' in {spec}")
+                    continue  # header
+                points.append((t, load))
+    else:
+        try:
+            points = [tuple(float(x) for x in p.split(':')) for p in spec.split(',') if p.strip()]
+        except ValueError:
+            points = None
+        if not points or any(len(p) != 2 for p in points):
+            raise ValueError(f"bad load schedule '{spec}' (expected TIME:LOAD,... or a CSV file)")
+    return LoadSchedule([p[0] for p in points], [p[1] for p in points], base_t)
+
+
+def thinned_arrivals(rng, arrivals, t0, t_end, schedule, block=4096):
+    """
+    Yield, block by block, the kept arrival times (int ns, in (t0, t_end])
+    of one stream whose gaps come from arrivals (a process of arrivals.py
+    calibrated to the schedule's peak load).
+    """
+    state = arrivals.init_state(rng)
+    t = t0
+    while t <= t_end:
+        gaps, states = arrivals.gaps(rng, block, state)
+        if states is not None:
+            state = states[-1]
+        times = t + np.cumsum(gaps.astype(np.int64))
+        t = int(times[-1])
+        times = times[times <= t_end]
+        yield times[schedule.accept(times, rng.random(len(times)))]
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Build a traffic scenario in a single pass from a TOML scenario file.
+
+Instead of running traffic_gen.py, add_small_traffic.py,
+add_cncp_traffic.py and shift_pg_2_to_3.py one after another (each
+writing and re-reading a full traffic file), every step is a lazy stage
+over time-ordered flows:
+
+  [[source]]   flow generators / existing traffic files; merged by start time
+  [[overlay]]  extra traffic merged into the sources by start time
+  [[rewrite]]  applied inline, in file order, to every merged flow
+
+Sources and overlays are combined with one heap merge (earlier entries
+first on equal start times), so only the pending flow of each stage is in
+memory and no intermediate file is written. The output has the usual
+traffic file format with the flow count filled in at the end.
+
+Stage types:
+
+  source  "generate"  per-node Poisson model of traffic_gen.py (vector engine)
+                      nhost, cdf, load (0.3), bandwidth ("10G"), time, chunk,
+                      pg (2), seed (derived from the scenario seed)
+  source  "file"      existing traffic file: path
+  overlay "small"     fixed-size flows of add_small_traffic.py
+                      nhost, load (0.1), bandwidth ("10G"), size (20000),
+                      priority (2), start (base time), time
+  overlay "cncp"      DC-CNCP flows of add_cncp_traffic.py
+                      src, dst (or mode = "shared": sender and receiver of
+                      the first source flow), cdf, load (0.5),
+                      bandwidth ("10G"), time, start_offset (0.0)
+  rewrite "pg"        set pg to `to` for flows with pg == `from`, optionally
+                      only if min_size <= size (< max_size)
+
+"generate" and "small" also take one of tm (matrix file), zipf (alpha)
+or hotspot ("K,FRAC") for destinations drawn from a traffic matrix, or a
+topology (fat_tree = k, hosts_per_tor [+ tors_per_pod] or host_map) with
+locality ("RACK,POD,CROSS") for rack/pod-local destinations.
+"generate", "small" and "cncp" take arrival (an arrivals.py spec such as
+"onoff:100,900" or "mmpp:10,200,800") for bursty arrivals at the same
+mean load. "generate" and "cncp" take load_schedule ("TIME:LOAD,..." in
+seconds since the start, or a CSV file) in place of load.
+
+Top-level keys: output, time (s, default 10, used by stages without
+their own time), seed (one seed for the whole scenario; drawn and
+printed if missing). Relative paths are resolved against the working
+directory, the scenario file, then this directory (for dist_cdf/...).
+
+Example:
+
+    output = "web_0.3_cncp.txt"
+    time = 1
+    seed = 42
+
+    [[source]]
+    type = "generate"
+    nhost = 10
+    cdf = "dist_cdf/WebSearch_distribution.txt"
+    load = 0.3
+    bandwidth = "10G"
+
+    [[overlay]]
+    type = "small"
+    nhost = 10
+    load = 0.05
+
+    [[overlay]]
+    type = "cncp"
+    mode = "shared"
+    cdf = "dist_cdf/WebSearch_distribution.txt"
+    load = 0.5
+
+    [[rewrite]]
+    type = "pg"
+    from = 2
+    to = 3
+    min_size = 1000000
+
+Usage:
+    uv run traffic_gen/pipeline.py scenario.toml [-o output.txt]
+"""
+
+import argparse
+import heapq
+import random
+import sys
+import tomllib
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+from add_cncp_traffic import Flow, FlowStats, iter_background_traffic, iter_cncp_traffic, write_traffic_file
+from add_small_traffic import iter_small_traffic
+import arrivals
+from custom_rand import read_cdf
+import load_schedule
+from traffic_gen import translate_bandwidth
+import topology
+import traffic_matrix
+from vector_gen import BASE_T, FlowModel, generate_chunks
+
+SCRIPT_DIR = Path(__file__).parent
+
+
+class ScenarioError(Exception):
+    pass
+
+
+def resolve_path(path, scenario_dir):
+    """Resolve a scenario path against the working directory, the scenario file, then this directory."""
+    for base in (Path.cwd(), scenario_dir, SCRIPT_DIR):
+        candidate = base / path
+        if candidate.exists():
+            return str(candidate)
+    raise ScenarioError(f"file not found: {path}")
+
+
+def bandwidth_of(stage, default):
+    bandwidth = translate_bandwidth(str(stage.get('bandwidth', default)))
+    if bandwidth is None:
+        raise ScenarioError(f"bandwidth format incorrect: {stage.get('bandwidth')}")
+    return bandwidth
+
+
+def dst_sampler_of(stage, nhost, ctx):
+    tm = resolve_path(stage['tm'], ctx['dir']) if 'tm' in stage else None
+    host_map = resolve_path(stage['host_map'], ctx['dir']) if 'host_map' in stage else None
+    try:
+        matrix = traffic_matrix.sampler_from_options(nhost, tm, stage.get('zipf'), stage.get('hotspot'))
+        locality, _ = topology.sampler_from_options(nhost, stage.get('fat_tree'), stage.get('hosts_per_tor'),
+                                                    stage.get('tors_per_pod'), host_map, stage.get('locality'))
+    except ValueError as e:
+        raise ScenarioError(str(e))
+    if matrix is not None and locality is not None:
+        raise ScenarioError("a traffic matrix cannot be combined with a locality topology")
+    return matrix or locality
+
+
+def arrival_of(stage, avg_inter_arrival):
+    try:
+        return arrivals.from_spec(stage.get('arrival'), avg_inter_arrival)
+    except ValueError as e:
+        raise ScenarioError(str(e))
+
+
+def schedule_of(stage, ctx):
+    spec = stage.get('load_schedule')
+    if spec is None:
+        return None
+    try:
+        spec = resolve_path(spec, ctx['dir'])
+    except ScenarioError:
+        pass  # inline TIME:LOAD points
+    try:
+        return load_schedule.parse(spec, BASE_T)
+    except ValueError as e:
+        raise ScenarioError(str(e))
+
+
+def generate_source(stage, ctx):
+    """Per-node Poisson flows of traffic_gen.py, produced window by window."""
+    cdf = resolve_path(stage['cdf'], ctx['dir'])
+    customRand = read_cdf(cdf)
+    if customRand is None:
+        raise ScenarioError(f"not a valid cdf: {cdf}")
+    bandwidth = bandwidth_of(stage, '10G')
+    schedule = schedule_of(stage, ctx)
+    load = schedule.peak if schedule is not None else float(stage.get('load', 0.3))
+    time = float(stage.get('time', ctx['time'])) * 1e9
+    chunk = float(stage['chunk']) * 1e9 if 'chunk' in stage else time
+    avg_inter_arrival = 1 / (bandwidth * load / 8. / customRand.getAvg()) * 1000000000
+    nhost = int(stage['nhost'])
+    model = FlowModel(nhost, customRand, avg_inter_arrival, dst_sampler_of(stage, nhost, ctx),
+                      arrival_of(stage, avg_inter_arrival), schedule)
+    pg = int(stage.get('pg', 2))
+    # Several generate sources in one scenario must not share random streams
+    seed = stage.get('seed', [ctx['seed'], ctx['n_generate']])
+    ctx['n_generate'] += 1
+    for src, dst, size, t in generate_chunks(model, time, chunk, seed, 1, BASE_T):
+        for s, d, z, ti in zip(src.tolist(), dst.tolist(), size.tolist(), t.tolist()):
+            yield Flow(s, d, pg, 100, z, ti * 1e-9)
+
+
+def file_source(stage, ctx):
+    return iter_background_traffic(resolve_path(stage['path'], ctx['dir']))
+
+
+def small_overlay(stage, ctx):
+    start = float(stage.get('start', BASE_T * 1e-9))
+    time = float(stage.get('time', ctx['time']))
+    nhost = int(stage['nhost'])
+    arrival_of(stage, 1.0)  # check the spec before generating lazily
+    flows = iter_small_traffic(nhost, float(stage.get('load', 0.1)), bandwidth_of(stage, '10G'),
+                               int(stage.get('size', 20000)), int(stage.get('priority', 2)), start, start + time,
+                               dst_sampler_of(stage, nhost, ctx), stage.get('arrival'))
+    return (Flow(*f) for f in flows)
+
+
+def cncp_overlay(stage, ctx):
+    if stage.get('mode', 'independent') == 'shared':
+        first = ctx['first']
+        src, dst = (first.src, first.dst) if first is not None else (0, 2)
+    else:
+        src, dst = int(stage.get('src', 1)), int(stage.get('dst', 3))
+    arrival_of(stage, 1.0)
+    return iter_cncp_traffic(0, float(stage.get('load', 0.5)), bandwidth_of(stage, '10G'),
+                             float(stage.get('time', ctx['time'])), resolve_path(stage['cdf'], ctx['dir']),
+                             src, dst, float(stage.get('start_offset', 0.0)), arrival=stage.get('arrival'),
+                             schedule=schedule_of(stage, ctx))
+
+
+def pg_rewrite(stage):
+    pg_from, pg_to = int(stage['from']), int(stage['to'])
+    min_size = stage.get('min_size')
+    max_size = stage.get('max_size')
+
+    def rewrite(flows):
+        for flow in flows:
+            if flow.pg == pg_from and (min_size is None or flow.size >= min_size) \
+                    and (max_size is None or flow.size < max_size):
+                flow.pg = pg_to
+            yield flow
+    return rewrite
+
+
+SOURCES = {'generate': generate_source, 'file': file_source}
+OVERLAYS = {'small': small_overlay, 'cncp': cncp_overlay}
+REWRITES = {'pg': pg_rewrite}
+
+
+def lookup(table, stage, kind):
+    try:
+        return table[stage['type']]
+    except KeyError:
+        raise ScenarioError(f"unknown {kind} type: {stage.get('type')!r} (expected one of {', '.join(table)})")
+
+
+def merge_by_time(streams):
+    """Merge time-ordered flow streams; on equal start times earlier streams come first."""
+    return heapq.merge(*streams, key=lambda f: f.t)
+
+
+def build_pipeline(scenario, scenario_dir, seed):
+    """Return the lazy stream of output flows of a parsed scenario."""
+    if not scenario.get('source'):
+        raise ScenarioError("a scenario needs at least one [[source]]")
+    ctx = {'dir': scenario_dir, 'time': float(scenario.get('time', 10)), 'seed': seed, 'n_generate': 0, 'first': None}
+
+    flows = merge_by_time([lookup(SOURCES, s, 'source')(s, ctx) for s in scenario['source']])
+    # Peek the first source flow for overlays that follow the background sender
+    first = next(flows, None)
+    ctx['first'] = first
+    flows = chain([first] if first is not None else [], flows)
+
+    overlays = [lookup(OVERLAYS, s, 'overlay')(s, ctx) for s in scenario.get('overlay', [])]
+    if overlays:
+        flows = merge_by_time([flows] + overlays)
+
+    for stage in scenario.get('rewrite', []):
+        flows = lookup(REWRITES, stage, 'rewrite')(stage)(flows)
+    return flows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a traffic scenario in one pass from a TOML scenario file')
+    parser.add_argument('scenario', help='Scenario file (.toml)')
+    parser.add_argument('-o', '--output', default=None, help='Output traffic file (overrides output in the scenario)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed (overrides seed in the scenario)')
+    args = parser.parse_args()
+
+    scenario_path = Path(args.scenario)
+    with open(scenario_path, 'rb') as f:
+        scenario = tomllib.load(f)
+
+    output = args.output or scenario.get('output')
+    if not output:
+        print("Error: no output file (use -o or set output in the scenario)")
+        sys.exit(1)
+    seed = args.seed if args.seed is not None else scenario.get('seed')
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        print(f"Seed: {seed}")
+    random.seed(seed)
+
+    try:
+        flows = build_pipeline(scenario, scenario_path.parent, seed)
+        stats = FlowStats()
+        write_traffic_file(tqdm(flows, desc="Building scenario"), output, stats)
+    except ScenarioError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Flows: {stats.count}")
+    print(f"Output written to: {output}")
+    if stats.count > 0:
+        print(f"  Time range: {stats.first_t:.6f}s - {stats.last_t:.6f}s")
+
+
+if __name__ == "__main__":
+    main()
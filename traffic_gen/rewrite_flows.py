@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Rewrite flow fields of a traffic file with declarative rules.
+
+A rule is a predicate over the flow columns and a set of field
+assignments applied to the flows it matches:
+
+    src dst pg dport size t      (t: start time in seconds)
+
+Predicates use pandas.eval syntax ("pg == 2 and size >= 1e6",
+"src in [0, 1, 2]", "t >= 2.1 and t < 2.2"). An assigned value is either
+a number or an expression over the same columns ("dport + 1"). Rules are
+applied in order and each rule sees the result of the previous ones, so a
+list of rules does what running the matching sequence of shift scripts
+would do, in one pass. Every predicate and expression is first evaluated
+on an empty chunk, so a typo is reported before the output is opened.
+
+The file is processed in chunks of lines: every rule is one vectorized
+mask over the parsed chunk, lines whose fields did not change are copied
+through as they are, and only the modified rows are formatted again (one
+bulk format per chunk). Start times are always copied through as text.
+
+Rules come from a TOML file:
+
+    [[rule]]
+    when = "pg == 2 and size >= 1000000"
+    set = { pg = 3 }
+
+    [[rule]]
+    when = "src in [0, 1] and t < 2.5"
+    set = { dport = 200 }
+
+or from the command line as "PREDICATE -> field=value, ...":
+
+    --rule "pg == 2 -> pg=3"        (shift_pg_2_to_3.py)
+    --rule "pg == 3 -> pg=2"        (shift_pg_3_to_2.py)
+
+Usage:
+    uv run traffic_gen/rewrite_flows.py -i traffic.txt -o out.txt -r rules.toml
+    uv run traffic_gen/rewrite_flows.py -i traffic.txt -o out.txt --rule "pg == 2 and size >= 1e6 -> pg=3"
+"""
+
+import argparse
+import sys
+import tomllib
+from io import StringIO
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+COLUMNS = ['src', 'dst', 'pg', 'dport', 'size', 't']
+INT_FIELDS = ['src', 'dst', 'pg', 'dport', 'size']
+LINE_FORMAT = "%d %d %d %d %d %s"  # %s: the original start time text, with its newline
+
+
+class Rule:
+    def __init__(self, when, assign):
+        self.when = when
+        self.assign = assign
+        for field in assign:
+            if field not in INT_FIELDS:
+                raise ValueError(f"cannot assign '{field}' (assignable fields: {', '.join(INT_FIELDS)})")
+        self.matched = 0
+
+    def __str__(self):
+        return f"{self.when} -> " + ", ".join(f"{k}={v}" for k, v in self.assign.items())
+
+    def check(self):
+        """Evaluate the predicate and expressions on an empty chunk, so that typos fail before any output."""
+        df = pd.DataFrame({c: np.zeros(0, dtype=np.int64 if c in INT_FIELDS else np.float64) for c in COLUMNS})
+        for expr in [self.when] + [v for v in self.assign.values() if isinstance(v, str)]:
+            try:
+                df.eval(expr)
+            except Exception as e:
+                raise ValueError(f"rule '{self}': cannot evaluate '{expr}': {e}") from e
+
+    def apply(self, df):
+        mask = df.eval(self.when)
+        mask = np.broadcast_to(np.asarray(mask, dtype=bool), len(df))
+        n = int(mask.sum())
+        self.matched += n
+        if n == 0:
+            return
+        # Evaluate all values before assigning, so "src=dst, dst=src" swaps
+        values = {}
+        for field, value in self.assign.items():
+            if isinstance(value, str):
+                value = np.broadcast_to(np.asarray(df.eval(value)), len(df))[mask]
+            values[field] = value
+        for field, value in values.items():
+            df.loc[mask, field] = value
+
+
+def parse_rule(text):
+    """Parse "PREDICATE -> field=value, ..." from the command line."""
+    if '->' not in text:
+        raise ValueError(f"rule '{text}' is not of the form 'PREDICATE -> field=value, ...'")
+    when, assigns = text.rsplit('->', 1)
+    assign = {}
+    for item in assigns.split(','):
+        field, _, value = item.partition('=')
+        if not value.strip():
+            raise ValueError(f"bad assignment '{item.strip()}' in rule '{text}'")
+        value = value.strip()
+        try:
+            value = int(value)
+        except ValueError:
+            pass
+        assign[field.strip()] = value
+    return Rule(when.strip(), assign)
+
+
+def load_rules(path):
+    with open(path, 'rb') as f:
+        rules = tomllib.load(f).get('rule', [])
+    return [Rule(r.get('when', 'True'), r['set']) for r in rules]
+
+
+def rewrite_lines(lines, rules):
+    """Apply rules to a list of flow lines in place."""
+    df = pd.read_csv(StringIO(''.join(lines)), sep=' ', header=None, names=COLUMNS, usecols=range(6))
+    before = df[INT_FIELDS].to_numpy(np.int64)
+    for rule in rules:
+        rule.apply(df)
+    after = df[INT_FIELDS].to_numpy(np.int64)
+    changed = np.flatnonzero((after != before).any(axis=1))
+    if len(changed) == 0:
+        return
+    block = np.empty((len(changed), 6), dtype=object)
+    block[:, :5] = after[changed]
+    block[:, 5] = [lines[i][lines[i].rstrip().rfind(' ') + 1:] for i in changed]
+    formatted = (LINE_FORMAT * len(changed)) % tuple(block.ravel().tolist())
+    for i, line in zip(changed, formatted.splitlines(keepends=True)):
+        lines[i] = line
+
+
+def rewrite_file(input_path, output_path, rules, chunksize=1_000_000):
+    """Apply rules to every flow of input_path; returns the number of flows."""
+    n = 0
+    with open(input_path, 'r') as inf, open(output_path, 'w') as outf:
+        header = inf.readline()
+        outf.write(header)
+        with tqdm(total=int(header.split()[0]), desc="Rewriting flows") as pbar:
+            while True:
+                lines = [line for line in islice(inf, chunksize) if line.strip()]
+                if not lines:
+                    break
+                if not lines[-1].endswith('\n'):
+                    lines[-1] += '\n'
+                rewrite_lines(lines, rules)
+                outf.writelines(lines)
+                n += len(lines)
+                pbar.update(len(lines))
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rewrite flow fields of a traffic file with declarative rules')
+    parser.add_argument('-i', '--input', required=True, help='Input traffic file path')
+    parser.add_argument('-o', '--output', required=True, help='Output traffic file path')
+    parser.add_argument('-r', '--rules', default=None, help='TOML file with [[rule]] entries')
+    parser.add_argument('--rule', action='append', default=[],
+                        help='Rule "PREDICATE -> field=value, ..." (repeatable, applied after --rules)')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Flows processed per chunk')
+    args = parser.parse_args()
+
+    try:
+        rules = load_rules(args.rules) if args.rules else []
+        rules += [parse_rule(r) for r in args.rule]
+        for rule in rules:
+            rule.check()
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not rules:
+        print("Error: no rules given (use -r and/or --rule)")
+        sys.exit(1)
+
+    n = rewrite_file(args.input, args.output, rules, args.chunksize)
+    print(f"Processed {n} flows")
+    for rule in rules:
+        print(f"  {rule}: {rule.matched} flows")
+    print(f"Output written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Scale a traffic file down to a smoke-test scenario.
+
+Three reductions, in any combination, applied while streaming the file
+in chunks (memory does not depend on the file size):
+
+  --hosts K      keep K hosts (the first K, or a random subset with
+                 --random-hosts, or the ids in --host-list) and renumber
+                 them 0..K-1 in id order. A flow from a kept host to a
+                 dropped one is redirected to a uniformly chosen other kept
+                 host (--outside redirect, the default, so every kept
+                 host's offered load is unchanged), or dropped (--outside
+                 drop); flows from dropped hosts are always dropped.
+  --start/--duration
+                 keep flows starting in [START, START + DURATION) seconds
+                 and shift them so that START becomes --base (2.0 s, the
+                 generators' base time). Reading stops at the end of the
+                 window, since traffic files are sorted by start time.
+  --keep P       keep every flow with probability P. Per-host load scales
+                 by P, which matches the original load on links of
+                 bandwidth * P.
+
+The report gives the input and output flow counts, per-host load of the
+output (with -b and the output duration), and the size fidelity: the
+two-sample KS distance between the output and input flow sizes (of the
+flows in the window), and with -c the KS distance of both to the CDF.
+
+Usage:
+    # 16 of the hosts, 50 ms starting at 2.5 s, half of the flows
+    uv run traffic_gen/subsample_traffic.py -i traffic.txt -o smoke.txt --hosts 16 --random-hosts \\
+        --start 2.5 --duration 0.05 --keep 0.5 -b 100G --seed 1
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from custom_rand import read_cdf
+from traffic_gen import translate_bandwidth
+from traffic_io import open_writer, read_flow_chunks
+from validate_traffic import Validator, spread, fmt
+
+
+def ks_two_sample(a, b):
+    """KS distance between the size distributions accumulated by two Validators."""
+    if a.count == 0 or b.count == 0:
+        return None
+    grid = np.union1d(a.sizes, b.sizes)
+
+    def ecdf(v):
+        c = np.concatenate([[0], np.cumsum(v.size_counts)]) / v.count
+        return c[np.searchsorted(v.sizes, grid, side='right')]
+    return float(np.abs(ecdf(a) - ecdf(b)).max())
+
+
+def select_hosts(nhost, k=None, random_hosts=False, host_list=None, rng=None):
+    """Sorted ids of the hosts to keep."""
+    if host_list is not None:
+        hosts = np.unique(np.asarray(host_list, dtype=np.int64))
+    elif random_hosts:
+        hosts = np.sort(rng.choice(nhost, k, replace=False))
+    else:
+        hosts = np.arange(k)
+    if len(hosts) < 2 or hosts[0] < 0 or hosts[-1] >= nhost:
+        raise ValueError(f"need at least 2 host ids in 0..{nhost - 1}")
+    return hosts
+
+
+class Subsampler:
+    def __init__(self, hosts=None, nhost=None, outside='redirect', t_start=None, t_end=None, base=None,
+                 keep=1.0, rng=None):
+        self.keep = keep
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.t_start, self.t_end, self.base = t_start, t_end, base
+        self.outside = outside
+        self.new_id = None
+        if hosts is not None:
+            self.new_id = np.full(nhost, -1, dtype=np.int64)
+            self.new_id[hosts] = np.arange(len(hosts))
+            self.k = len(hosts)
+        self.done = False
+
+    def in_window(self, t):
+        mask = np.ones(len(t), dtype=bool)
+        if self.t_start is not None:
+            mask &= t >= self.t_start
+        if self.t_end is not None:
+            mask &= t < self.t_end
+        return mask
+
+    def renumber(self, ids):
+        """New ids of hosts, -1 for dropped hosts (including ids past the largest kept one)."""
+        n = len(self.new_id)
+        return np.where(ids < n, self.new_id[np.minimum(ids, n - 1)], -1)
+
+    def apply(self, src, dst, pg, dport, size, t):
+        """Reduced flows of a chunk; sets done once the time window is passed."""
+        if self.t_end is not None:
+            self.done = len(t) > 0 and t[-1] >= self.t_end
+        mask = self.in_window(t)
+        flows = [c[mask] for c in (src, dst, pg, dport, size, t)]
+        if self.new_id is not None:
+            s, d = self.renumber(flows[0]), self.renumber(flows[1])
+            if self.outside == 'redirect':
+                # Another kept host, uniformly: shift the source by 1..k-1
+                out = (s >= 0) & (d < 0)
+                d[out] = (s[out] + self.rng.integers(1, self.k, int(out.sum()))) % self.k
+            keep = (s >= 0) & (d >= 0)
+            flows = [s[keep], d[keep]] + [c[keep] for c in flows[2:]]
+        if self.keep < 1:
+            keep = self.rng.random(len(flows[0])) < self.keep
+            flows = [c[keep] for c in flows]
+        if self.base is not None and self.t_start is not None:
+            flows[5] = flows[5] - self.t_start + self.base
+        return flows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scale a traffic file down: host subset, time window, thinning')
+    parser.add_argument('-i', '--input', required=True, help='Input traffic file')
+    parser.add_argument('-o', '--output', required=True, help='Output traffic file')
+    parser.add_argument('-n', '--nhost', type=int, default=None,
+                        help='Hosts in the input (needed with --random-hosts; default: largest id + 1 of --host-list/--hosts)')
+    parser.add_argument('--hosts', type=int, default=None, help='Number of hosts to keep')
+    parser.add_argument('--random-hosts', action='store_true', help='Keep a random subset instead of the first hosts')
+    parser.add_argument('--host-list', default=None, help='Comma-separated host ids to keep')
+    parser.add_argument('--outside', choices=['redirect', 'drop'], default='redirect',
+                        help='Flows from a kept host to a dropped one (default: redirect to another kept host)')
+    parser.add_argument('--start', type=float, default=None, help='Window start (s)')
+    parser.add_argument('--duration', type=float, default=None, help='Window length (s)')
+    parser.add_argument('--base', type=float, default=2.0, help='Start time of the window in the output (default: 2.0)')
+    parser.add_argument('--keep', type=float, default=1.0, help='Probability of keeping each flow (default: 1)')
+    parser.add_argument('-b', '--bandwidth', default=None, help='Host link bandwidth for the load report (G/M/K)')
+    parser.add_argument('-c', '--cdf', default=None, help='CDF for the size fidelity report')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Flows per chunk')
+    args = parser.parse_args()
+
+    if not 0 < args.keep <= 1:
+        print("Error: --keep must be in (0, 1]")
+        sys.exit(1)
+    if args.duration is not None and args.start is None:
+        print("Error: --duration needs --start")
+        sys.exit(1)
+    bandwidth = None
+    if args.bandwidth:
+        bandwidth = translate_bandwidth(args.bandwidth)
+        if bandwidth is None:
+            print("Error: bandwidth format incorrect")
+            sys.exit(1)
+    customRand = None
+    if args.cdf:
+        customRand = read_cdf(args.cdf)
+        if customRand is None:
+            print("Error: Not valid cdf")
+            sys.exit(1)
+
+    rng = np.random.default_rng(args.seed)
+    hosts, nhost = None, args.nhost
+    if args.hosts is not None or args.host_list is not None:
+        host_list = [int(x) for x in args.host_list.split(',')] if args.host_list else None
+        if nhost is None:
+            if args.random_hosts:
+                print("Error: --random-hosts needs -n")
+                sys.exit(1)
+            nhost = max(host_list) + 1 if host_list else args.hosts
+        try:
+            hosts = select_hosts(nhost, args.hosts, args.random_hosts, host_list, rng)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    t_start = int(round(args.start * 1e9)) if args.start is not None else None
+    t_end = t_start + int(round(args.duration * 1e9)) if args.duration is not None else None
+    sub = Subsampler(hosts, nhost, args.outside, t_start, t_end, int(round(args.base * 1e9)), args.keep, rng)
+
+    before = Validator()
+    after = Validator(len(hosts) if hosts is not None else None, start=args.base if t_start is not None else 0)
+    with open_writer(args.output) as writer:
+        for chunk in read_flow_chunks(args.input, args.chunksize):
+            before.add(*[c[sub.in_window(chunk[5])] for c in chunk])
+            flows = sub.apply(*chunk)
+            after.add(*flows)
+            writer.write(*flows)
+            if sub.done:
+                break
+
+    print(f"Input flows in window: {before.count}")
+    print(f"Output flows: {writer.count}")
+    if hosts is not None:
+        shown = ', '.join(map(str, hosts[:16])) + (' ...' if len(hosts) > 16 else '')
+        print(f"Hosts: {len(hosts)} kept ({shown})")
+    if after.count and bandwidth:
+        if t_end is not None:
+            duration = t_end - t_start
+        else:
+            duration = max(after.last_t - (after.start if t_start is not None else after.first_t), 1)
+        load = after.host_bytes * 8 / (bandwidth * duration * 1e-9)
+        print(f"Output load per host over {duration * 1e-9:.6f}s at {args.bandwidth}: {fmt(spread(load))}")
+        if args.keep < 1:
+            print(f"  (thinned by {args.keep}: the original load corresponds to links of {bandwidth * args.keep:.4g} bps)")
+    ks = ks_two_sample(before, after)
+    if ks is not None:
+        print(f"Sizes: mean {before.mean_size():.1f}B -> {after.mean_size():.1f}B, KS distance to input {ks:.5f}")
+        if customRand is not None:
+            print(f"  KS distance to {args.cdf}: input {before.ks_distance(customRand):.5f}, "
+                  f"output {after.ks_distance(customRand):.5f}")
+    print(f"Output written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
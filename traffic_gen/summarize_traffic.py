@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Summarize a traffic file, caching the summary next to it.
+
+One pass over the file (text or binary, read in chunks of columns)
+collects the flow count, time span, flows and bytes per pg, the flow
+count of every src/dst pair, size percentiles and the offered bytes per
+time bucket (--bucket seconds, counted from the first flow's bucket).
+Distinct sizes and pairs are merged chunk by chunk with np.unique, as in
+validate_traffic.py, so nothing is kept per flow.
+
+The summary is stored in a sidecar file <file>.summary.json together
+with the file's fingerprint (size, modification time and a hash of its
+first and last MiB) and the bucket width. A later query with the same
+fingerprint and bucket width returns the stored summary without reading
+the traffic file; any change to the file makes it stale. --refresh
+recomputes and --no-cache neither reads nor writes the sidecar.
+
+The report prints the totals, the --pairs busiest pairs (all pairs are
+kept in the sidecar up to MAX_PAIRS) and the load histogram, merged into
+at most --rows rows; with -n and -b the load is given as a fraction of
+the hosts' total bandwidth. --json prints the summary as JSON.
+
+Usage:
+    uv run traffic_gen/summarize_traffic.py -i traffic.txt -n 64 -b 100G
+    uv run traffic_gen/summarize_traffic.py -i traffic.bin --json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from traffic_gen import translate_bandwidth
+from traffic_io import is_binary, read_count, read_flow_chunks
+
+SUMMARY_SUFFIX = '.summary.json'
+SUMMARY_VERSION = 1
+FINGERPRINT_BYTES = 1 << 20
+MAX_PAIRS = 1 << 16
+PERCENTILES = [1, 10, 25, 50, 75, 90, 99, 99.9]
+
+
+def fingerprint(path):
+    """Size, mtime and a hash of the first and last MiB: cheap, and changes with any rewrite."""
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        h.update(f.read(FINGERPRINT_BYTES))
+        if st.st_size > FINGERPRINT_BYTES:
+            f.seek(max(st.st_size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            h.update(f.read())
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha1': h.hexdigest()}
+
+
+def merge_counts(keys, counts, new_keys, new_counts=None):
+    """Running (distinct keys, counts) merged with a chunk of keys (or of keys with counts)."""
+    if new_counts is None:
+        new_keys, new_counts = np.unique(new_keys, return_counts=True)
+    keys, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([counts, new_counts]).astype(np.float64))
+    return keys, counts.astype(np.int64)
+
+
+class Summary:
+    def __init__(self, bucket=0.001):
+        self.bucket = int(round(bucket * 1e9))
+        self.count = 0
+        self.bytes = 0
+        self.first_t = None
+        self.last_t = None
+        self.origin = None
+        self.bucket_bytes = np.zeros(0, dtype=np.int64)
+        self.bucket_flows = np.zeros(0, dtype=np.int64)
+        self.pgs = np.zeros(0, dtype=np.int64)
+        self.pg_flows = np.zeros(0, dtype=np.int64)
+        self.pg_bytes = np.zeros(0, dtype=np.int64)
+        self.pairs = np.zeros(0, dtype=np.int64)  # src << 32 | dst
+        self.pair_counts = np.zeros(0, dtype=np.int64)
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.size_counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, src, dst, pg, dport, size, t):
+        if len(t) == 0:
+            return
+        if self.count == 0:
+            self.first_t = int(t.min())
+            self.origin = self.first_t // self.bucket * self.bucket
+        self.first_t = min(self.first_t, int(t.min()))
+        self.last_t = max(self.last_t or 0, int(t.max()))
+        self.count += len(t)
+        self.bytes += int(size.sum())
+
+        b = np.maximum(t - self.origin, 0) // self.bucket
+        n_bucket = int(b.max()) + 1
+        if n_bucket > len(self.bucket_bytes):
+            pad = n_bucket - len(self.bucket_bytes)
+            self.bucket_bytes = np.pad(self.bucket_bytes, (0, pad))
+            self.bucket_flows = np.pad(self.bucket_flows, (0, pad))
+        self.bucket_bytes[:n_bucket] += np.bincount(b, weights=size, minlength=n_bucket).astype(np.int64)
+        self.bucket_flows[:n_bucket] += np.bincount(b, minlength=n_bucket)
+
+        pgs, inverse = np.unique(pg, return_inverse=True)
+        pg_bytes = np.bincount(inverse, weights=size).astype(np.int64)
+        _, self.pg_bytes = merge_counts(self.pgs, self.pg_bytes, pgs, pg_bytes)
+        self.pgs, self.pg_flows = merge_counts(self.pgs, self.pg_flows, pgs, np.bincount(inverse))
+        self.pairs, self.pair_counts = merge_counts(self.pairs, self.pair_counts, (src << 32) | dst)
+        self.sizes, self.size_counts = merge_counts(self.sizes, self.size_counts, size)
+
+    def percentiles(self):
+        """Nearest-rank size percentiles."""
+        cum = np.cumsum(self.size_counts)
+        ranks = np.ceil(np.array(PERCENTILES) / 100 * self.count).astype(np.int64)
+        idx = np.searchsorted(cum, np.maximum(ranks, 1))
+        return {str(p): int(self.sizes[i]) for p, i in zip(PERCENTILES, idx)}
+
+    def to_dict(self):
+        if self.count == 0:
+            return {'flows': 0, 'bytes': 0}
+        top = np.argsort(-self.pair_counts, kind='stable')[:MAX_PAIRS]
+        return {
+            'flows': self.count,
+            'bytes': self.bytes,
+            'first_t': self.first_t * 1e-9,
+            'last_t': self.last_t * 1e-9,
+            'pg': {str(p): {'flows': int(f), 'bytes': int(b)}
+                   for p, f, b in zip(self.pgs, self.pg_flows, self.pg_bytes)},
+            'n_pairs': len(self.pairs),
+            'pairs': [[int(k >> 32), int(k & 0xffffffff), int(c)]
+                      for k, c in zip(self.pairs[top], self.pair_counts[top])],
+            'size': {'min': int(self.sizes[0]), 'max': int(self.sizes[-1]), 'mean': self.bytes / self.count,
+                     'percentiles': self.percentiles()},
+            'load': {'origin': self.origin * 1e-9, 'bucket': self.bucket * 1e-9,
+                     'bytes': self.bucket_bytes.tolist(), 'flows': self.bucket_flows.tolist()},
+        }
+
+
+def sidecar_path(path):
+    return str(path) + SUMMARY_SUFFIX
+
+
+def summarize(path, bucket=0.001, chunksize=1_000_000, cache=True, refresh=False):
+    """
+    Summary dict of a traffic file, from its sidecar if that matches the
+    file's fingerprint and the bucket width; returns (summary, cached).
+    """
+    fp = fingerprint(path)
+    key = {'version': SUMMARY_VERSION, 'fingerprint': fp, 'bucket': bucket}
+    sidecar = sidecar_path(path)
+    if cache and not refresh and os.path.exists(sidecar):
+        try:
+            with open(sidecar) as f:
+                stored = json.load(f)
+            if stored.get('key') == key:
+                return stored['summary'], True
+        except (OSError, ValueError):
+            pass  # unreadable sidecar: recompute
+
+    s = Summary(bucket)
+    for chunk in read_flow_chunks(path, chunksize):
+        s.add(*chunk)
+    summary = s.to_dict()
+    summary['format'] = 'binary' if is_binary(path) else 'text'
+    summary['header_count'] = read_count(path)
+    if cache:
+        tmp = sidecar + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'key': key, 'summary': summary}, f)
+        os.replace(tmp, sidecar)
+    return summary, False
+
+
+def histogram_rows(load, rows):
+    """(start, length, bytes, flows) of the load histogram merged into at most rows rows."""
+    nb = np.asarray(load['bytes'], dtype=np.int64)
+    nf = np.asarray(load['flows'], dtype=np.int64)
+    per_row = max(1, -(-len(nb) // rows))
+    starts = np.arange(0, len(nb), per_row)
+    return [(load['origin'] + i * load['bucket'], min(per_row, len(nb) - i) * load['bucket'],
+             int(nb[i:i + per_row].sum()), int(nf[i:i + per_row].sum())) for i in starts]
+
+
+def print_summary(path, summary, cached, nhost=None, bandwidth=None, n_pairs=10, rows=20):
+    print(f"File: {path} ({summary['format']}{', cached summary' if cached else ''})")
+    header = summary['header_count']
+    print(f"Flows: {summary['flows']} (header: {header}{'' if header == summary['flows'] else ', MISMATCH'})")
+    if summary['flows'] == 0:
+        return
+    span = summary['last_t'] - summary['first_t']
+    print(f"  Time range: {summary['first_t']:.6f}s - {summary['last_t']:.6f}s ({span:.6f}s)")
+    print(f"  Bytes: {summary['bytes']}")
+    for pg, d in sorted(summary['pg'].items(), key=lambda kv: int(kv[0])):
+        print(f"    pg {pg}: {d['flows']} flows, {d['bytes']} bytes ({d['bytes'] / summary['bytes']:.2%})")
+    size = summary['size']
+    print(f"  Sizes: min {size['min']}, mean {size['mean']:.1f}, max {size['max']}")
+    print("    " + ", ".join(f"p{p} {v}" for p, v in size['percentiles'].items()))
+    print(f"  Pairs: {summary['n_pairs']} with flows; busiest:")
+    for src, dst, count in summary['pairs'][:n_pairs]:
+        print(f"    {src}->{dst}: {count} flows")
+
+    rows = histogram_rows(summary['load'], rows)
+    peak = max(r[2] / r[1] for r in rows)
+    bucket, width = summary['load']['bucket'], rows[0][1]
+    merged = int(round(width / bucket))
+    print(f"  Offered load per {width:g}s row" + (f" ({merged} x {bucket:g}s buckets)" if merged > 1 else "")
+          + (f" (fraction of {nhost} x {bandwidth:.4g} bps):" if nhost and bandwidth else " (Gbps):"))
+    for start, length, nbytes, nflows in rows:
+        rate = nbytes * 8 / length
+        value = rate / (nhost * bandwidth) if nhost and bandwidth else rate * 1e-9
+        bar = '#' * int(round(40 * nbytes / length / peak)) if peak > 0 else ''
+        print(f"    {start:.6f}s {value:10.4f} {nflows:9d} flows {bar}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a traffic file (cached in a sidecar JSON)')
+    parser.add_argument('-i', '--input', required=True, help='Traffic file (text or binary)')
+    parser.add_argument('-n', '--nhost', type=int, default=None, help='Number of hosts (load as a fraction)')
+    parser.add_argument('-b', '--bandwidth', default=None, help='Host link bandwidth (G/M/K) (load as a fraction)')
+    parser.add_argument('--bucket', type=float, default=0.001, help='Load histogram bucket in seconds (default: 0.001)')
+    parser.add_argument('--rows', type=int, default=20, help='Rows of the printed load histogram (default: 20)')
+    parser.add_argument('--pairs', type=int, default=10, help='Busiest pairs to print (default: 10)')
+    parser.add_argument('--refresh', action='store_true', help='Recompute even if the sidecar is up to date')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the sidecar')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Flows per chunk')
+    args = parser.parse_args()
+
+    bandwidth = None
+    if args.bandwidth:
+        bandwidth = translate_bandwidth(args.bandwidth)
+        if bandwidth is None:
+            print("Error: bandwidth format incorrect")
+            sys.exit(1)
+    if args.bucket <= 0:
+        print("Error: --bucket must be positive")
+        sys.exit(1)
+
+    try:
+        summary, cached = summarize(args.input, args.bucket, args.chunksize, not args.no_cache, args.refresh)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(args.input, summary, cached, args.nhost, bandwidth, args.pairs, args.rows)
+
+
+if __name__ == "__main__":
+    main()
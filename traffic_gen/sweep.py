@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Generate a grid of traffic files (workloads x loads x seeds) in one run.
+
+Every (CDF, load, seed) combination is one traffic_gen.py scenario,
+generated with the vectorized engine: the output for a seed is the same
+as `traffic_gen.py --vectorized --seed SEED` (with the same --chunk).
+Each CDF is read once, and the CustomRand objects are sent to the worker
+processes once, when the pool starts. Scenarios are generated in a process
+pool (-j) and each is written to a temporary file that is renamed when
+complete.
+
+The output directory gets a manifest.json with one entry per file: the
+scenario parameters, a hash of the CDF, the flow count, and the achieved
+load (bytes sent / (nhost * bandwidth * time)). A scenario is skipped if
+its file exists and its manifest entry has the same parameters, so an
+interrupted or extended sweep only generates what is missing. The
+manifest is rewritten after every scenario.
+
+Usage:
+    # 4 workloads x 5 loads x 2 seeds = 40 files, 8 worker processes
+    uv run traffic_gen/sweep.py -o sweep/ -n 64 -b 100G -t 0.1 -j 8 \\
+        -c traffic_gen/dist_cdf/WebSearch_distribution.txt traffic_gen/dist_cdf/FbHdp_distribution.txt \\
+           traffic_gen/dist_cdf/GoogleRPC2008.txt traffic_gen/dist_cdf/AliStorage2019.txt \\
+        -l 0.4 0.5 0.6 0.7 0.8 --seed 1 2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from tqdm import tqdm
+
+from custom_rand import read_cdf
+from traffic_gen import translate_bandwidth
+from traffic_io import BINARY_SUFFIX, open_writer
+from vector_gen import BASE_T, FlowModel, generate_chunks
+
+MANIFEST = 'manifest.json'
+
+_cdfs = None
+
+
+def _init_sweep(cdfs):
+    global _cdfs
+    _cdfs = cdfs
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def run_scenario(task):
+    """Generate one scenario (runs in a worker process); returns its manifest entry."""
+    path, params = task
+    customRand = _cdfs[params['cdf']]
+    time = params['time'] * 1e9
+    chunk = params['chunk'] * 1e9 if params['chunk'] else time
+    avg_inter_arrival = 1 / (params['bandwidth'] * params['load'] / 8. / customRand.getAvg()) * 1000000000
+    model = FlowModel(params['nhost'], customRand, avg_inter_arrival)
+    total_bytes = 0
+    tmp = path + '.tmp'
+    with open_writer(tmp, path.endswith(BINARY_SUFFIX)) as writer:
+        for src, dst, size, t in generate_chunks(model, time, chunk, params['seed'], 1, BASE_T):
+            writer.write(src, dst, 2, 100, size, t)
+            total_bytes += int(size.sum())
+    os.replace(tmp, path)
+    achieved = total_bytes * 8 / (params['nhost'] * params['bandwidth'] * params['time'])
+    return {'file': os.path.basename(path), 'params': params, 'flows': writer.count,
+            'bytes': total_bytes, 'achieved_load': achieved}
+
+
+def load_manifest(out_dir):
+    path = out_dir / MANIFEST
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return {e['file']: e for e in json.load(f)['scenarios']}
+
+
+def write_manifest(out_dir, entries):
+    tmp = out_dir / (MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'scenarios': sorted(entries.values(), key=lambda e: e['file'])}, f, indent=2)
+    os.replace(tmp, out_dir / MANIFEST)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate traffic files for every workload x load x seed')
+    parser.add_argument('-c', '--cdf', nargs='+', required=True, help='CDF files (one workload each)')
+    parser.add_argument('-l', '--load', nargs='+', type=float, required=True, help='Loads (0.0-1.0)')
+    parser.add_argument('--seed', nargs='+', type=int, default=[1], help='Seeds (default: 1)')
+    parser.add_argument('-n', '--nhost', type=int, required=True, help='Number of hosts')
+    parser.add_argument('-b', '--bandwidth', default='10G', help='Host link bandwidth (G/M/K), default 10G')
+    parser.add_argument('-t', '--time', type=float, default=10.0, help='Run time in seconds (default: 10)')
+    parser.add_argument('--chunk', type=float, default=None,
+                        help='Generate this many seconds at a time (bounds memory per worker)')
+    parser.add_argument('-o', '--out-dir', required=True, help='Output directory')
+    parser.add_argument('--name', default='{workload}_{load}_s{seed}.txt',
+                        help='File name template ({workload} = CDF file stem, {load}, {seed}); *.bin writes binary files')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='Worker processes (default: 1)')
+    parser.add_argument('--force', action='store_true', help='Regenerate scenarios that already exist')
+    args = parser.parse_args()
+
+    bandwidth = translate_bandwidth(args.bandwidth)
+    if bandwidth is None:
+        print("Error: bandwidth format incorrect")
+        sys.exit(1)
+
+    cdfs, hashes = {}, {}
+    for path in args.cdf:
+        customRand = read_cdf(path)
+        if customRand is None:
+            print(f"Error: Not valid cdf: {path}")
+            sys.exit(1)
+        cdfs[path] = customRand
+        hashes[path] = file_hash(path)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out_dir)
+
+    tasks, skipped = [], 0
+    for cdf in args.cdf:
+        for load in args.load:
+            for seed in args.seed:
+                name = args.name.format(workload=Path(cdf).stem, load=load, seed=seed)
+                params = {'cdf': cdf, 'cdf_sha1': hashes[cdf], 'load': load, 'seed': seed, 'nhost': args.nhost,
+                          'bandwidth': bandwidth, 'time': args.time, 'chunk': args.chunk}
+                entry = manifest.get(name)
+                if not args.force and entry is not None and entry['params'] == params and (out_dir / name).exists():
+                    skipped += 1
+                    continue
+                tasks.append((str(out_dir / name), params))
+    if len({t[0] for t in tasks}) != len(tasks):
+        print("Error: --name does not give every scenario its own file")
+        sys.exit(1)
+
+    print(f"Scenarios: {len(tasks) + skipped} ({skipped} up to date, {len(tasks)} to generate)")
+    with ProcessPoolExecutor(args.workers, initializer=_init_sweep, initargs=(cdfs,)) as pool:
+        futures = [pool.submit(run_scenario, task) for task in tasks]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Generating scenarios"):
+            entry = future.result()
+            manifest[entry['file']] = entry
+            write_manifest(out_dir, manifest)
+    if not tasks:
+        write_manifest(out_dir, manifest)
+
+    for name in sorted(manifest):
+        e = manifest[name]
+        print(f"  {name}: {e['flows']} flows, load {e['params']['load']} -> {e['achieved_load']:.4f}")
+    print(f"Manifest written to: {out_dir / MANIFEST}")
+
+
+if __name__ == "__main__":
+    main()
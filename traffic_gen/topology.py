@@ -0,0 +1,179 @@
+"""
+Topology-aware destination sampling (rack / pod / cross-pod locality).
+
+A topology assigns every host a rack (ToR) and a pod:
+
+  fat_tree(k)                      k-ary fat-tree: k pods of k/2 ToRs with
+                                   k/2 hosts each (k^3/4 hosts)
+  racks(nhost, hosts_per_tor, tors_per_pod)
+                                   consecutive hosts per ToR, consecutive
+                                   ToRs per pod (one pod if not given)
+  from_file(path)                  one "host rack pod" line per host
+
+LocalitySampler sends a fraction of every host's flows to another host of
+its own rack, a fraction to another rack of its pod and the rest to another
+pod, each uniformly within the level (without fractions, every other host
+is equally likely). A level that does not exist for a host (a single-host
+rack, a single-rack pod, a single pod) is dropped and the other fractions
+are rescaled for that host.
+
+Hosts are ordered by (pod, rack), so every rack and every pod is a
+contiguous range and a destination is an index into that order: within
+the rack the source is skipped with the same offset trick as the uniform
+model, and within the pod / the whole network the source's own rack / pod
+is skipped by shifting indices past it. Sampling is a handful of array
+operations per batch of flows, whatever the number of hosts.
+
+The sampler only chooses destinations, so every host's offered load is the
+same as in the uniform model.
+"""
+
+import random
+
+import numpy as np
+
+
+class Topology:
+    def __init__(self, rack, pod):
+        self.rack = np.asarray(rack, dtype=np.int64)
+        self.pod = np.asarray(pod, dtype=np.int64)
+        self.nhost = len(self.rack)
+
+
+def fat_tree(k):
+    if k < 2 or k % 2:
+        raise ValueError("fat-tree k must be an even number >= 2")
+    host = np.arange(k ** 3 // 4)
+    return Topology(host // (k // 2), host // (k * k // 4))
+
+
+def racks(nhost, hosts_per_tor, tors_per_pod=None):
+    host = np.arange(nhost)
+    rack = host // hosts_per_tor
+    pod = rack // tors_per_pod if tors_per_pod else np.zeros(nhost, dtype=np.int64)
+    return Topology(rack, pod)
+
+
+def from_file(path):
+    """Host map file: one "host rack pod" line per host."""
+    m = np.loadtxt(path, dtype=np.int64, ndmin=2)
+    if m.shape[1] != 3:
+        raise ValueError("host map lines must be 'host rack pod'")
+    nhost = int(m[:, 0].max()) + 1
+    if len(m) != nhost or len(np.unique(m[:, 0])) != nhost:
+        raise ValueError("host map must list every host 0..n-1 exactly once")
+    rack = np.empty(nhost, dtype=np.int64)
+    pod = np.empty(nhost, dtype=np.int64)
+    rack[m[:, 0]] = m[:, 1]
+    pod[m[:, 0]] = m[:, 2]
+    return Topology(rack, pod)
+
+
+class LocalitySampler:
+    """Destinations split into rack-local, pod-local and cross-pod fractions."""
+
+    def __init__(self, topology, fracs=None):
+        if fracs is not None:
+            fracs = np.array(fracs, dtype=np.float64)
+            if len(fracs) != 3 or (fracs < 0).any() or fracs.sum() <= 0:
+                raise ValueError("locality fractions must be 3 non-negative numbers, not all zero")
+        self.nhost = topology.nhost
+        # Racks are only meaningful inside a pod: key them by (pod, rack)
+        _, rack_id = np.unique(np.stack([topology.pod, topology.rack]), axis=1, return_inverse=True)
+        _, pod_id = np.unique(topology.pod, return_inverse=True)
+        self.order = np.lexsort((np.arange(self.nhost), rack_id, pod_id))
+        self.pos = np.empty(self.nhost, dtype=np.int64)
+        self.pos[self.order] = np.arange(self.nhost)
+
+        rack_size = np.bincount(rack_id)
+        pod_size = np.bincount(pod_id)
+        # First index (in host order) of every rack / pod
+        first = np.full(len(rack_size), self.nhost, dtype=np.int64)
+        np.minimum.at(first, rack_id, self.pos)
+        pod_first = np.full(len(pod_size), self.nhost, dtype=np.int64)
+        np.minimum.at(pod_first, pod_id, self.pos)
+        self.rack_start = first[rack_id]
+        self.rack_size = rack_size[rack_id]
+        self.pod_start = pod_first[pod_id]
+        self.pod_size = pod_size[pod_id]
+
+        # Per-host level probabilities, without the levels a host does not have
+        counts = np.stack([self.rack_size - 1, self.pod_size - self.rack_size, self.nhost - self.pod_size], axis=1)
+        w = counts.astype(np.float64) if fracs is None else fracs * (counts > 0)
+        total = w.sum(axis=1)
+        if (total == 0).any():
+            raise ValueError("some hosts have no destination at the requested locality levels")
+        cum = np.cumsum(w / total[:, None], axis=1)
+        self.rack_cut = cum[:, 0]
+        self.pod_cut = cum[:, 1]
+
+    def draw(self, rng, n):
+        return rng.random(n), rng.random(n)
+
+    def pick(self, src, draws):
+        level_u, u = draws
+        pos = self.pos[src]
+        rack_start, rack_size = self.rack_start[src], self.rack_size[src]
+        pod_start, pod_size = self.pod_start[src], self.pod_size[src]
+        in_rack = level_u < self.rack_cut[src]
+        in_pod = ~in_rack & (level_u < self.pod_cut[src])
+        cross = ~in_rack & ~in_pod
+
+        idx = np.empty(len(src), dtype=np.int64)
+        # Same rack: shift the source by 1..rack_size-1 within the rack
+        k = _scaled(u[in_rack], rack_size[in_rack] - 1)
+        idx[in_rack] = rack_start[in_rack] + (pos[in_rack] - rack_start[in_rack] + 1 + k) % rack_size[in_rack]
+        # Same pod, other rack: index into the pod, skipping the source's rack
+        k = pod_start[in_pod] + _scaled(u[in_pod], pod_size[in_pod] - rack_size[in_pod])
+        idx[in_pod] = k + np.where(k >= rack_start[in_pod], rack_size[in_pod], 0)
+        # Other pod: index into all hosts, skipping the source's pod
+        k = _scaled(u[cross], self.nhost - pod_size[cross])
+        idx[cross] = k + np.where(k >= pod_start[cross], pod_size[cross], 0)
+        return self.order[idx]
+
+    def sample(self, src, rng):
+        return self.pick(src, self.draw(rng, len(src)))
+
+    def sample_one(self, src, rand=random.random):
+        draws = (np.array([rand()]), np.array([rand()]))
+        return int(self.pick(np.array([src]), draws)[0])
+
+
+def _scaled(u, count):
+    """floor(u * count), kept below count."""
+    return np.minimum((u * count).astype(np.int64), count - 1)
+
+
+def parse_locality(spec):
+    """Parse "RACK,POD,CROSS" locality fractions."""
+    parts = [float(x) for x in str(spec).split(',')]
+    if len(parts) != 3:
+        raise ValueError("locality must be RACK,POD,CROSS fractions")
+    return parts
+
+
+def sampler_from_options(nhost, fat_tree_k=None, hosts_per_tor=None, tors_per_pod=None, host_map=None,
+                         locality=None):
+    """
+    Locality sampler for the topology options, or None if none is given.
+    Returns (sampler, nhost); with --fat-tree nhost may be left out.
+    """
+    given = [o for o in (fat_tree_k, hosts_per_tor, host_map) if o is not None]
+    if not given:
+        if locality is not None:
+            raise ValueError("--locality needs a topology (--fat-tree, --hosts-per-tor or --host-map)")
+        return None, nhost
+    if len(given) > 1:
+        raise ValueError("use only one of --fat-tree, --hosts-per-tor and --host-map")
+    if fat_tree_k is not None:
+        topo = fat_tree(int(fat_tree_k))
+    elif host_map is not None:
+        topo = from_file(host_map)
+    else:
+        if nhost is None:
+            raise ValueError("--hosts-per-tor needs -n")
+        topo = racks(nhost, int(hosts_per_tor), int(tors_per_pod) if tors_per_pod else None)
+    if nhost is not None and nhost != topo.nhost:
+        raise ValueError(f"topology has {topo.nhost} hosts, not {nhost}")
+    fracs = parse_locality(locality) if locality is not None else None
+    return LocalitySampler(topo, fracs), topo.nhost
@@ -13,6 +13,41 @@ Traffic generation model (per-node egress offered load):
     <flow_count>
     <src> <dst> <priority> <dst_port> <size_bytes> <start_time_seconds>
   start_time uses base_t = 2e9 ns; priority is fixed to pg=2.
+- --vectorized generates the same model with the NumPy engine in
+  vector_gen.py (block-drawn inter-arrivals, bulk sizes/destinations,
+  one global sort) and writes the output with a bulk formatter.
+- --chunk S (implies --vectorized) generates S seconds of simulated time
+  at a time, carrying each host's Poisson state across windows and
+  streaming each sorted window to disk, so memory is bounded by the
+  window size. The flow count is filled into a fixed-width header at the
+  end.
+- --seed N makes a run reproducible. In the vectorized engine every host
+  has its own Philox stream spawned from the seed, and -j W generates
+  host blocks on W worker processes; the output for a given seed (and
+  --chunk) does not depend on W. Without --seed the seed that was drawn
+  is printed so the run can be regenerated.
+- --tm FILE / --zipf ALPHA / --hotspot K,FRAC replace the uniform
+  destination choice by a traffic matrix (weights from a file, Zipf
+  popularity, or a fraction FRAC of each host's flows to hosts 0..K-1);
+  destinations are drawn from alias tables (traffic_matrix.py)
+  in both engines.
+- --fat-tree K, --hosts-per-tor H [--tors-per-pod T] or --host-map FILE
+  give the hosts a rack/pod topology and --locality R,P,C the fractions
+  of each host's flows that stay in its rack, stay in its pod and cross
+  pods (topology.py). Only destinations change, so per-host offered load
+  is as above. With --fat-tree, -n defaults to k^3/4.
+- --arrival SPEC (implies --vectorized) replaces the Poisson arrivals by
+  a bursty process of arrivals.py (lognormal or Pareto gaps, ON/OFF with
+  heavy-tailed periods, MMPP) with the same mean gap, so per-host offered
+  load is still bandwidth * load.
+- --load-schedule SPEC (implies --vectorized) replaces the constant -l by
+  a piecewise-linear load over time ("0:0.1,0.5:0.6,1:0.1" in seconds
+  since the start, or a CSV file of time,load lines; load_schedule.py).
+  Arrivals are generated at the peak load and thinned with probability
+  load(t) / peak.
+- An output name ending in .bin (implies --vectorized) writes the binary
+  traffic format of traffic_io.py instead of text; convert_traffic.py
+  converts between the two.
 """
 
 import sys
@@ -20,7 +55,14 @@ import random
 import math
 import heapq
 from optparse import OptionParser
+import numpy as np
+import arrivals
+import load_schedule
 from custom_rand import CustomRand
+from traffic_io import BINARY_SUFFIX, open_writer
+from vector_gen import FlowModel, generate_chunks
+import topology
+import traffic_matrix
 from tqdm import tqdm
 
 def translate_bandwidth(b):
@@ -48,14 +90,32 @@ if __name__ == "__main__":
 	parser.add_option("-b", "--bandwidth", dest = "bandwidth", help = "the bandwidth of host link (G/M/K), by default 10G", default = "10G")
 	parser.add_option("-t", "--time", dest = "time", help = "the total run time (s), by default 10", default = "10")
 	parser.add_option("-o", "--output", dest = "output", help = "the output file", default = "tmp_traffic.txt")
+	parser.add_option("--vectorized", dest = "vectorized", action = "store_true", help = "use the vectorized NumPy engine", default = False)
+	parser.add_option("--chunk", dest = "chunk", help = "generate this many seconds of simulated time at a time (implies --vectorized), by default the whole run", default = None)
+	parser.add_option("--seed", dest = "seed", help = "random seed for a reproducible run", default = None)
+	parser.add_option("-j", "--workers", dest = "workers", help = "worker processes for the vectorized engine (implies --vectorized), by default 1", default = "1")
+	parser.add_option("--tm", dest = "tm", help = "traffic matrix file: nhost x nhost destination weights, row = source (text or .npy)", default = None)
+	parser.add_option("--zipf", dest = "zipf", help = "Zipf destination popularity with this exponent (host 0 hottest)", default = None)
+	parser.add_option("--hotspot", dest = "hotspot", help = "K,FRAC: FRAC of every host's flows go to hosts 0..K-1", default = None)
+	parser.add_option("--fat-tree", dest = "fat_tree", help = "k-ary fat-tree topology (k^3/4 hosts)", default = None)
+	parser.add_option("--hosts-per-tor", dest = "hosts_per_tor", help = "hosts per ToR (consecutive host ids)", default = None)
+	parser.add_option("--tors-per-pod", dest = "tors_per_pod", help = "ToRs per pod with --hosts-per-tor, by default one pod", default = None)
+	parser.add_option("--host-map", dest = "host_map", help = "host map file, one 'host rack pod' line per host", default = None)
+	parser.add_option("--locality", dest = "locality", help = "RACK,POD,CROSS fractions of each host's flows, by default uniform", default = None)
+	parser.add_option("--load-schedule", dest = "load_schedule", help = "load over time instead of -l: TIME:LOAD,... (s since start) or a CSV file of time,load (implies --vectorized)", default = None)
+	parser.add_option("--arrival", dest = "arrival", help = "arrival process: poisson, lognormal:SIGMA, pareto:ALPHA, onoff:ON_US,OFF_US[,ALPHA], mmpp:RATIO,HIGH_US,LOW_US (implies --vectorized), by default poisson", default = None)
 	options,args = parser.parse_args()
 
 	base_t = 2000000000
 
-	if not options.nhost:
+	try:
+		locality_sampler, nhost = topology.sampler_from_options(int(options.nhost) if options.nhost else None, options.fat_tree, options.hosts_per_tor, options.tors_per_pod, options.host_map, options.locality)
+	except ValueError as e:
+		print("Error: %s"%e)
+		sys.exit(0)
+	if not nhost:
 		print("please use -n to enter number of hosts")
 		sys.exit(0)
-	nhost = int(options.nhost)
 	load = float(options.load)
 	bandwidth = translate_bandwidth(options.bandwidth)
 	time = float(options.time)*1e9 # translates to ns
@@ -63,6 +123,8 @@ if __name__ == "__main__":
 	if bandwidth == None:
 		print("bandwidth format incorrect")
 		sys.exit(0)
+	if options.seed is not None:
+		random.seed(int(options.seed))
 
 	fileName = options.cdf_file
 	file = open(fileName,"r")
@@ -79,6 +141,46 @@ if __name__ == "__main__":
 		print("Error: Not valid cdf")
 		sys.exit(0)
 
+	try:
+		dst_sampler = traffic_matrix.sampler_from_options(nhost, options.tm, options.zipf, options.hotspot)
+		if dst_sampler is not None and locality_sampler is not None:
+			raise ValueError("a traffic matrix (--tm/--zipf/--hotspot) cannot be combined with --locality topologies")
+		dst_sampler = dst_sampler or locality_sampler
+	except ValueError as e:
+		print("Error: %s"%e)
+		sys.exit(0)
+
+	workers = int(options.workers)
+	if options.vectorized or options.chunk or workers > 1 or options.arrival or options.load_schedule or output.endswith(BINARY_SUFFIX):
+		schedule = None
+		if options.load_schedule:
+			try:
+				schedule = load_schedule.parse(options.load_schedule, base_t)
+			except ValueError as e:
+				print("Error: %s"%e)
+				sys.exit(0)
+			load = schedule.peak
+			print("Load schedule: peak %.3f, mean %.3f"%(schedule.peak, schedule.mean(base_t, base_t + time)))
+		avg = customRand.getAvg()
+		avg_inter_arrival = 1/(bandwidth*load/8./avg)*1000000000
+		try:
+			arrival_process = arrivals.from_spec(options.arrival, avg_inter_arrival)
+		except ValueError as e:
+			print("Error: %s"%e)
+			sys.exit(0)
+		chunk = float(options.chunk)*1e9 if options.chunk else time
+		seed = int(options.seed) if options.seed is not None else np.random.SeedSequence().entropy
+		if options.seed is None:
+			print("Seed: %d"%seed)
+		model = FlowModel(nhost, customRand, avg_inter_arrival, dst_sampler, arrival_process, schedule)
+		pbar = tqdm(total=math.ceil(time / chunk), desc="Generating chunks")
+		with open_writer(output) as writer:
+			for src, dst, size, t in generate_chunks(model, time, chunk, seed, workers, base_t, pbar):
+				writer.write(src, dst, 2, 100, size, t)
+		pbar.close()
+		print("Flows: %d"%writer.count)
+		sys.exit(0)
+
 	ofile = open(output, "w")
 
 	# generate flows
@@ -96,9 +198,12 @@ if __name__ == "__main__":
 		t,src = host_list[0]
 		inter_t = int(poisson(avg_inter_arrival))
 		new_tuple = (src, t + inter_t)
-		dst = random.randint(0, nhost-1)
-		while (dst == src):
+		if dst_sampler is not None:
+			dst = dst_sampler.sample_one(src)
+		else:
 			dst = random.randint(0, nhost-1)
+			while (dst == src):
+				dst = random.randint(0, nhost-1)
 		if (t + inter_t > time + base_t):
 			heapq.heappop(host_list)
 		else:
@@ -0,0 +1,247 @@
+"""
+Bulk readers and writers for the ns3 traffic file format.
+
+    <flow_count>
+    <src> <dst> <priority> <dst_port> <size_bytes> <start_time_seconds>
+
+Flows are passed as NumPy columns with start times in integer ns and
+formatted block by block with a single %-format call per block, instead
+of one write() per flow. Times print as "%d.%09d" of the exact ns value,
+which is what "%.9f" % (t * 1e-9) prints for ns-resolution times.
+
+TrafficWriter streams blocks to disk and fills in the flow count at the
+end through a fixed-width placeholder, the same way add_small_traffic.py
+does, so the count is exact without holding or rewriting the flows.
+
+read_flow_chunks() reads a traffic file back as column chunks, and
+write_merged() merges time-sorted flow columns into an existing
+(time-sorted) traffic file chunk by chunk, so generated traffic can be
+laid over a background file of any size without per-flow Python work.
+
+Binary traffic files (by convention *.bin) hold the same flows as a
+32-byte header (magic, version, record size, flow count) followed by
+fixed-width FLOW_DTYPE records with start times in integer ns. They are
+read by memory-mapping (read_binary), so loading costs no parsing, and
+converted to text with the bulk formatter (convert_traffic.py).
+read_flow_chunks() and iter_flows() accept either format, and
+open_writer() picks the writer from the file name, so every tool built
+on them reads and writes both.
+"""
+
+import numpy as np
+import pandas as pd
+
+FLOW_COLUMNS = ['src', 'dst', 'pg', 'dport', 'size', 't']
+FLOW_FORMAT = "%d %d %d %d %d %d.%09d\n"
+COUNT_FORMAT = "%-15d"
+WRITE_BLOCK = 1 << 16
+
+BINARY_MAGIC = b'NS3FLOWS'
+BINARY_VERSION = 1
+BINARY_SUFFIX = '.bin'
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('record_size', '<u4'), ('count', '<u8'),
+                         ('reserved', '<u8')])
+FLOW_DTYPE = np.dtype([('src', '<i4'), ('dst', '<i4'), ('pg', '<i4'), ('dport', '<i4'), ('size', '<i8'),
+                       ('t', '<i8')])  # t in ns
+
+
+def format_flows(src, dst, pg, dport, size, t_ns):
+    """Format flow columns as traffic-file lines; pg and dport may be scalars."""
+    n = len(src)
+    if n == 0:
+        return ""
+    t_ns = np.asarray(t_ns, dtype=np.int64)
+    block = np.empty((n, 7), dtype=np.int64)
+    block[:, 0] = src
+    block[:, 1] = dst
+    block[:, 2] = pg
+    block[:, 3] = dport
+    block[:, 4] = size
+    block[:, 5] = t_ns // 1000000000
+    block[:, 6] = t_ns % 1000000000
+    return (FLOW_FORMAT * n) % tuple(block.ravel().tolist())
+
+
+def write_flows(f, src, dst, pg, dport, size, t_ns):
+    """Write flow columns to an open text file in blocks of WRITE_BLOCK lines."""
+    n = len(src)
+    pg = np.broadcast_to(pg, n)
+    dport = np.broadcast_to(dport, n)
+    for i in range(0, n, WRITE_BLOCK):
+        j = i + WRITE_BLOCK
+        f.write(format_flows(src[i:j], dst[i:j], pg[i:j], dport[i:j], size[i:j], t_ns[i:j]))
+
+
+class TrafficWriter:
+    """Streaming writer for a traffic file whose flow count is only known at the end."""
+
+    def __init__(self, path):
+        self.f = open(path, "w")
+        self.f.write(COUNT_FORMAT % 0 + "\n")  # placeholder for total count
+        self.count = 0
+
+    def write(self, src, dst, pg, dport, size, t_ns):
+        write_flows(self.f, src, dst, pg, dport, size, t_ns)
+        self.count += len(src)
+
+    def write_flow(self, src, dst, pg, dport, size, t):
+        """Write one flow with its start time t in seconds (for the per-flow tools)."""
+        self.f.write("%d %d %d %d %d %.9f\n" % (src, dst, pg, dport, size, t))
+        self.count += 1
+
+    def close(self):
+        # Same width as the placeholder, so only the header bytes change
+        self.f.seek(0)
+        self.f.write(COUNT_FORMAT % self.count)
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryTrafficWriter:
+    """TrafficWriter for the binary format; the count in the header is filled in at the end."""
+
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.f.write(binary_header(0).tobytes())
+        self.count = 0
+        self.rows = []
+
+    def write(self, src, dst, pg, dport, size, t_ns):
+        self.flush()
+        n = len(src)
+        for i in range(0, n, WRITE_BLOCK):
+            j = min(i + WRITE_BLOCK, n)
+            block = np.empty(j - i, dtype=FLOW_DTYPE)
+            for name, c in zip(FLOW_COLUMNS, (src, dst, pg, dport, size, t_ns)):
+                block[name] = c[i:j] if np.ndim(c) else c
+            block.tofile(self.f)
+        self.count += n
+
+    def write_flow(self, src, dst, pg, dport, size, t):
+        """Buffer one flow with its start time t in seconds (for the per-flow tools)."""
+        self.rows.append((src, dst, pg, dport, size, round(t * 1e9)))
+        if len(self.rows) == WRITE_BLOCK:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            np.array(self.rows, dtype=FLOW_DTYPE).tofile(self.f)
+            self.count += len(self.rows)
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.f.seek(0)
+        self.f.write(binary_header(self.count).tobytes())
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def binary_header(count):
+    return np.array([(BINARY_MAGIC, BINARY_VERSION, FLOW_DTYPE.itemsize, count, 0)], dtype=HEADER_DTYPE)
+
+
+def is_binary(path):
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def open_writer(path, binary=None):
+    """TrafficWriter or BinaryTrafficWriter for path; binary defaults to a *.bin name."""
+    if binary is None:
+        binary = str(path).endswith(BINARY_SUFFIX)
+    return BinaryTrafficWriter(path) if binary else TrafficWriter(path)
+
+
+def read_header(path):
+    """The header of a binary traffic file, checked against this version of the format."""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a binary traffic file")
+    if header['version'][0] != BINARY_VERSION or header['record_size'][0] != FLOW_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported binary traffic format version {header['version'][0]}")
+    return header[0]
+
+
+def read_binary(path):
+    """Flows of a binary traffic file as a read-only memory-mapped FLOW_DTYPE array."""
+    count = int(read_header(path)['count'])
+    if count == 0:
+        return np.empty(0, dtype=FLOW_DTYPE)
+    return np.memmap(path, dtype=FLOW_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+
+def read_count(path):
+    """Flow count in the header of a traffic file of either format (None if there is none)."""
+    if is_binary(path):
+        return int(read_header(path)['count'])
+    with open(path) as f:
+        header = f.readline().split()
+    return int(header[0]) if header else None
+
+
+def iter_flows(path):
+    """Yield (src, dst, pg, dport, size, t) per flow, t in seconds, from a traffic file of either format."""
+    if is_binary(path):
+        for chunk in read_flow_chunks(path, WRITE_BLOCK):
+            t = chunk[5] / 1e9
+            yield from zip(*(c.tolist() for c in chunk[:5]), t.tolist())
+        return
+    with open(path, 'r') as f:
+        f.readline()  # flow count
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 6:
+                yield (int(parts[0]), int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4]),
+                       float(parts[5]))
+
+
+def read_flow_chunks(path, chunksize=1_000_000):
+    """Yield (src, dst, pg, dport, size, t_ns) column chunks of a traffic file of either format."""
+    if is_binary(path):
+        flows = read_binary(path)
+        for i in range(0, len(flows), chunksize):
+            block = flows[i:i + chunksize]
+            yield tuple(block[c].astype(np.int64) for c in FLOW_COLUMNS)
+        return
+    try:
+        reader = pd.read_csv(path, sep=' ', header=None, skiprows=1, names=FLOW_COLUMNS,
+                             usecols=range(6), chunksize=chunksize)
+    except pd.errors.EmptyDataError:
+        return
+    for df in reader:
+        # Times are written with 9 decimals, so rounding recovers the exact ns
+        t_ns = np.rint(df['t'].to_numpy(np.float64) * 1e9).astype(np.int64)
+        yield tuple(df[c].to_numpy(np.int64) for c in FLOW_COLUMNS[:5]) + (t_ns,)
+
+
+def merge_flows(a, b):
+    """Merge two time-sorted flow column tuples; flows of a come first on equal times."""
+    cols = tuple(np.concatenate([x, y]) for x, y in zip(a, b))
+    order = np.argsort(cols[5], kind='stable')
+    return tuple(c[order] for c in cols)
+
+
+def write_merged(writer, path, flows, chunksize=1_000_000):
+    """
+    Write the flows of the traffic file at path merged with time-sorted flow
+    columns (src, dst, pg, dport, size, t_ns) to a TrafficWriter.
+    """
+    flows = tuple(np.broadcast_to(c, len(flows[0])) for c in flows)
+    for chunk in read_flow_chunks(path, chunksize):
+        if len(chunk[5]) == 0:
+            continue
+        cut = int(np.searchsorted(flows[5], chunk[5][-1], side='right'))
+        writer.write(*merge_flows(chunk, tuple(c[:cut] for c in flows)))
+        flows = tuple(c[cut:] for c in flows)
+    writer.write(*flows)
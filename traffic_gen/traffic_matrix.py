@@ -0,0 +1,237 @@
+"""
+Destination sampling from a traffic matrix with per-source alias tables.
+
+Row s of the matrix holds the destination weights of source s (the
+diagonal is ignored, so dst != src without a rejection loop; a source
+whose row is all zero sends uniformly to the other hosts). Each row is
+turned into an alias table (Walker/Vose): a draw picks a column uniformly
+and keeps it with probability prob[s, col], otherwise takes
+alias[s, col], so sampling costs O(1) per flow whatever the matrix.
+
+Matrix files get one table per row (AliasSampler, 12 bytes per entry).
+The parametric matrices are the same weight vector for every source up
+to the zeroed diagonal (zipf) or one of two vectors (hotspot: hot and
+other sources), so SharedAliasSampler keeps one table per distinct
+vector. A draw that hits the source itself is replaced by an inverse-CDF
+draw over the vector without that column, from one extra uniform, which
+gives exactly the row with the diagonal zeroed.
+
+The tables are built for a batch of rows at a time without a per-entry
+Python loop. Within a row the "small" columns (scaled weight p < 1) are
+laid out one after another by their deficit 1 - p and the "large"
+columns (p > 1) by their excess p - 1; a small column is aliased to the
+large one whose excess interval holds the start of its deficit, and a
+large column that runs out becomes a small column aliased to the next
+large one. With cumulative sums these are two searchsorted calls per
+batch; the result is the same table the sequential two-pointer Vose
+construction gives.
+
+Matrices come from a file (nhost x nhost whitespace-separated weights,
+or a .npy array) or from parameters:
+
+  zipf     destination d gets weight 1 / (d + 1)^alpha (host 0 hottest)
+  hotspot  a fraction frac of every source's traffic goes uniformly to
+           the hot hosts 0..k-1 (other than itself), the rest uniformly to
+           the other hosts outside them
+"""
+
+import random
+
+import numpy as np
+
+BATCH_ENTRIES = 1 << 22  # matrix entries per construction batch
+
+
+def build_alias(p):
+    """
+    Alias tables of a batch of rows of scaled weights p (each row sums to
+    its number of columns). Returns (prob, alias).
+    """
+    rows, n = p.shape
+    p = p.ravel()
+    prob = np.ones(rows * n)
+    alias = np.tile(np.arange(n, dtype=np.int32), rows)
+
+    small = np.flatnonzero(p < 1)
+    large = np.flatnonzero(p > 1)
+    if len(small) == 0 or len(large) == 0:
+        return prob.reshape(rows, n), alias.reshape(rows, n)
+    rs, rl = small // n, large // n
+    d = 1 - p[small]
+    x = p[large] - 1
+    D = _segmented_cumsum(d, rs)
+    X = _segmented_cumsum(x, rl)
+    total = np.bincount(rl, weights=x, minlength=rows)
+    # Keys in [row, row + 1), so a single searchsorted stays inside each row
+    scale = 1 / np.where(total > 0, total, 1)
+    d_start = rs + (D - d) * scale[rs]
+    d_end = rs + D * scale[rs]
+    x_end = rl + X * scale[rl]
+    n_large = np.bincount(rl, minlength=rows)
+    first_large = np.cumsum(n_large) - n_large
+    last_large = first_large + n_large - 1
+
+    # Small columns: aliased to the large column current at the start of their deficit.
+    # Rounding can leave a row with p < 1 entries only; those keep prob 1.
+    ok = n_large[rs] > 0
+    j = np.clip(np.searchsorted(x_end, d_start[ok], side='right'), first_large[rs[ok]], last_large[rs[ok]])
+    prob[small[ok]] = p[small[ok]]
+    alias[small[ok]] = large[j] % n
+
+    # Large columns run out inside the deficit of the first small column ending past them
+    i = np.searchsorted(d_end, x_end, side='right')
+    k = np.flatnonzero((np.arange(len(large)) != last_large[rl]) & (i < len(small)))
+    k = k[rs[i[k]] == rl[k]]
+    prob[large[k]] = np.clip(1 - (D[i[k]] - X[k]), 0, 1)
+    alias[large[k]] = large[k + 1] % n
+    return prob.reshape(rows, n), alias.reshape(rows, n)
+
+
+def _segmented_cumsum(v, seg):
+    c = np.cumsum(v)
+    start = np.r_[True, seg[1:] != seg[:-1]]
+    base = (c - v)[start]
+    return c - base[np.cumsum(start) - 1]
+
+
+class AliasSampler:
+    """Per-source destination sampler; row_weights(a, b) gives rows a..b-1 of the weight matrix."""
+
+    def __init__(self, nhost, row_weights):
+        self.nhost = nhost
+        self.prob = np.empty((nhost, nhost))
+        self.alias = np.empty((nhost, nhost), dtype=np.int32)
+        step = max(1, BATCH_ENTRIES // nhost)
+        for a in range(0, nhost, step):
+            b = min(a + step, nhost)
+            w = np.array(row_weights(a, b), dtype=np.float64)
+            if w.shape != (b - a, nhost):
+                raise ValueError(f"traffic matrix must be {nhost} x {nhost}")
+            if (w < 0).any():
+                raise ValueError("traffic matrix weights must be non-negative")
+            w[np.arange(b - a), np.arange(a, b)] = 0
+            empty = w.sum(axis=1) == 0
+            w[empty] = 1
+            w[np.flatnonzero(empty), np.arange(a, b)[empty]] = 0
+            p = w * (nhost / w.sum(axis=1, keepdims=True))
+            self.prob[a:b], self.alias[a:b] = build_alias(p)
+
+    def draw(self, rng, n):
+        return rng.integers(0, self.nhost, n), rng.random(n)
+
+    def pick(self, src, draws):
+        col, u = draws
+        return np.where(u < self.prob[src, col], col, self.alias[src, col]).astype(np.int64)
+
+    def sample(self, src, rng):
+        """Destinations for an array of sources, drawn with a numpy Generator."""
+        return self.pick(src, self.draw(rng, len(src)))
+
+    def sample_one(self, src, rand=random.random):
+        """One destination for src, drawn with a random.random()-like function."""
+        col = int(rand() * self.nhost)
+        if rand() < self.prob[src, col]:
+            return col
+        return int(self.alias[src, col])
+
+
+class SharedAliasSampler:
+    """
+    Destination sampler for matrices whose rows are a few weight vectors
+    with the diagonal zeroed: source s uses weights[cls[s]].
+    """
+
+    def __init__(self, nhost, weights, cls=None):
+        self.nhost = nhost
+        w = np.array(weights, dtype=np.float64).reshape(-1, nhost)
+        if (w < 0).any():
+            raise ValueError("traffic matrix weights must be non-negative")
+        w[w.sum(axis=1) == 0] = 1
+        self.cls = np.zeros(nhost, dtype=np.int64) if cls is None else np.asarray(cls, dtype=np.int64)
+        self.w = w
+        self.cum = np.cumsum(w, axis=1)
+        # Weight left to source s once its own column is removed
+        self.rest = self.cum[self.cls, -1] - w[self.cls, np.arange(nhost)]
+        if (self.rest <= 0).any():
+            raise ValueError("every source needs a positive weight to some other host")
+        self.prob, self.alias = build_alias(w * (nhost / self.cum[:, -1:]))
+
+    def draw(self, rng, n):
+        return rng.integers(0, self.nhost, n), rng.random(n), rng.random(n)
+
+    def pick(self, src, draws):
+        col, u, v = draws
+        c = self.cls[src]
+        dst = np.where(u < self.prob[c, col], col, self.alias[c, col]).astype(np.int64)
+        hit = np.flatnonzero(dst == src)
+        if len(hit):
+            dst[hit] = self._redraw(src[hit], v[hit])
+        return dst
+
+    def _redraw(self, src, v):
+        """Inverse-CDF draws over each source's weights without its own column."""
+        c = self.cls[src]
+        w_self = self.w[c, src]
+        x = v * self.rest[src]
+        # Skip the source's own interval [cum - w_self, cum)
+        x = np.where(x >= self.cum[c, src] - w_self, x + w_self, x)
+        dst = np.empty(len(src), dtype=np.int64)
+        for k in np.unique(c):
+            m = c == k
+            dst[m] = np.searchsorted(self.cum[k], x[m], side='right')
+        return np.minimum(dst, self.nhost - 1)
+
+    def sample(self, src, rng):
+        """Destinations for an array of sources, drawn with a numpy Generator."""
+        return self.pick(src, self.draw(rng, len(src)))
+
+    def sample_one(self, src, rand=random.random):
+        """One destination for src, drawn with a random.random()-like function."""
+        c = self.cls[src]
+        col = int(rand() * self.nhost)
+        dst = col if rand() < self.prob[c, col] else int(self.alias[c, col])
+        if dst == src:
+            dst = int(self._redraw(np.array([src]), np.array([rand()]))[0])
+        return dst
+
+
+def from_file(nhost, path):
+    """Sampler from a weight matrix file (text or .npy)."""
+    w = np.load(path) if str(path).endswith('.npy') else np.loadtxt(path, ndmin=2)
+    return AliasSampler(nhost, lambda a, b: w[a:b])
+
+
+def zipf(nhost, alpha):
+    return SharedAliasSampler(nhost, 1 / np.arange(1, nhost + 1, dtype=np.float64) ** alpha)
+
+
+def hotspot(nhost, k, frac):
+    """
+    A fraction frac of every source's traffic goes to the hot hosts 0..k-1
+    other than itself, the rest to the other hosts outside them (all of it
+    to one side if the other has no host left).
+    """
+    if not 0 < k < nhost or not 0 <= frac <= 1:
+        raise ValueError("hotspot needs 0 < k < nhost and 0 <= frac <= 1")
+    hot = np.arange(nhost) < k
+    w = np.zeros((2, nhost))
+    # Class 0: sources outside the hotspot, class 1: hot sources
+    for c, (n_hot, n_cold) in enumerate(((k, nhost - k - 1), (k - 1, nhost - k))):
+        w[c, hot] = frac / n_hot if n_hot else 0
+        w[c, ~hot] = (1 - frac) / n_cold if n_cold else 0
+    return SharedAliasSampler(nhost, w, hot.astype(np.int64))
+
+
+def sampler_from_options(nhost, tm=None, zipf_alpha=None, hotspot_spec=None):
+    """Destination sampler for the --tm / --zipf / --hotspot options, or None for uniform."""
+    given = [o for o in (tm, zipf_alpha, hotspot_spec) if o is not None]
+    if len(given) > 1:
+        raise ValueError("use only one of --tm, --zipf and --hotspot")
+    if tm is not None:
+        return from_file(nhost, tm)
+    if zipf_alpha is not None:
+        return zipf(nhost, float(zipf_alpha))
+    if hotspot_spec is not None:
+        k, frac = str(hotspot_spec).split(',')
+        return hotspot(nhost, int(k), float(frac))
+    return None
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Validate a traffic file against the parameters it was generated with.
+
+One streaming pass over the file (read in chunks of columns, so files of
+tens of millions of flows are fine) collects:
+
+  header    the flow count in the first line vs the flows in the file,
+            flows out of start-time order, invalid rows (size <= 0,
+            src == dst, host ids outside 0..nhost-1)
+  load      achieved offered load per host (bytes sent * 8 / (bandwidth
+            * duration)) vs -l, and per time window (--window) for the
+            whole network and for the busiest host of each window
+  sizes     Kolmogorov-Smirnov distance between the flow sizes and the
+            CDF (-c); generators truncate CDF values to whole bytes, so
+            P(size <= s) is F just below s + 1, evaluated with the
+            vectorized CustomRand.getPercentileFromValue on the distinct
+            sizes
+  pairs     the src/dst flow count matrix (per-source and per-destination
+            counts beyond --max-pair-hosts hosts): spread of the pair,
+            source and destination counts
+
+Per-host/per-window bytes and size counts are accumulated with bincount /
+unique per chunk; nothing is kept per flow. The duration is -t if given,
+otherwise from --start (2.0 s, the generators' base time) to the last
+flow's start. With --max-ks / --max-load-error the exit code is 1 when a
+check fails, so the validator can guard a generation script; --json also
+writes the report as JSON.
+
+Usage:
+    uv run traffic_gen/validate_traffic.py -i traffic.txt -n 64 -b 100G -l 0.3 -t 0.1 \\
+        -c traffic_gen/dist_cdf/WebSearch_distribution.txt --window 0.01
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from custom_rand import read_cdf
+from traffic_gen import translate_bandwidth
+from traffic_io import read_count, read_flow_chunks
+
+MAX_PAIR_HOSTS = 4096
+
+
+class Validator:
+    def __init__(self, nhost=None, window=None, start=2.0, max_pair_hosts=MAX_PAIR_HOSTS):
+        self.nhost = nhost or 0
+        self.window = int(round(window * 1e9)) if window else None
+        self.start = int(round(start * 1e9))
+        self.max_pair_hosts = max_pair_hosts
+        self.count = 0
+        self.out_of_order = 0
+        self.bad_size = 0
+        self.self_pairs = 0
+        self.before_start = 0
+        self.first_t = None
+        self.last_t = None
+        self.host_bytes = np.zeros(self.nhost, dtype=np.int64)
+        self.src_count = np.zeros(self.nhost, dtype=np.int64)
+        self.dst_count = np.zeros(self.nhost, dtype=np.int64)
+        self.pairs = None
+        self.window_bytes = np.zeros((0, self.nhost), dtype=np.int64)
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.size_counts = np.zeros(0, dtype=np.int64)
+
+    def _grow_hosts(self, n):
+        if n <= self.nhost:
+            return
+        pad = n - self.nhost
+        self.host_bytes = np.pad(self.host_bytes, (0, pad))
+        self.src_count = np.pad(self.src_count, (0, pad))
+        self.dst_count = np.pad(self.dst_count, (0, pad))
+        self.window_bytes = np.pad(self.window_bytes, ((0, 0), (0, pad)))
+        if self.pairs is not None:
+            self.pairs = np.pad(self.pairs, ((0, pad), (0, pad))) if n <= self.max_pair_hosts else None
+        self.nhost = n
+
+    def add(self, src, dst, pg, dport, size, t):
+        if len(t) == 0:
+            return
+        if self.count == 0:
+            self.first_t = int(t[0])
+            if self.nhost <= self.max_pair_hosts:
+                self.pairs = np.zeros((self.nhost, self.nhost), dtype=np.int64)
+        prev = self.last_t if self.last_t is not None else t[0]
+        self.out_of_order += int((np.diff(t, prepend=prev) < 0).sum())
+        self.last_t = int(t[-1])
+        self.count += len(t)
+        self.bad_size += int((size <= 0).sum())
+        self.self_pairs += int((src == dst).sum())
+        self.before_start += int((t < self.start).sum())
+        self._grow_hosts(int(max(src.max(), dst.max())) + 1)
+
+        self.host_bytes += np.bincount(src, weights=size, minlength=self.nhost).astype(np.int64)
+        self.src_count += np.bincount(src, minlength=self.nhost)
+        self.dst_count += np.bincount(dst, minlength=self.nhost)
+        if self.pairs is not None:
+            self.pairs += np.bincount(src * self.nhost + dst, minlength=self.nhost * self.nhost).reshape(
+                self.nhost, self.nhost)
+        if self.window:
+            w = np.maximum(t - self.start, 0) // self.window
+            n_win = int(w.max()) + 1
+            if n_win > len(self.window_bytes):
+                self.window_bytes = np.pad(self.window_bytes, ((0, n_win - len(self.window_bytes)), (0, 0)))
+            self.window_bytes[:n_win] += np.bincount(w * self.nhost + src, weights=size,
+                                                     minlength=n_win * self.nhost).astype(np.int64).reshape(
+                n_win, self.nhost)
+
+        # Distinct sizes and their counts, merged into the running totals
+        vals, counts = np.unique(size, return_counts=True)
+        vals = np.concatenate([self.sizes, vals])
+        counts = np.concatenate([self.size_counts, counts])
+        self.sizes, inverse = np.unique(vals, return_inverse=True)
+        self.size_counts = np.bincount(inverse, weights=counts).astype(np.int64)
+
+    def ks_distance(self, customRand):
+        """KS distance between the sizes and the CDF of int(value) (at least 1 byte)."""
+        if self.count == 0:
+            return None
+        s = self.sizes
+
+        def model_cdf(x):
+            # P(int(V) <= x) = P(V < x + 1): F just below x + 1 (matters at the steps
+            # of fixed-size CDFs); sizes <= 0 are written as 1
+            p = customRand.getPercentileFromValue(np.nextafter((x + 1).astype(np.float64), -np.inf)) / 100
+            p[x + 1 > customRand.xs[-1]] = 1
+            p[x < 1] = 0
+            return p
+        emp = np.cumsum(self.size_counts) / self.count
+        emp_before = np.concatenate([[0], emp[:-1]])
+        # The sup is reached at a size or just below it
+        return float(max(np.abs(emp - model_cdf(s)).max(), np.abs(emp_before - model_cdf(s - 1)).max()))
+
+    def mean_size(self):
+        return float((self.sizes * self.size_counts).sum() / self.count) if self.count else None
+
+
+def spread(x):
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) == 0:
+        return {}
+    mean = x.mean()
+    return {'mean': mean, 'min': float(x.min()), 'max': float(x.max()),
+            'cv': float(x.std() / mean) if mean > 0 else None}
+
+
+def fmt(d, digits=4):
+    return ", ".join(f"{k} {v:.{digits}f}" if isinstance(v, float) else f"{k} {v}" for k, v in d.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a traffic file: header, load, size CDF and pair balance')
+    parser.add_argument('-i', '--input', required=True, help='Traffic file')
+    parser.add_argument('-n', '--nhost', type=int, default=None, help='Number of hosts (default: largest id + 1)')
+    parser.add_argument('-b', '--bandwidth', default='10G', help='Host link bandwidth (G/M/K), default 10G')
+    parser.add_argument('-l', '--load', type=float, default=None, help='Expected load per host')
+    parser.add_argument('-c', '--cdf', default=None, help='CDF the sizes should follow')
+    parser.add_argument('-t', '--time', type=float, default=None,
+                        help='Generated duration in seconds (default: up to the last flow)')
+    parser.add_argument('--start', type=float, default=2.0, help='Start of the run in seconds (default: 2.0)')
+    parser.add_argument('--window', type=float, default=None, help='Time window for the load over time (seconds)')
+    parser.add_argument('--max-pair-hosts', type=int, default=MAX_PAIR_HOSTS,
+                        help=f'Largest nhost for the full pair matrix (default: {MAX_PAIR_HOSTS})')
+    parser.add_argument('--max-ks', type=float, default=None, help='Fail if the KS distance is larger')
+    parser.add_argument('--max-load-error', type=float, default=None,
+                        help='Fail if the mean per-host load is off by more than this fraction of -l')
+    parser.add_argument('--json', default=None, help='Also write the report to this JSON file')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Flows per chunk')
+    args = parser.parse_args()
+
+    bandwidth = translate_bandwidth(args.bandwidth)
+    if bandwidth is None:
+        print("Error: bandwidth format incorrect")
+        sys.exit(1)
+    customRand = None
+    if args.cdf:
+        customRand = read_cdf(args.cdf)
+        if customRand is None:
+            print("Error: Not valid cdf")
+            sys.exit(1)
+
+    v = Validator(args.nhost, args.window, args.start, args.max_pair_hosts)
+    for chunk in read_flow_chunks(args.input, args.chunksize):
+        v.add(*chunk)
+
+    report = {'file': args.input, 'flows': v.count}
+    failed = []
+    header_count = read_count(args.input)
+    report['header'] = {'count': header_count, 'matches': header_count == v.count, 'out_of_order': v.out_of_order,
+                        'bad_size': v.bad_size, 'self_pairs': v.self_pairs, 'before_start': v.before_start}
+    if header_count != v.count:
+        failed.append('header count')
+    if args.nhost is not None and v.nhost > args.nhost:
+        report['header']['host_out_of_range'] = True
+        failed.append('host ids')
+    if v.out_of_order or v.bad_size or v.self_pairs:
+        failed.append('flow fields')
+
+    print(f"File: {args.input}")
+    print(f"Flows: {v.count} (header: {header_count}{'' if header_count == v.count else ', MISMATCH'})")
+    print(f"  Out of order: {v.out_of_order}, size <= 0: {v.bad_size}, src == dst: {v.self_pairs}, "
+          f"before start: {v.before_start}")
+
+    if v.count:
+        duration = args.time * 1e9 if args.time else max(v.last_t - v.start, 1)
+        host_load = v.host_bytes * 8 / (bandwidth * duration * 1e-9)
+        report['load'] = {'duration': duration * 1e-9, 'expected': args.load, 'host': spread(host_load),
+                          'total': float(host_load.mean())}
+        print(f"Load over {duration * 1e-9:.6f}s at {args.bandwidth}" + (f", expected {args.load}" if args.load else ""))
+        print(f"  Per host: {fmt(report['load']['host'])}")
+        if args.load:
+            error = (host_load.mean() - args.load) / args.load
+            report['load']['error'] = float(error)
+            print(f"  Mean error: {error * 100:+.2f}%")
+            if args.max_load_error is not None and abs(error) > args.max_load_error:
+                failed.append('load')
+        if v.window:
+            # The last window may be cut short by the end of the run
+            n_win = max(1, int(np.ceil(duration / v.window)))
+            wb = v.window_bytes[:n_win]
+            net = wb.sum(axis=1) * 8 / (bandwidth * v.nhost * v.window * 1e-9)
+            busiest = wb.max(axis=1) * 8 / (bandwidth * v.window * 1e-9)
+            report['load']['windows'] = {'window': args.window, 'network': net.tolist(),
+                                         'busiest_host': busiest.tolist()}
+            print(f"  Per {args.window}s window, network: {fmt(spread(net))}")
+            print(f"  Per {args.window}s window, busiest host: {fmt(spread(busiest))}")
+
+        report['sizes'] = {'mean': v.mean_size(), 'distinct': len(v.sizes)}
+        print(f"Sizes: mean {v.mean_size():.1f}B, {len(v.sizes)} distinct")
+        if customRand is not None:
+            ks = v.ks_distance(customRand)
+            report['sizes'].update({'cdf': args.cdf, 'cdf_mean': customRand.getAvg(), 'ks': ks})
+            print(f"  CDF {args.cdf}: mean {customRand.getAvg():.1f}B, KS distance {ks:.5f}")
+            if args.max_ks is not None and ks > args.max_ks:
+                failed.append('size cdf')
+
+        report['pairs'] = {'src': spread(v.src_count), 'dst': spread(v.dst_count)}
+        print("Pairs:")
+        print(f"  Flows per source: {fmt(report['pairs']['src'], 2)}")
+        print(f"  Flows per destination: {fmt(report['pairs']['dst'], 2)}")
+        if v.pairs is not None and v.nhost > 1:
+            off = v.pairs[~np.eye(v.nhost, dtype=bool)]
+            report['pairs']['pair'] = spread(off)
+            report['pairs']['unused_pairs'] = int((off == 0).sum())
+            print(f"  Flows per pair: {fmt(report['pairs']['pair'], 2)}, unused pairs: {int((off == 0).sum())}")
+
+    report['failed'] = failed
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Vectorized engine for the per-node Poisson traffic model of traffic_gen.py.
+
+The model is unchanged: every host runs an independent Poisson arrival
+process with mean inter-arrival avg_inter_arrival (ns, truncated to whole
+ns like int(poisson(...))), sizes come from the CDF (at least 1 byte) and
+destinations are uniform among the other hosts. As in the heap-based
+generator, an arrival is only emitted if the host's next arrival still
+falls inside the run.
+
+Instead of one heap operation per flow, each host's inter-arrivals are
+drawn in large blocks and accumulated with cumsum, sizes and destinations
+are sampled in bulk, and hosts are merged with one global sort on
+(start time, src).
+
+generate_chunks() cuts the run into windows of simulated time and carries
+each host's pending arrival from one window to the next, so only one
+window of flows is in memory at a time.
+
+Every host draws from its own counter-based Philox stream spawned from
+one seed (SeedSequence.spawn), so hosts can be generated in a process pool
+and the output for a given seed and chunk length is identical whatever
+the number of workers. The model is sent to each worker once, when the
+pool starts, not with every window; without a pool it is passed to the
+block functions directly, so several generators can run interleaved in
+one process (pipeline.py).
+
+Destinations can instead come from a traffic matrix (traffic_matrix.py):
+FlowModel then samples them from alias tables.
+
+Arrivals can instead come from a bursty process of arrivals.py (same
+mean gap). A process with state (ON/OFF, MMPP) returns its state after
+every gap, and each host keeps the state at its pending arrival, so a
+window resumes the process exactly where the previous one stopped.
+
+With a load schedule (load_schedule.py) arrivals are generated at the
+schedule's peak load and thinned: each host draws one uniform per
+arrival, and a single mask over the block keeps an arrival at t with
+probability load(t) / peak before sizes and destinations are drawn.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from arrivals import PoissonArrivals
+
+BASE_T = 2000000000  # ns
+
+
+def host_streams(seed, first, last):
+    """
+    Independent Philox Generators of hosts first..last-1: host i gets child i
+    of SeedSequence(seed).spawn(), built directly so that a block of hosts
+    can create its own streams.
+    """
+    return [np.random.Generator(np.random.Philox(np.random.SeedSequence(seed, spawn_key=(i,))))
+            for i in range(first, last)]
+
+
+def host_gaps(rng, t_next, t_stop, arrivals, state=None):
+    """
+    Inter-arrival gaps of one host, drawn in blocks from its pending
+    arrival t_next (with process state state) until the running sum
+    passes t_stop. Returns the gap blocks and the process state after
+    every gap (None for processes without state).
+    """
+    blocks, states = [], []
+    last = t_next
+    while last <= t_stop:
+        expected = (t_stop - last) / arrivals.avg
+        block = int(expected + 4 * math.sqrt(expected) + 16)
+        gaps, state_after = arrivals.gaps(rng, block, state)
+        gaps = gaps.astype(np.int64)
+        blocks.append(gaps)
+        if state_after is not None:
+            states.append(state_after)
+            state = state_after[-1]
+        last += int(gaps.sum())
+    return blocks, (states or None)
+
+
+def block_arrivals(t_next, gaps, n_gaps, t_stop, t_end):
+    """
+    Arrivals of a block of hosts, from their pending arrivals t_next and
+    concatenated gaps (n_gaps per host), in one pass over all hosts.
+
+    Returns (host, times, t_next, n): the position in the block and time
+    of every emitted arrival (those whose following arrival is <= t_end),
+    grouped by host, each host's new pending arrival, the first one after
+    t_stop, and the number of gaps each host used to reach it.
+    """
+    length = n_gaps + 1
+    starts = np.cumsum(length) - length
+    vals = np.empty(int(length.sum()), dtype=np.int64)
+    is_start = np.zeros(len(vals), dtype=bool)
+    is_start[starts] = True
+    vals[is_start] = t_next
+    vals[~is_start] = gaps
+    host = np.repeat(np.arange(len(t_next)), length)
+    # Per-host cumulative sum
+    c = np.cumsum(vals)
+    times = c - (c[starts] - t_next)[host]
+    n = np.add.reduceat(times <= t_stop, starts)
+    pos = np.arange(len(times)) - starts[host]
+    emit = pos < n[host]
+    emit[emit] &= times[np.flatnonzero(emit) + 1] <= t_end
+    return host[emit], times[emit], times[starts + n], n
+
+
+class UniformDst:
+    """Uniform destination != src, without rejection: shift src by 1..nhost-1."""
+
+    def __init__(self, nhost):
+        self.nhost = nhost
+
+    def draw(self, rng, n):
+        return (rng.integers(1, self.nhost, n),)
+
+    def pick(self, src, draws):
+        return (src + draws[0]) % self.nhost
+
+    def sample(self, src, rng):
+        return self.pick(src, self.draw(rng, len(src)))
+
+
+class FlowModel:
+    """
+    Per-host flow model: Poisson arrivals (or an arrivals.py process),
+    sizes from the CDF, destinations uniform or drawn by dst_sampler
+    (traffic_matrix.AliasSampler, topology.LocalitySampler), optionally
+    thinned by a load_schedule.LoadSchedule.
+
+    A destination sampler splits sampling into draw(rng, n), the random
+    numbers taken from one host's stream, and pick(src, draws), which maps
+    them to destinations for any number of hosts at once.
+    """
+
+    def __init__(self, nhost, customRand, avg_inter_arrival, dst_sampler=None, arrivals=None, schedule=None):
+        self.nhost = nhost
+        self.customRand = customRand
+        self.avg_inter_arrival = avg_inter_arrival
+        self.dst_sampler = dst_sampler if dst_sampler is not None else UniformDst(nhost)
+        self.arrivals = arrivals if arrivals is not None else PoissonArrivals(avg_inter_arrival)
+        self.schedule = schedule
+
+    def first_arrival(self, rng, base_t):
+        """First arrival of a host and the process state at it."""
+        state = self.arrivals.init_state(rng)
+        gaps, states = self.arrivals.gaps(rng, 1, state)
+        return base_t + int(gaps[0]), (states[0] if states is not None else state)
+
+    def host_draws(self, rng, n):
+        """Random numbers for n flows of one host: size percentiles, then destination draws."""
+        return (rng.random(n),) + self.dst_sampler.draw(rng, n)
+
+    def flows(self, src, draws):
+        """Destinations and sizes of flows from their sources and concatenated draws."""
+        size = self.customRand.getValueFromPercentile(draws[0] * 100).astype(np.int64)
+        size[size <= 0] = 1
+        return self.dst_sampler.pick(src, draws[1:]), size
+
+
+_worker_model = None  # set in pool workers only
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _start_block(task, model=None):
+    """Streams and first arrivals of a block of hosts (the worker's model unless one is given)."""
+    first_host, last_host, seed, base_t = task
+    model = model if model is not None else _worker_model
+    rngs = host_streams(seed, first_host, last_host)
+    first = [model.first_arrival(rng, base_t) for rng in rngs]
+    t_next = np.array([t for t, _ in first], dtype=np.int64)
+    state = np.array([s for _, s in first]).reshape(len(rngs), model.arrivals.n_state)
+    return rngs, t_next, state
+
+
+def _generate_block(task, model=None):
+    """
+    Flows of a contiguous block of hosts for one window (the worker's
+    model unless one is given). Each host only draws its random numbers
+    from its own stream, in the same order as a host-by-host loop would;
+    everything else is done once for the whole block.
+    """
+    first_host, rngs, t_next, state, t_stop, t_end = task
+    model = model if model is not None else _worker_model
+    active = np.flatnonzero(t_next <= t_stop)
+    empty = np.zeros(0, dtype=np.int64)
+    if len(active) == 0:
+        return empty, empty, empty, empty, rngs, t_next, state
+    gaps, states, n_gaps = [], [], np.zeros(len(active), dtype=np.int64)
+    for i, h in enumerate(active.tolist()):
+        blocks, host_states = host_gaps(rngs[h], int(t_next[h]), t_stop, model.arrivals, state[h])
+        gaps += blocks
+        if host_states is not None:
+            states += host_states
+        n_gaps[i] = sum(len(b) for b in blocks)
+    pos, t, t_next[active], n = block_arrivals(t_next[active], np.concatenate(gaps), n_gaps, t_stop, t_end)
+    if states:
+        # State at each host's new pending arrival, reached after n gaps
+        state[active] = np.concatenate(states)[np.cumsum(n_gaps) - n_gaps + n - 1]
+    counts = np.bincount(pos, minlength=len(active))
+    if model.schedule is not None:
+        # Thinning: arrivals were generated at peak load
+        u = [rngs[h].random(m) for h, m in zip(active.tolist(), counts.tolist()) if m > 0]
+        keep = model.schedule.accept(t, np.concatenate(u)) if u else np.zeros(0, dtype=bool)
+        pos, t = pos[keep], t[keep]
+        counts = np.bincount(pos, minlength=len(active))
+    draws = [model.host_draws(rngs[h], m) for h, m in zip(active.tolist(), counts.tolist()) if m > 0]
+    if not draws:
+        return empty, empty, empty, empty, rngs, t_next, state
+    draws = tuple(np.concatenate(d) for d in zip(*draws))
+    src = first_host + active[pos]
+    dst, size = model.flows(src, draws)
+    return src, dst, size, t, rngs, t_next, state
+
+
+def generate_chunks(model, time, chunk, seed=None, workers=1, base_t=BASE_T, progress=None):
+    """
+    Yield (src, dst, size, t_ns) per window of chunk ns of simulated time.
+
+    Windows are disjoint and each is sorted by (start, src), so writing them
+    in order gives a globally sorted file. Peak memory depends on the
+    number of flows in one window, not on the whole run. With workers > 1
+    host blocks are generated in a process pool; since each host owns its
+    RNG stream the result does not depend on workers.
+    """
+    seed = np.random.SeedSequence(seed).entropy
+    t_end = base_t + time
+    n_blocks = max(1, min(model.nhost, 4 * workers))
+    bounds = np.linspace(0, model.nhost, n_blocks + 1).astype(int)
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model,))
+        run, start_block, generate_block = pool.map, _start_block, _generate_block
+    else:
+        pool = None
+        run = map
+        start_block, generate_block = partial(_start_block, model=model), partial(_generate_block, model=model)
+    try:
+        tasks = [(a, b, seed, base_t) for a, b in zip(bounds[:-1], bounds[1:])]
+        started = list(run(start_block, tasks))
+        rngs = [rng for block_rngs, _, _ in started for rng in block_rngs]
+        t_next = np.concatenate([block_next for _, block_next, _ in started])
+        state = np.concatenate([block_state for _, _, block_state in started])
+        t_stop = base_t
+        while t_stop < t_end:
+            t_stop = min(t_stop + chunk, t_end)
+            tasks = [(a, rngs[a:b], t_next[a:b], state[a:b], t_stop, t_end) for a, b in zip(bounds[:-1], bounds[1:])]
+            results = run(generate_block, tasks)
+            srcs, dsts, sizes, times = [], [], [], []
+            for (a, b), (s, d, z, t, block_rngs, block_next, block_state) in zip(zip(bounds[:-1], bounds[1:]), results):
+                rngs[a:b] = block_rngs
+                t_next[a:b] = block_next
+                state[a:b] = block_state
+                srcs.append(s)
+                dsts.append(d)
+                sizes.append(z)
+                times.append(t)
+            if sum(len(s) for s in srcs):
+                src, dst, size, t = (np.concatenate(c) for c in (srcs, dsts, sizes, times))
+                order = np.lexsort((src, t))
+                yield src[order], dst[order], size[order], t[order]
+            if progress is not None:
+                progress.update(1)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def generate_flows(model, time, seed=None, workers=1, base_t=BASE_T):
+    """All flows of a run of length time (ns) starting at base_t, sorted by (start, src)."""
+    windows = list(generate_chunks(model, time, time, seed, workers, base_t))
+    if not windows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    return windows[0]